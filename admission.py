@@ -0,0 +1,124 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Requests in flight; CPU time between them is shared out by the frame scheduler,
+# so admit more analyses than there are cores to let short jobs start promptly.
+MAX_CONCURRENT = int(os.environ.get('ANALYSIS_MAX_CONCURRENT', 2 * (os.cpu_count() or 1)))
+MAX_QUEUE = int(os.environ.get('ANALYSIS_MAX_QUEUE', MAX_CONCURRENT * 2))
+# Per-license cap, keyed by the hashed license key (app.license_tenant). Off by default: with a single
+# license key every caller shares one key, so any cap below MAX_CONCURRENT + MAX_QUEUE would strand queue space.
+MAX_PER_KEY = int(os.environ.get('ANALYSIS_MAX_PER_KEY', 0))
+MAX_WAIT = float(os.environ.get('ANALYSIS_MAX_WAIT', 30))
+WAIT_SAMPLES = 512
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    def __init__(self, key):
+        self.key = key
+        self.enqueued_at = time.monotonic()
+        self.wait_ms = 0.0
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_queue=MAX_QUEUE,
+                 max_per_key=MAX_PER_KEY, max_wait=MAX_WAIT):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_per_key = max_per_key
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._active = 0
+        self._per_key = {}
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._service_time = None
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self, key):
+        ticket = self._acquire(key)
+        started = time.monotonic()
+        try:
+            yield ticket
+        finally:
+            self._release(ticket, time.monotonic() - started)
+
+    def _acquire(self, key):
+        with self._cond:
+            if self.max_per_key and self._per_key.get(key, 0) >= self.max_per_key:
+                self.rejected += 1
+                raise AdmissionRejected('Too many concurrent analyses for this license key',
+                                        self._retry_after(1))
+            if self._active >= self.max_concurrent and len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected('Analysis queue is full', self._retry_after(len(self._queue) + 1))
+
+            ticket = Ticket(key)
+            self._per_key[key] = self._per_key.get(key, 0) + 1
+            self._queue.append(ticket)
+            deadline = ticket.enqueued_at + self.max_wait
+            while self._queue[0] is not ticket or self._active >= self.max_concurrent:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(ticket)
+                    self._drop_key(key)
+                    self.rejected += 1
+                    self._cond.notify_all()
+                    raise AdmissionRejected('Timed out waiting for an analysis slot',
+                                            self._retry_after(len(self._queue) + 1))
+                self._cond.wait(remaining)
+
+            self._queue.popleft()
+            self._active += 1
+            self.admitted += 1
+            ticket.wait_ms = (time.monotonic() - ticket.enqueued_at) * 1000
+            self._waits.append(ticket.wait_ms)
+            self._cond.notify_all()
+            return ticket
+
+    def _release(self, ticket, service_time):
+        with self._cond:
+            self._active -= 1
+            self._drop_key(ticket.key)
+            if self._service_time is None:
+                self._service_time = service_time
+            else:
+                self._service_time = 0.8 * self._service_time + 0.2 * service_time
+            self._cond.notify_all()
+
+    def _drop_key(self, key):
+        self._per_key[key] -= 1
+        if self._per_key[key] == 0:
+            del self._per_key[key]
+
+    def _retry_after(self, position):
+        service_time = self._service_time or 1.0
+        return max(1, math.ceil(service_time * position / self.max_concurrent))
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                'active': self._active,
+                'queue_depth': len(self._queue),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'avg_service_s': round(self._service_time or 0, 3),
+                'wait_ms_p50': round(waits[len(waits) // 2], 2) if waits else 0,
+                'wait_ms_p99': round(waits[int(len(waits) * 0.99)], 2) if waits else 0,
+                'wait_ms_max': round(waits[-1], 2) if waits else 0,
+            }
@@ -0,0 +1,210 @@
+from collections import deque
+
+import cv2
+
+from detection import detect_faces
+from detection_store import DetectionStoreBuilder
+from face_gallery import FaceGallery, face_hashes
+from previews import face_sharpness
+from shots import ShotSegmenter, annotate_shots
+
+TRANSIENT_FIELDS = ('cascade', 'settings', 'fps', 'scale', 'checkpointer')
+
+
+def analysis_scale(width, settings):
+    analysis_width = settings.get('analysisWidth') or 0
+    if analysis_width <= 0 or width <= analysis_width:
+        return 1.0
+    return analysis_width / width
+
+
+def decode_frames(cap, frame_skip, scale=1.0, cache_writer=None, start_frame=0):
+    frame_idx = start_frame
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            frame_idx += 1
+            if frame_idx % frame_skip != 0:
+                continue
+
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if scale != 1.0:
+                gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            if cache_writer is not None:
+                cache_writer.add(frame_idx, gray)
+            yield frame_idx, frame, gray
+    except BaseException:
+        if cache_writer is not None:
+            cache_writer.abort()
+        raise
+
+    if cache_writer is not None:
+        cache_writer.commit()
+
+
+class FrameAnalyzer:
+    def __init__(self, cascade, settings, fps, scale=1.0):
+        self.cascade = cascade
+        self.settings = settings
+        self.fps = fps
+        self.scale = scale
+        self.frame_skip = settings.get('frameSkip', 1)
+
+        self.total_faces = 0
+        self.frame_count = 0
+        self.frames_with_faces = 0
+        self.max_faces = 0
+        self.detected_frames = 0
+        self.face_timeline = []
+        self.detections = DetectionStoreBuilder()
+        self.gallery = FaceGallery() if settings.get('uniqueFaces', True) else None
+
+        self.shot_mode = settings.get('shotDetection', False)
+        self.segmenter = ShotSegmenter(fps) if self.shot_mode else None
+        self.shot_sample_interval = max(self.frame_skip, int(round(fps * settings.get('shotSampleInterval', 1.0))))
+        self.shot_max_samples = settings.get('shotMaxSamples', 3)
+        self.shot_faces = {}
+        self.shot_samples = {}
+        self.shot_start = None
+        self.last_sample_idx = None
+        self.faces = ()
+        self.last_frame = 0
+        self.checkpointer = None
+
+    def should_detect(self, frame_idx, gray):
+        if not self.shot_mode:
+            return True
+
+        # Segment on the analysis-resolution gray frame so cached and decoded runs find the same cuts.
+        if self.segmenter.update(frame_idx, gray):
+            self.shot_start = frame_idx
+            self.shot_faces[frame_idx] = 0
+            self.shot_samples[frame_idx] = []
+            self.last_sample_idx = None
+        samples = self.shot_samples[self.shot_start]
+        run_detection = self.last_sample_idx is None or (
+            len(samples) < self.shot_max_samples and
+            frame_idx - self.last_sample_idx >= self.shot_sample_interval
+        )
+        if run_detection:
+            self.last_sample_idx = frame_idx
+            samples.append(frame_idx)
+        return run_detection
+
+    def detect(self, gray):
+        faces = detect_faces(self.cascade, gray, self.settings, self.scale)
+        hashes = face_hashes(gray, faces, self.scale) if self.gallery is not None else None
+        return faces, face_sharpness(gray, faces, self.scale), hashes
+
+    def record(self, frame_idx, faces=None, sharpness=0.0, hashes=None):
+        self.frame_count += 1
+        if faces is None:
+            faces = self.faces
+            sharpness = 0.0
+        else:
+            self.detected_frames += 1
+            self.faces = faces
+            if self.gallery is not None and hashes is not None:
+                self.gallery.add(frame_idx, faces, hashes)
+            if self.shot_mode:
+                shot_start = self.segmenter.shot_for(frame_idx)
+                self.shot_faces[shot_start] = max(self.shot_faces[shot_start], len(faces))
+
+        num_faces = len(faces)
+        self.face_timeline.append(num_faces)
+        self.detections.add_frame(frame_idx, (frame_idx - 1) / self.fps if self.fps > 0 else 0,
+                                  faces, sharpness)
+
+        if num_faces > 0:
+            self.frames_with_faces += 1
+            self.total_faces += num_faces
+            self.max_faces = max(self.max_faces, num_faces)
+
+        self.last_frame = frame_idx
+        if self.checkpointer is not None:
+            self.checkpointer.maybe_save(self)
+        return faces
+
+    def process(self, frame_idx, frame, gray):
+        if self.should_detect(frame_idx, gray):
+            return self.record(frame_idx, *self.detect(gray))
+        return self.record(frame_idx)
+
+    def state(self):
+        return {name: value for name, value in vars(self).items() if name not in TRANSIENT_FIELDS}
+
+    def resume(self, checkpointer):
+        self.checkpointer = checkpointer
+        state = checkpointer.load()
+        if state is not None:
+            vars(self).update(state)
+        return self.last_frame
+
+    def shots(self):
+        if not self.shot_mode:
+            return None
+        return annotate_shots(self.segmenter.finish(), self.shot_faces, self.shot_samples)
+
+    def summary(self):
+        frame_count = self.frame_count
+        summary = {
+            'total_faces': self.total_faces,
+            'avg_faces': round(self.total_faces / frame_count, 2) if frame_count > 0 else 0,
+            'frame_count': frame_count,
+            'detection_rate': round((self.frames_with_faces / frame_count * 100), 1) if frame_count > 0 else 0,
+            'max_faces': self.max_faces,
+            'frames_with_faces': self.frames_with_faces,
+            'detected_frames': self.detected_frames,
+        }
+        if self.gallery is not None:
+            summary['unique_faces'] = self.gallery.unique_count()
+        return summary
+
+
+def run_inline(analyzer, frames, on_frame=None):
+    for frame_idx, frame, gray in frames:
+        faces = analyzer.process(frame_idx, frame, gray)
+        if on_frame is not None:
+            on_frame(frame_idx, frame, faces)
+
+
+def run_with_frame_ring(analyzer, frames, session, on_frame=None):
+    pending = deque()
+    ready = {}
+
+    def flush():
+        while pending:
+            frame_idx, detect, frame = pending[0]
+            if detect and frame_idx not in ready:
+                break
+            pending.popleft()
+            if detect:
+                faces = analyzer.record(frame_idx, *ready.pop(frame_idx))
+            else:
+                faces = analyzer.record(frame_idx)
+            if on_frame is not None:
+                on_frame(frame_idx, frame, faces)
+
+    for frame_idx, frame, gray in frames:
+        detect = analyzer.should_detect(frame_idx, gray)
+        pending.append((frame_idx, detect, frame if on_frame is not None else None))
+        if detect:
+            if not (session.fits(gray) and session.submit(frame_idx, gray)):
+                ready[frame_idx] = analyzer.detect(gray)
+        while True:
+            result = session.poll()
+            if result is None:
+                break
+            ready[result[0]] = result[1:]
+        flush()
+
+    while pending:
+        if pending[0][1] and pending[0][0] not in ready:
+            result = session.poll(block=True)
+            ready[result[0]] = result[1:]
+        flush()
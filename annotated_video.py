@@ -0,0 +1,101 @@
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+from previews import BOX_COLOR, draw_faces
+
+ANNOTATED_FOURCC = os.environ.get('ANNOTATED_FOURCC', 'mp4v')
+ENCODER_QUEUE_SIZE = int(os.environ.get('ENCODER_QUEUE_SIZE', 32))
+PUT_TIMEOUT = 1.0
+
+
+def draw_overlay(frame, frame_idx, faces):
+    draw_faces(frame, faces)
+    label = f'Frame {frame_idx}  Faces: {len(faces)}'
+    cv2.putText(frame, label, (12, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 4)
+    cv2.putText(frame, label, (12, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, BOX_COLOR, 2)
+    return frame
+
+
+class AnnotatedVideoEncoder:
+    def __init__(self, path, fps, size, fourcc=ANNOTATED_FOURCC, queue_size=ENCODER_QUEUE_SIZE):
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.fourcc = fourcc
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.frames_written = 0
+        self.wait_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame_idx, frame, faces):
+        if frame is None or self.error is not None:
+            return
+        started = time.perf_counter()
+        self._put((frame_idx, frame, faces))
+        self.wait_seconds += time.perf_counter() - started
+
+    def _put(self, item):
+        while self._thread.is_alive():
+            try:
+                self.queue.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        if self.error is None:
+            self.error = 'Encoder thread stopped unexpectedly'
+        return False
+
+    def _run(self):
+        writer = None
+        try:
+            writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.size)
+            if not writer.isOpened():
+                self.error = f'Could not open a {self.fourcc} video writer'
+        except Exception as e:
+            self.error = str(e)
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                if self.error is not None:
+                    continue
+                started = time.perf_counter()
+                try:
+                    frame_idx, frame, faces = item
+                    writer.write(draw_overlay(frame, frame_idx, faces))
+                    self.frames_written += 1
+                except Exception as e:
+                    self.error = str(e)
+                self.encode_seconds += time.perf_counter() - started
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def close(self):
+        self._put(None)
+        self._thread.join()
+        if self.error is not None or not self.frames_written:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def stats(self):
+        return {
+            'frames': self.frames_written,
+            'fps': round(self.fps, 3),
+            'codec': self.fourcc,
+            'producer_wait_ms': round(self.wait_seconds * 1000, 1),
+            'encode_ms': round(self.encode_seconds * 1000, 1),
+            'error': self.error,
+        }
@@ -1,7 +1,11 @@
-from flask import Flask, request, jsonify, render_template_string
+from startup import PRELOAD_HEAVY, preload_heavy_modules, startup_report
+startup_report.import_modules('flask', 'flask_cors', 'numpy', 'cv2')
+
+from flask import Flask, Response, g, make_response, request, jsonify, render_template, send_file
 import cv2
 import numpy as np
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import base64
 import os
 from datetime import datetime
@@ -9,20 +13,87 @@ import json
 import hashlib
 import secrets
 from functools import wraps
-import io
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import logging
-
-app = Flask(__name__)
+import re
+import shutil
+import time
+
+from admission import AdmissionController, AdmissionRejected
+from analysis import FrameAnalyzer, analysis_scale, decode_frames, run_inline, run_with_frame_ring
+from annotated_video import AnnotatedVideoEncoder
+from assets import STATIC_MAX_AGE, Asset, load_static_assets
+from charts import render_timeline_chart
+from cluster import CLUSTER_MODE, CLUSTER_TOKEN, ClusterError, Coordinator, run_distributed
+from checkpoints import Checkpointer, checkpoint_key, purge_expired_checkpoints
+from cpu_budget import cpu_budget
+from detection import face_cascade
+from detection_store import DEFAULT_QUERY_LIMIT, query_limit
+from exports import EXPORT_FORMATS
+from frame_cache import FrameCache
+from frame_ring import get_frame_ring
+from history_store import HistoryStore
+from log_pipeline import LogPipeline, StageTimer, bind_log_context, reset_log_context
+from jobs import (JobRegistry, annotated_video_path, detections_dir, frames_dir, job_dir, new_job_id,
+                  job_in_use, job_media_stats, purge_expired_jobs, source_path, trim_job_media)
+from previews import PREVIEW_PROFILES, FrameRenderer, pick_preview_frame, preview_mimetype
+from profiling import Profiler
+from probe import (MAX_FRAMES, MAX_UPLOAD_BYTES, PROBE_SLICE_BYTES, ProbeError, check_limits,
+                   probe_bytes, probe_file)
+from scheduler import FairScheduler, schedule_frames, tenant_id
+from scratch import ScratchQuotaExceeded, ScratchSpace
+from sweep import SweepError, expand_grid, run_sweep
+
+app = Flask(__name__, static_folder=None)
 app.secret_key = secrets.token_hex(32)
 CORS(app, resources={r"/analyze": {"origins": "*"}}) 
 
-logging.basicConfig(filename='app.log', level=logging.ERROR)
+log_pipeline = LogPipeline()
+logger = logging.getLogger('app')
+
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + UPLOAD_OVERHEAD_BYTES
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
 
 LICENSE_KEY = hashlib.sha256(b"KHAN_MOHD_ASIM_2025").hexdigest()
 
+with startup_report.stage('history_store'):
+    history_store = HistoryStore()
+job_registry = JobRegistry()
+admission = AdmissionController()
+scheduler = FairScheduler()
+frame_cache = FrameCache()
+scratch = ScratchSpace()
+profiler = Profiler()
+coordinator = Coordinator() if CLUSTER_MODE == 'coordinator' else None
+
+@app.before_request
+def start_request_log():
+    request_id = request.headers.get('X-Request-Id', '')
+    if not REQUEST_ID_PATTERN.match(request_id):
+        request_id = secrets.token_hex(8)
+    g.request_id = request_id
+    g.request_started = time.perf_counter()
+    g.log_context = bind_log_context(request_id=request_id)
+
+@app.after_request
+def finish_request_log(response):
+    response.headers['X-Request-Id'] = g.request_id
+    level = logging.WARNING if response.status_code >= 500 else logging.INFO
+    logger.log(level, f'{request.method} {request.path} {response.status_code}', extra={
+        'event': 'request',
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 1),
+    })
+    return response
+
+@app.teardown_request
+def reset_request_log(exc):
+    token = g.pop('log_context', None)
+    if token is not None:
+        reset_log_context(token)
+
 def check_license(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -32,1267 +103,700 @@ def check_license(f):
         return f(*args, **kwargs)
     return decorated_function
 
-HTML_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Video Analytics AI - By Khan Mohd Asim</title>
-    <meta name="author" content="Khan Mohd Asim">
-    <meta name="copyright" content="Copyright 2025 Khan Mohd Asim">
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-            user-select: none;
-        }
-
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', 'Oxygen', sans-serif;
-            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-            color: #e8e8e8;
-            min-height: 100vh;
-            padding: 20px;
-        }
-
-        .watermark {
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            color: rgba(206, 147, 108, 0.3);
-            font-size: 0.8rem;
-            font-weight: 600;
-            z-index: 1000;
-            pointer-events: none;
-        }
-
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-
-        .header {
-            text-align: center;
-            padding: 40px 20px;
-            margin-bottom: 40px;
-        }
-
-        .header h1 {
-            font-size: 2.5rem;
-            font-weight: 600;
-            color: #fff;
-            margin-bottom: 12px;
-            letter-spacing: -0.02em;
-        }
-
-        .header .subtitle {
-            font-size: 1.1rem;
-            color: #a0a0b0;
-            font-weight: 400;
-        }
-
-        .developer-badge {
-            display: inline-block;
-            background: rgba(206, 147, 108, 0.1);
-            border: 1px solid rgba(206, 147, 108, 0.3);
-            padding: 8px 16px;
-            border-radius: 20px;
-            color: #ce936c;
-            font-size: 0.9rem;
-            margin-top: 12px;
-        }
-
-        .tabs {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 30px;
-            border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-            padding-bottom: 10px;
-        }
-
-        .tab {
-            padding: 12px 24px;
-            background: transparent;
-            border: none;
-            color: #a0a0b0;
-            cursor: pointer;
-            font-size: 1rem;
-            font-weight: 500;
-            border-radius: 8px 8px 0 0;
-            transition: all 0.3s ease;
-        }
-
-        .tab:hover {
-            color: #ce936c;
-            background: rgba(206, 147, 108, 0.05);
-        }
-
-        .tab.active {
-            color: #ce936c;
-            background: rgba(206, 147, 108, 0.1);
-            border-bottom: 2px solid #ce936c;
-        }
-
-        .tab-content {
-            display: none;
-        }
-
-        .tab-content.active {
-            display: block;
-            animation: fadeIn 0.5s ease;
-        }
-
-        .upload-section {
-            background: rgba(255, 255, 255, 0.05);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 16px;
-            padding: 40px;
-            margin-bottom: 30px;
-            transition: all 0.3s ease;
-        }
-
-        .upload-section:hover {
-            border-color: rgba(206, 147, 108, 0.3);
-            box-shadow: 0 8px 32px rgba(206, 147, 108, 0.1);
-        }
-
-        .settings-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin-bottom: 20px;
-        }
-
-        .setting-card {
-            background: rgba(255, 255, 255, 0.03);
-            border: 1px solid rgba(255, 255, 255, 0.08);
-            border-radius: 12px;
-            padding: 20px;
-        }
-
-        .setting-label {
-            display: block;
-            font-size: 0.9rem;
-            color: #a0a0b0;
-            margin-bottom: 8px;
-            font-weight: 500;
-        }
-
-        .setting-input {
-            width: 100%;
-            padding: 10px;
-            background: rgba(255, 255, 255, 0.05);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 6px;
-            color: #fff;
-            font-size: 1rem;
-        }
-
-        .setting-input:focus {
-            outline: none;
-            border-color: #ce936c;
-        }
-
-        .toggle-switch {
-            position: relative;
-            width: 50px;
-            height: 26px;
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 13px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-
-        .toggle-switch.active {
-            background: #ce936c;
-        }
-
-        .toggle-slider {
-            position: absolute;
-            top: 3px;
-            left: 3px;
-            width: 20px;
-            height: 20px;
-            background: #fff;
-            border-radius: 50%;
-            transition: all 0.3s ease;
-        }
-
-        .toggle-switch.active .toggle-slider {
-            left: 27px;
-        }
-
-        .file-upload-wrapper {
-            position: relative;
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            padding: 60px 20px;
-            border: 2px dashed rgba(206, 147, 108, 0.3);
-            border-radius: 12px;
-            background: rgba(0, 0, 0, 0.2);
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-
-        .file-upload-wrapper:hover {
-            border-color: rgba(206, 147, 108, 0.6);
-            background: rgba(206, 147, 108, 0.05);
-        }
-
-        .file-upload-wrapper.dragover {
-            border-color: #ce936c;
-            background: rgba(206, 147, 108, 0.1);
-            transform: scale(1.02);
-        }
-
-        .upload-icon {
-            font-size: 3rem;
-            margin-bottom: 20px;
-            opacity: 0.7;
-        }
-
-        .file-input {
-            display: none;
-        }
-
-        .file-label {
-            font-size: 1.1rem;
-            color: #fff;
-            margin-bottom: 8px;
-            font-weight: 500;
-        }
-
-        .file-hint {
-            font-size: 0.9rem;
-            color: #a0a0b0;
-        }
-
-        .selected-file {
-            margin-top: 20px;
-            padding: 15px;
-            background: rgba(206, 147, 108, 0.1);
-            border-radius: 8px;
-            color: #ce936c;
-            display: none;
-        }
-
-        .btn {
-            background: linear-gradient(135deg, #ce936c 0%, #b87a56 100%);
-            color: #fff;
-            border: none;
-            padding: 14px 32px;
-            font-size: 1rem;
-            font-weight: 600;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            margin-top: 20px;
-            width: 100%;
-            max-width: 300px;
-        }
-
-        .btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 20px rgba(206, 147, 108, 0.3);
-        }
-
-        .btn:active {
-            transform: translateY(0);
-        }
-
-        .btn:disabled {
-            background: rgba(255, 255, 255, 0.1);
-            cursor: not-allowed;
-            transform: none;
-        }
-
-        .btn-secondary {
-            background: transparent;
-            border: 2px solid rgba(206, 147, 108, 0.5);
-            color: #ce936c;
-        }
-
-        .btn-secondary:hover {
-            background: rgba(206, 147, 108, 0.1);
-            border-color: #ce936c;
-        }
-
-        .loading {
-            display: none;
-            text-align: center;
-            padding: 40px;
-        }
-
-        .spinner {
-            border: 3px solid rgba(255, 255, 255, 0.1);
-            border-top: 3px solid #ce936c;
-            border-radius: 50%;
-            width: 50px;
-            height: 50px;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 20px;
-        }
-
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-
-        .progress-bar {
-            width: 100%;
-            height: 6px;
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 3px;
-            overflow: hidden;
-            margin-top: 20px;
-        }
-
-        .progress-fill {
-            height: 100%;
-            background: linear-gradient(90deg, #ce936c, #b87a56);
-            width: 0%;
-            transition: width 0.3s ease;
-        }
-
-        .results-section {
-            display: none;
-            animation: fadeIn 0.5s ease;
-        }
-
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(20px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-
-        .stats-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }
-
-        .stat-card {
-            background: rgba(255, 255, 255, 0.05);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 12px;
-            padding: 24px;
-            transition: all 0.3s ease;
-        }
-
-        .stat-card:hover {
-            transform: translateY(-4px);
-            border-color: rgba(206, 147, 108, 0.3);
-            box-shadow: 0 8px 24px rgba(0, 0, 0, 0.2);
-        }
-
-        .stat-label {
-            font-size: 0.85rem;
-            color: #a0a0b0;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            margin-bottom: 8px;
-            font-weight: 500;
-        }
-
-        .stat-value {
-            font-size: 2rem;
-            font-weight: 700;
-            color: #ce936c;
-            margin-bottom: 4px;
-        }
-
-        .stat-description {
-            font-size: 0.9rem;
-            color: #c0c0d0;
-        }
-
-        .chart-container {
-            background: rgba(255, 255, 255, 0.05);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 12px;
-            padding: 24px;
-            margin-top: 20px;
-        }
-
-        .chart-container h3 {
-            font-size: 1.2rem;
-            margin-bottom: 16px;
-            color: #fff;
-            font-weight: 600;
-        }
-
-        .chart-container img {
-            width: 100%;
-            border-radius: 8px;
-        }
-
-        .frame-preview {
-            background: rgba(255, 255, 255, 0.05);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 12px;
-            padding: 24px;
-            margin-top: 20px;
-        }
-
-        .frame-preview h3 {
-            font-size: 1.2rem;
-            margin-bottom: 16px;
-            color: #fff;
-            font-weight: 600;
-        }
-
-        .frame-preview img {
-            width: 100%;
-            border-radius: 8px;
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-
-        .action-buttons {
-            display: flex;
-            gap: 15px;
-            margin-top: 20px;
-            flex-wrap: wrap;
-        }
-
-        .features-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-            gap: 20px;
-            margin-top: 40px;
-            padding: 20px 0;
-        }
-
-        .feature-card {
-            background: rgba(255, 255, 255, 0.03);
-            border: 1px solid rgba(255, 255, 255, 0.08);
-            border-radius: 12px;
-            padding: 24px;
-            transition: all 0.3s ease;
-        }
-
-        .feature-card:hover {
-            background: rgba(255, 255, 255, 0.05);
-            border-color: rgba(206, 147, 108, 0.2);
-            transform: translateY(-4px);
-        }
-
-        .feature-icon {
-            font-size: 2rem;
-            margin-bottom: 12px;
-        }
-
-        .feature-title {
-            font-size: 1.1rem;
-            font-weight: 600;
-            color: #fff;
-            margin-bottom: 8px;
-        }
-
-        .feature-desc {
-            font-size: 0.9rem;
-            color: #a0a0b0;
-            line-height: 1.5;
-        }
-
-        .error-message {
-            background: rgba(255, 59, 48, 0.1);
-            border: 1px solid rgba(255, 59, 48, 0.3);
-            color: #ff6b6b;
-            padding: 16px;
-            border-radius: 8px;
-            margin-top: 20px;
-            display: none;
-        }
-
-        .comparison-view {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 20px;
-            margin-top: 20px;
-        }
+def check_cluster_token(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if coordinator is None:
+            return jsonify({'error': 'Cluster mode is not enabled'}), 404
+        token = request.headers.get('X-Cluster-Token', '')
+        if not CLUSTER_TOKEN or not secrets.compare_digest(token, CLUSTER_TOKEN):
+            return jsonify({'error': 'Invalid or missing cluster token'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
 
-        .comparison-item {
-            background: rgba(255, 255, 255, 0.03);
-            border: 1px solid rgba(255, 255, 255, 0.08);
-            border-radius: 12px;
-            padding: 16px;
-        }
+def license_tenant():
+    return tenant_id(request.headers.get('X-License-Key', ''))
 
-        .comparison-item img {
-            width: 100%;
-            border-radius: 8px;
-            margin-bottom: 12px;
-        }
+def admission_controlled(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            with admission.admit(license_tenant()) as ticket:
+                g.queue_wait_ms = ticket.wait_ms
+                return f(*args, **kwargs)
+        except AdmissionRejected as e:
+            response = jsonify({'error': e.reason, 'retry_after': e.retry_after})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+    return decorated_function
 
-        .comparison-label {
-            font-size: 0.9rem;
-            color: #a0a0b0;
-            text-align: center;
-        }
+def profiled(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        fmt, trigger = profiler.choose(request.headers.get('X-Profile', ''), request.headers.get('X-Profile-Key', ''))
+        if fmt is None:
+            return f(*args, **kwargs)
+        with profiler.profile(request.endpoint, fmt, trigger) as record:
+            response = make_response(f(*args, **kwargs))
+            record.status = response.status_code
+        response.headers['X-Profile-Id'] = record.id
+        return response
+    return decorated_function
 
-        @media (max-width: 768px) {
-            .header h1 {
-                font-size: 1.8rem;
-            }
-            
-            .upload-section {
-                padding: 24px;
-            }
-            
-            .stats-grid {
-                grid-template-columns: 1fr;
-            }
+def check_profile_key(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not profiler.privileged(request.headers.get('X-Profile-Key', '')):
+            return jsonify({'error': 'Invalid or missing profile key'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
 
-            .tabs {
-                overflow-x: auto;
-                flex-wrap: nowrap;
-            }
+def upload_limited(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.content_length and request.content_length > MAX_UPLOAD_BYTES + UPLOAD_OVERHEAD_BYTES:
+            return jsonify({'error': 'File size exceeds 100MB limit'}), 400
+        # Read the whole body here so a slow upload never holds an admission slot.
+        request.get_data(parse_form_data=True)
+        return f(*args, **kwargs)
+    return decorated_function
 
-            .action-buttons {
-                flex-direction: column;
-            }
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({'error': 'File size exceeds 100MB limit'}), 400
 
-            .btn {
-                max-width: 100%;
-            }
-        }
+def upload_size(file):
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
 
-        /* Prevent context menu and text selection */
-        img {
-            pointer-events: none;
-        }
-    </style>
-</head>
-<body oncontextmenu="return false;">
-    <div class="watermark">© 2025 Khan Mohd Asim</div>
+def get_video_upload():
+    if 'video' not in request.files:
+        return None, (jsonify({'error': 'No video uploaded'}), 400)
+    
+    file = request.files['video']
+    if file.filename == '':
+        return None, (jsonify({'error': 'No selected file'}), 400)
     
-    <div class="container">
-        <div class="header">
-            <h1>🎬 Video Analytics AI</h1>
-            <p class="subtitle">Advanced face detection and video analysis powered by computer vision</p>
-            <div class="developer-badge">👨‍💻 Developed by KHAN MOHD ASIM</div>
-        </div>
-
-        <div class="tabs">
-            <button class="tab active" onclick="switchTab('analyze', this)">📊 Analyze</button>
-            <button class="tab" onclick="switchTab('settings', this)">⚙️ Settings</button>
-            <button class="tab" onclick="switchTab('history', this)">📝 History</button>
-            <button class="tab" onclick="switchTab('about', this)">ℹ️ About</button>
-        </div>
-
-
-        <div id="analyzeTab" class="tab-content active">
-            <div class="upload-section" id="uploadSection">
-                <form id="uploadForm" enctype="multipart/form-data">
-                    <div class="file-upload-wrapper" id="dropZone">
-                        <div class="upload-icon">📹</div>
-                        <div class="file-label">Drop your video here or click to browse</div>
-                        <div class="file-hint">Supports MP4, AVI, MOV (Max 100MB)</div>
-                        <input type="file" name="video" id="videoInput" class="file-input" accept="video/*" required>
-                        <div class="selected-file" id="selectedFile"></div>
-                    </div>
-                    <button type="submit" class="btn" id="analyzeBtn" disabled>Analyze Video</button>
-                    <div class="progress-bar" id="progressBar" style="display:none;">
-                        <div class="progress-fill" id="progressFill"></div>
-                    </div>
-                </form>
-                <div class="error-message" id="errorMessage"></div>
-            </div>
-
-            <div class="loading" id="loading">
-                <div class="spinner"></div>
-                <p style="color: #a0a0b0; font-size: 1.1rem;">Analyzing your video... This may take a moment</p>
-                <p style="color: #7a7a8a; font-size: 0.9rem; margin-top: 10px;" id="loadingStatus">Processing frames...</p>
-            </div>
-
-            <div class="results-section" id="resultsSection">
-                <div class="stats-grid">
-                    <div class="stat-card">
-                        <div class="stat-label">Total Faces Detected</div>
-                        <div class="stat-value" id="totalFaces">0</div>
-                        <div class="stat-description">Across all frames</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-label">Average Per Frame</div>
-                        <div class="stat-value" id="avgFaces">0.0</div>
-                        <div class="stat-description">Face density metric</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-label">Frames Processed</div>
-                        <div class="stat-value" id="frameCount">0</div>
-                        <div class="stat-description">Total video frames</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-label">Detection Rate</div>
-                        <div class="stat-value" id="detectionRate">0%</div>
-                        <div class="stat-description">Frames with faces</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-label">Max Faces/Frame</div>
-                        <div class="stat-value" id="maxFaces">0</div>
-                        <div class="stat-description">Peak detection</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-label">Video Duration</div>
-                        <div class="stat-value" id="duration">0s</div>
-                        <div class="stat-description">Total length</div>
-                    </div>
-                </div>
-
-                <div class="chart-container" id="chartContainer" style="display:none;">
-                    <h3>📈 Face Detection Timeline</h3>
-                    <img id="chartImage" src="" alt="Detection chart">
-                </div>
-
-                <div class="frame-preview">
-                    <h3>📸 Sample Frame with Detected Faces</h3>
-                    <img id="sampleFrame" src="" alt="Sample frame">
-                </div>
-
-                <div class="comparison-view" id="comparisonView" style="display:none;">
-                    <div class="comparison-item">
-                        <img id="beforeFrame" src="" alt="Before">
-                        <div class="comparison-label">Before Detection</div>
-                    </div>
-                    <div class="comparison-item">
-                        <img id="afterFrame" src="" alt="After">
-                        <div class="comparison-label">After Detection</div>
-                    </div>
-                </div>
-
-                <div class="action-buttons">
-                    <button class="btn" onclick="resetForm()">Analyze Another Video</button>
-                    <button class="btn btn-secondary" onclick="downloadReport()">📥 Download Report</button>
-                    <button class="btn btn-secondary" onclick="exportData()">📊 Export Data</button>
-                </div>
-            </div>
-
-            <div class="features-grid">
-                <div class="feature-card">
-                    <div class="feature-icon">🎯</div>
-                    <div class="feature-title">Accurate Detection</div>
-                    <div class="feature-desc">Uses advanced Haar Cascade classifiers for reliable face detection</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">⚡</div>
-                    <div class="feature-title">Fast Processing</div>
-                    <div class="feature-desc">Optimized algorithms process videos efficiently</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">📊</div>
-                    <div class="feature-title">Detailed Analytics</div>
-                    <div class="feature-desc">Get comprehensive statistics and visualizations</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">🔒</div>
-                    <div class="feature-title">Privacy First</div>
-                    <div class="feature-desc">Videos are processed locally and deleted immediately</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">📈</div>
-                    <div class="feature-title">Timeline Charts</div>
-                    <div class="feature-desc">Visualize face detection across video timeline</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">💾</div>
-                    <div class="feature-title">Export Options</div>
-                    <div class="feature-desc">Download reports and export data in multiple formats</div>
-                </div>
-            </div>
-        </div>
-
-
-        <div id="settingsTab" class="tab-content">
-            <div class="upload-section">
-                <h2 style="margin-bottom: 24px; color: #fff;">Detection Settings</h2>
-                <div class="settings-grid">
-                    <div class="setting-card">
-                        <label class="setting-label">Sensitivity Level</label>
-                        <input type="range" class="setting-input" id="sensitivity" min="1" max="10" value="5">
-                        <div style="color: #ce936c; margin-top: 8px; text-align: center;" id="sensitivityValue">5</div>
-                    </div>
-                    <div class="setting-card">
-                        <label class="setting-label">Min Face Size (px)</label>
-                        <input type="number" class="setting-input" id="minFaceSize" value="30" min="20" max="100">
-                    </div>
-                    <div class="setting-card">
-                        <label class="setting-label">Frame Skip</label>
-                        <input type="number" class="setting-input" id="frameSkip" value="1" min="1" max="10">
-                        <div style="color: #a0a0b0; font-size: 0.8rem; margin-top: 4px;">Process every Nth frame</div>
-                    </div>
-                    <div class="setting-card">
-                        <label class="setting-label">Draw Bounding Boxes</label>
-                        <div class="toggle-switch active" id="boundingBoxToggle" onclick="toggleSetting(this)">
-                            <div class="toggle-slider"></div>
-                        </div>
-                    </div>
-                    <div class="setting-card">
-                        <label class="setting-label">Generate Timeline Chart</label>
-                        <div class="toggle-switch active" id="chartToggle" onclick="toggleSetting(this)">
-                            <div class="toggle-slider"></div>
-                        </div>
-                    </div>
-                    <div class="setting-card">
-                        <label class="setting-label">Save Analysis History</label>
-                        <div class="toggle-switch active" id="historyToggle" onclick="toggleSetting(this)">
-                            <div class="toggle-slider"></div>
-                        </div>
-                    </div>
-                </div>
-                <button class="btn" onclick="saveSettings()">💾 Save Settings</button>
-            </div>
-        </div>
-
-
-        <div id="historyTab" class="tab-content">
-            <div class="upload-section">
-                <h2 style="margin-bottom: 24px; color: #fff;">Analysis History</h2>
-                <div id="historyList">
-                    <p style="color: #a0a0b0; text-align: center; padding: 40px;">No analysis history yet. Start by analyzing a video!</p>
-                </div>
-            </div>
-        </div>
-
-
-        <div id="aboutTab" class="tab-content">
-            <div class="upload-section">
-                <h2 style="margin-bottom: 24px; color: #fff;">About Video Analytics AI</h2>
-                <div style="color: #c0c0d0; line-height: 1.8;">
-                    <p style="margin-bottom: 16px;"><strong style="color: #ce936c;">Version:</strong> 2.0.0</p>
-                    <p style="margin-bottom: 16px;"><strong style="color: #ce936c;">Developer:</strong> Khan Mohd Asim</p>
-                    <p style="margin-bottom: 16px;"><strong style="color: #ce936c;">Copyright:</strong> © 2025 Khan Mohd Asim. All rights reserved.</p>
-                    <p style="margin-bottom: 16px;"><strong style="color: #ce936c;">Technology Stack:</strong> Flask, OpenCV, Python, Computer Vision</p>
-                    <p style="margin-bottom: 24px;">This advanced video analytics platform uses state-of-the-art computer vision algorithms to detect and analyze faces in video content. Built with privacy and accuracy in mind.</p>
-                    
-                    <div style="background: rgba(206, 147, 108, 0.1); border-left: 3px solid #ce936c; padding: 16px; border-radius: 8px; margin-top: 24px;">
-                        <strong style="color: #ce936c;">⚠️ Legal Notice:</strong>
-                        <p style="margin-top: 8px; font-size: 0.9rem;">Unauthorized copying, modification, or distribution of this software is strictly prohibited. This software is protected by copyright law.</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-
-        document.addEventListener('keydown', function(e) {
-            if (e.key === 'F12' || (e.ctrlKey && e.shiftKey && e.key === 'I') || 
-                (e.ctrlKey && e.shiftKey && e.key === 'J') || (e.ctrlKey && e.key === 'U')) {
-                e.preventDefault();
-                return false;
-            }
-        });
-
-
-        let settings = {
-            sensitivity: 5,
-            minFaceSize: 30,
-            frameSkip: 1,
-            boundingBox: true,
-            chart: true,
-            history: true
-        };
-
-
-        if (localStorage.getItem('videoAnalyticsSettings')) {
-            settings = JSON.parse(localStorage.getItem('videoAnalyticsSettings'));
-        }
-
-        document.getElementById('sensitivity').addEventListener('input', function(e) {
-            document.getElementById('sensitivityValue').textContent = e.target.value;
-        });
-
-        const dropZone = document.getElementById('dropZone');
-        const videoInput = document.getElementById('videoInput');
-        const selectedFile = document.getElementById('selectedFile');
-        const analyzeBtn = document.getElementById('analyzeBtn');
-        const uploadForm = document.getElementById('uploadForm');
-        const uploadSection = document.getElementById('uploadSection');
-        const loading = document.getElementById('loading');
-        const resultsSection = document.getElementById('resultsSection');
-        const errorMessage = document.getElementById('errorMessage');
-        const progressBar = document.getElementById('progressBar');
-        const progressFill = document.getElementById('progressFill');
-
-        let currentResults = null;
-
-
-        function switchTab(tabName, element) {
-            document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
-            document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
-            
-            if (element) {
-                element.classList.add('active');
-            } else {
-                document.querySelector(`.tab[onclick="switchTab('${tabName}', this)"]`).classList.add('active');
-            }
-            document.getElementById(tabName + 'Tab').classList.add('active');
-            
-            if (tabName === 'history') {
-                loadHistory();
-            }
-        }
-
-
-        function toggleSetting(element) {
-            element.classList.toggle('active');
-        }
-
-
-        function saveSettings() {
-            settings = {
-                sensitivity: parseInt(document.getElementById('sensitivity').value),
-                minFaceSize: parseInt(document.getElementById('minFaceSize').value),
-                frameSkip: parseInt(document.getElementById('frameSkip').value),
-                boundingBox: document.getElementById('boundingBoxToggle').classList.contains('active'),
-                chart: document.getElementById('chartToggle').classList.contains('active'),
-                history: document.getElementById('historyToggle').classList.contains('active')
-            };
-            localStorage.setItem('videoAnalyticsSettings', JSON.stringify(settings));
-            alert('✓ Settings saved successfully!');
-        }
-
-  
-        dropZone.addEventListener('click', () => videoInput.click());
-
-
-        dropZone.addEventListener('dragover', (e) => {
-            e.preventDefault();
-            dropZone.classList.add('dragover');
-        });
-
-        dropZone.addEventListener('dragleave', () => {
-            dropZone.classList.remove('dragover');
-        });
-
-        dropZone.addEventListener('drop', (e) => {
-            e.preventDefault();
-            dropZone.classList.remove('dragover');
-            const files = e.dataTransfer.files;
-            if (files.length > 0) {
-                videoInput.files = files;
-                handleFileSelect();
-            }
-        });
-
-        videoInput.addEventListener('change', handleFileSelect);
-
-        function handleFileSelect() {
-            const file = videoInput.files[0];
-            if (file) {
-                const fileSize = (file.size / (1024 * 1024)).toFixed(2);
-                if (fileSize > 100) {
-                    showError('File size exceeds 100MB limit');
-                    videoInput.value = '';
-                    return;
-                }
-                selectedFile.textContent = `📹 ${file.name} (${fileSize} MB)`;
-                selectedFile.style.display = 'block';
-                analyzeBtn.disabled = false;
-                errorMessage.style.display = 'none';
-            }
-        }
-
-
-        uploadForm.addEventListener('submit', async (e) => {
-            e.preventDefault();
-            
-            const formData = new FormData(uploadForm);
-            formData.append('settings', JSON.stringify(settings));
-            
-            uploadSection.style.display = 'none';
-            loading.style.display = 'block';
-            resultsSection.style.display = 'none';
-            progressBar.style.display = 'block';
-            
-
-            let progress = 0;
-            const progressInterval = setInterval(() => {
-                progress += Math.random() * 15;
-                if (progress > 90) progress = 90;
-                progressFill.style.width = progress + '%';
-            }, 500);
-            
-            try {
-                const response = await fetch('/analyze', {
-                    method: 'POST',
-                    headers: {
-                        'X-License-Key': 'KHAN_MOHD_ASIM_2025'
-                    },
-                    body: formData
-                });
-                
-                clearInterval(progressInterval);
-                progressFill.style.width = '100%';
-                
-                if (!response.ok) {
-                    throw new Error('Analysis failed');
-                }
-                
-                const data = await response.json();
-                if (data.error) {
-                    throw new Error(data.error);
-                }
-                currentResults = data;
-                displayResults(data);
-                
-                if (settings.history) {
-                    saveToHistory(data);
-                }
-            } catch (error) {
-                clearInterval(progressInterval);
-                showError('Failed to analyze video: ' + error.message);
-                uploadSection.style.display = 'block';
-            } finally {
-                loading.style.display = 'none';
-                setTimeout(() => {
-                    progressBar.style.display = 'none';
-                    progressFill.style.width = '0%';
-                }, 1000);
-            }
-        });
-
-        function displayResults(data) {
-            document.getElementById('totalFaces').textContent = data.total_faces;
-            document.getElementById('avgFaces').textContent = data.avg_faces;
-            document.getElementById('frameCount').textContent = data.frame_count;
-            document.getElementById('detectionRate').textContent = data.detection_rate + '%';
-            document.getElementById('maxFaces').textContent = data.max_faces || 0;
-            document.getElementById('duration').textContent = data.duration || '0s';
-            
-            if (data.sample_frame) {
-                document.getElementById('sampleFrame').src = 'data:image/jpeg;base64,' + data.sample_frame;
-            }
-
-            if (data.chart && settings.chart) {
-                document.getElementById('chartContainer').style.display = 'block';
-                document.getElementById('chartImage').src = 'data:image/png;base64,' + data.chart;
-            }
-
-            if (data.before_frame && data.after_frame) {
-                document.getElementById('comparisonView').style.display = 'grid';
-                document.getElementById('beforeFrame').src = 'data:image/jpeg;base64,' + data.before_frame;
-                document.getElementById('afterFrame').src = 'data:image/jpeg;base64,' + data.after_frame;
-            }
-            
-            resultsSection.style.display = 'block';
-        }
-
-        function showError(message) {
-            errorMessage.textContent = '⚠️ ' + message;
-            errorMessage.style.display = 'block';
-        }
-
-        function resetForm() {
-            uploadForm.reset();
-            selectedFile.style.display = 'none';
-            analyzeBtn.disabled = true;
-            resultsSection.style.display = 'none';
-            uploadSection.style.display = 'block';
-            errorMessage.style.display = 'none';
-            document.getElementById('chartContainer').style.display = 'none';
-            document.getElementById('comparisonView').style.display = 'none';
-        }
-
-        function downloadReport() {
-            if (!currentResults) return;
-            
-            const report = `VIDEO ANALYTICS REPORT
-Generated by: Khan Mohd Asim Video Analytics AI
-Date: ${new Date().toLocaleString()}
-═══════════════════════════════════════
-
-DETECTION STATISTICS
-─────────────────────────────────────
-Total Faces Detected: ${currentResults.total_faces}
-Average Faces per Frame: ${currentResults.avg_faces}
-Total Frames Processed: ${currentResults.frame_count}
-Detection Rate: ${currentResults.detection_rate}%
-Maximum Faces in Single Frame: ${currentResults.max_faces || 0}
-Video Duration: ${currentResults.duration || 'N/A'}
-
-═══════════════════════════════════════
-Copyright © 2025 Khan Mohd Asim
-All Rights Reserved
-`;
-            
-            const blob = new Blob([report], { type: 'text/plain' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = `video_analysis_report_${Date.now()}.txt`;
-            a.click();
-            window.URL.revokeObjectURL(url);
-        }
-
-        function exportData() {
-            if (!currentResults) return;
-            
-            const jsonData = JSON.stringify(currentResults, null, 2);
-            const blob = new Blob([jsonData], { type: 'application/json' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = `video_analysis_data_${Date.now()}.json`;
-            a.click();
-            window.URL.revokeObjectURL(url);
-        }
-
-        function saveToHistory(data) {
-            let history = JSON.parse(localStorage.getItem('analysisHistory') || '[]');
-            history.unshift({
-                timestamp: new Date().toISOString(),
-                results: data
-            });
-            if (history.length > 10) history = history.slice(0, 10);
-            localStorage.setItem('analysisHistory', JSON.stringify(history));
-        }
 
-        function loadHistory() {
-            const history = JSON.parse(localStorage.getItem('analysisHistory') || '[]');
-            const historyList = document.getElementById('historyList');
-            
-            if (history.length === 0) {
-                historyList.innerHTML = '<p style="color: #a0a0b0; text-align: center; padding: 40px;">No analysis history yet. Start by analyzing a video!</p>';
-                return;
-            }
-            
-            historyList.innerHTML = history.map((item, index) => `
-                <div class="stat-card" style="margin-bottom: 20px;">
-                    <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 12px;">
-                        <div>
-                            <div class="stat-label">Analysis #${history.length - index}</div>
-                            <div style="color: #a0a0b0; font-size: 0.85rem;">${new Date(item.timestamp).toLocaleString()}</div>
-                        </div>
-                        <button class="btn btn-secondary" style="padding: 8px 16px; font-size: 0.85rem; margin: 0;" onclick="deleteHistory(${index})">🗑️</button>
-                    </div>
-                    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(120px, 1fr)); gap: 12px;">
-                        <div>
-                            <div style="color: #a0a0b0; font-size: 0.8rem;">Total Faces</div>
-                            <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.total_faces}</div>
-                        </div>
-                        <div>
-                            <div style="color: #a0a0b0; font-size: 0.8rem;">Avg/Frame</div>
-                            <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.avg_faces}</div>
-                        </div>
-                        <div>
-                            <div style="color: #a0a0b0; font-size: 0.8rem;">Frames</div>
-                            <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.frame_count}</div>
-                        </div>
-                        <div>
-                            <div style="color: #a0a0b0; font-size: 0.8rem;">Rate</div>
-                            <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.detection_rate}%</div>
-                        </div>
-                    </div>
-                </div>
-            `).join('');
-        }
+    if upload_size(file) > MAX_UPLOAD_BYTES:
+        return None, (jsonify({'error': 'File size exceeds 100MB limit'}), 400)
+    
 
-        function deleteHistory(index) {
-            let history = JSON.parse(localStorage.getItem('analysisHistory') || '[]');
-            history.splice(index, 1);
-            localStorage.setItem('analysisHistory', JSON.stringify(history));
-            loadHistory();
-        }
+    allowed_extensions = {'.mp4', '.avi', '.mov'}
+    if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
+        return None, (jsonify({'error': 'Unsupported file format'}), 400)
+    return file, None
+
+FIELD_GROUPS = {
+    'summary': ('total_faces', 'avg_faces', 'frame_count', 'detection_rate', 'max_faces',
+                'frames_with_faces', 'detected_frames', 'unique_faces', 'duration'),
+    'images': ('sample_frame', 'before_frame', 'after_frame', 'chart', 'face_gallery'),
+}
+
+def requested_fields():
+    spec = request.values.get('fields', '')
+    if not spec:
+        return None
+    fields = {'job_id'}
+    for name in spec.split(','):
+        name = name.strip()
+        fields.update(FIELD_GROUPS.get(name, (name,)))
+    return fields
+
+def project_fields(results, fields):
+    if fields is None:
+        return results
+    return {name: value for name, value in results.items() if name in fields}
+
+def probe_upload(file):
+    try:
+        info = probe_file(file.stream)
+    except ProbeError:
+        return None, None
+    error = check_limits(info)
+    if error:
+        return info, (jsonify({'error': error, 'video_info': info}), 400)
+    return info, None
+
+def save_upload(file, filepath, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(filepath, 'wb') as out:
+        while True:
+            chunk = file.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
 
+with startup_report.stage('static_assets'):
+    static_assets = load_static_assets()
 
-        document.addEventListener('DOMContentLoaded', function() {
+def asset_url(name):
+    return f"/static/{name}?v={static_assets[name].version}"
 
-            if (settings) {
-                document.getElementById('sensitivity').value = settings.sensitivity;
-                document.getElementById('sensitivityValue').textContent = settings.sensitivity;
-                document.getElementById('minFaceSize').value = settings.minFaceSize;
-                document.getElementById('frameSkip').value = settings.frameSkip;
-                
-                if (!settings.boundingBox) document.getElementById('boundingBoxToggle').classList.remove('active');
-                if (!settings.chart) document.getElementById('chartToggle').classList.remove('active');
-                if (!settings.history) document.getElementById('historyToggle').classList.remove('active');
-            }
-        });
-    </script>
-</body>
-</html>
-'''
+with startup_report.stage('index_page'), app.app_context():
+    index_page = Asset(render_template('index.html', asset_url=asset_url).encode('utf-8'),
+                       'text/html; charset=utf-8')
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    return index_page.response(request, 'no-cache')
+
+@app.route('/static/<name>')
+def static_asset(name):
+    asset = static_assets.get(name)
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+    return asset.response(request, f'public, max-age={STATIC_MAX_AGE}, immutable')
 
 @app.route('/analyze', methods=['POST'])
 @check_license
+@upload_limited
+@admission_controlled
+@profiled
 def analyze():
     try:
-        if 'video' not in request.files:
-            return jsonify({'error': 'No video uploaded'}), 400
-        
-        file = request.files['video']
-        if file.filename == '':
-            return jsonify({'error': 'No selected file'}), 400
+        settings_json = request.form.get('settings', '{}')
+        settings = json.loads(settings_json)
+        frame_skip = settings.get('frameSkip', 1)
+        analysis_width = settings.get('analysisWidth') or 0
+        draw_boxes = settings.get('boundingBox', True)
+        annotate = settings.get('annotatedVideo', False)
+        preview_profile = settings.get('previewProfile', 'full')
+        if preview_profile not in PREVIEW_PROFILES:
+            return jsonify({'error': f'Unknown preview profile: {preview_profile}'}), 400
+        fields = requested_fields()
+        wanted = lambda name: fields is None or name in fields
         
 
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell() / (1024 * 1024)  
-        file.seek(0) 
-        if file_size > 100:
-            return jsonify({'error': 'File size exceeds 100MB limit'}), 400
+        purge_expired_jobs()
+        purge_expired_checkpoints()
+        job_id = new_job_id()
+        bind_log_context(job_id=job_id)
+        timer = StageTimer()
         
-
-        allowed_extensions = {'.mp4', '.avi', '.mov'}
-        if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
-            return jsonify({'error': 'Unsupported file format'}), 400
+        recording_id = request.form.get('recording_id', '')
+        if len(recording_id) > 128:
+            return jsonify({'error': 'Invalid recording id'}), 400
+        video_hash = request.form.get('video_hash', '')
+        restore = 'video' not in request.files and video_hash
+        video_info = None
+        if not restore:
+            file, error = get_video_upload()
+            if error:
+                return error
+            video_info, error = probe_upload(file)
+            if error:
+                return error
         
+        with scratch.file('.mp4', 0 if restore else upload_size(file)) as filepath, job_in_use(job_id):
+            if restore:
+                if not frame_cache.restore_source(video_hash, filepath):
+                    return jsonify({'error': 'Video is no longer cached, please upload it again'}), 404
+                file_hash = video_hash
+                filename = None
+            else:
+                with timer.stage('upload'):
+                    file_hash = save_upload(file, filepath)
+                filename = file.filename
+            
 
-        settings_json = request.form.get('settings', '{}')
-        settings = json.loads(settings_json)
+            cap = None
+            cache_entry = None
+            if settings.get('frameCache', True) and not annotate:
+                cache_entry = frame_cache.lookup(file_hash, frame_skip, analysis_width)
+            if cache_entry is not None:
+                fps = cache_entry.fps
+                total_frames = cache_entry.total_frames
+                width = cache_entry.width
+                height = cache_entry.height
+            else:
+                cap = cv2.VideoCapture(filepath)
+                if not cap.isOpened():
+                    return jsonify({'error': 'Failed to open video file'}), 400
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
-
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filepath = f'temp_video_{timestamp}.mp4'
-        file.save(filepath)
+            if total_frames > MAX_FRAMES:
+                if cap is not None:
+                    cap.release()
+                return jsonify({'error': 'Video too long for free tier'}), 400
+            duration = round(total_frames / fps if fps > 0 else 0, 2)
         
-
-        cap = cv2.VideoCapture(filepath)
-        if not cap.isOpened():
-            return jsonify({'error': 'Failed to open video file'}), 400
+            cascade = face_cascade()
+            if cascade is None:
+                if cap is not None:
+                    cap.release()
+                return jsonify({'error': 'Failed to load face detection model'}), 500
         
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if total_frames > 1000:  
-            cap.release()
-            return jsonify({'error': 'Video too long for free tier'}), 400
-        duration = round(total_frames / fps if fps > 0 else 0, 2)
+            scale = analysis_scale(width, settings)
+            analyzer = FrameAnalyzer(cascade, settings, fps, scale)
+            checkpointer = None
+            start_frame = 0
+            if (settings.get('checkpoint', True) and not annotate) or recording_id:
+                checkpointer = Checkpointer(checkpoint_key(f'recording:{recording_id}' if recording_id else file_hash,
+                                                           settings))
+                if checkpointer.acquire():
+                    start_frame = analyzer.resume(checkpointer)
+                elif recording_id:
+                    if cap is not None:
+                        cap.release()
+                    return jsonify({'error': 'Recording is already being analyzed'}), 409
+                else:
+                    checkpointer = None
+            resumed_frames = analyzer.frame_count
+            
+            distributed = (coordinator is not None and settings.get('distributed', True) and not annotate and
+                           not analyzer.shot_mode and cache_entry is None and not start_frame and
+                           coordinator.live_workers() > 0)
+            if distributed:
+                frames = None
+            elif cache_entry is not None:
+                frames = cache_entry.frames(start_frame)
+            else:
+                cache_writer = None
+                if settings.get('frameCache', True) and not start_frame:
+                    projected_bytes = (total_frames // frame_skip) * round(width * scale) * round(height * scale)
+                    cache_writer = frame_cache.writer(file_hash, frame_skip, analysis_width, filepath, {
+                        'fps': fps, 'total_frames': total_frames, 'width': width, 'height': height,
+                    }, projected_bytes)
+                frames = decode_frames(cap, frame_skip, scale, cache_writer, start_frame)
         
-        total_faces = 0
-        frame_count = 0
-        frames_with_faces = 0
-        max_faces = 0
-        sample_frame_b64 = None
-        before_frame_b64 = None
-        after_frame_b64 = None
-        face_timeline = []
+            encoder = None
+            if annotate:
+                os.makedirs(job_dir(job_id), exist_ok=True)
+                encoder = AnnotatedVideoEncoder(annotated_video_path(job_id), fps / frame_skip, (width, height))
+            on_frame = encoder.submit if encoder is not None else None
+            ring = get_frame_ring() if settings.get('parallelDetection', True) and not distributed else None
+            if frames is not None and ring is None:
+                # Slots only bound inline detection; the ring and cluster paths detect outside this process.
+                frames = schedule_frames(frames, scheduler, license_tenant(), settings.get('priority', 'normal'))
+            with timer.stage('analysis'), cpu_budget.job(settings.get('tiledDetection', False)) as threads:
+                started = time.perf_counter()
+                try:
+                    if distributed:
+                        run_distributed(analyzer, coordinator, filepath, settings, total_frames)
+                    elif ring is not None:
+                        session = ring.session(settings, scale)
+                        try:
+                            run_with_frame_ring(analyzer, frames, session, on_frame)
+                        finally:
+                            ring.close_session(session)
+                    else:
+                        run_inline(analyzer, frames, on_frame)
+                finally:
+                    annotated = encoder.close() if encoder is not None else False
+                if not distributed:
+                    cpu_budget.record(threads, analyzer.frame_count - resumed_frames,
+                                      time.perf_counter() - started)
         
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        if face_cascade.empty():
-            return jsonify({'error': 'Failed to load face detection model'}), 500
+            if cap is not None:
+                cap.release()
+            if checkpointer is not None:
+                if recording_id:
+                    checkpointer.save(analyzer)
+                else:
+                    checkpointer.discard()
+                checkpointer.release()
         
-        frame_skip = settings.get('frameSkip', 1)
-        min_face_size = settings.get('minFaceSize', 30)
-        draw_boxes = settings.get('boundingBox', True)
+            shots = analyzer.shots()
+            face_timeline = analyzer.face_timeline
         
-        frame_idx = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_idx += 1
-            if frame_idx % frame_skip != 0:
-                continue
-                
-            frame_count += 1
-            
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(
-                gray, 
-                scaleFactor=1.1 + (settings.get('sensitivity', 5) / 50.0), 
-                minNeighbors=5, 
-                minSize=(min_face_size, min_face_size)
-            )
-            
-            num_faces = len(faces)
-            face_timeline.append(num_faces)
-            
-            if num_faces > 0:
-                frames_with_faces += 1
-                total_faces += num_faces
-                max_faces = max(max_faces, num_faces)
-                
-
-                if before_frame_b64 is None:
-                    _, buffer = cv2.imencode('.jpg', frame)
-                    before_frame_b64 = base64.b64encode(buffer).decode('utf-8')
-                
+            chart_b64 = None
+            if settings.get('chart', True) and wanted('chart') and len(face_timeline) > 0:
+                with timer.stage('chart'):
+                    chart_b64 = render_timeline_chart(face_timeline, PREVIEW_PROFILES[preview_profile]['chart_dpi'])
+        
 
-                if draw_boxes and sample_frame_b64 is None:
-                    frame_with_boxes = frame.copy()
-                    for (x, y, w, h) in faces:
-                        cv2.rectangle(frame_with_boxes, (x, y), (x+w, y+h), (206, 147, 108), 3)
-                        cv2.putText(frame_with_boxes, 'Face', (x, y-10), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (206, 147, 108), 2)
-                    
-                    _, buffer = cv2.imencode('.jpg', frame_with_boxes)
-                    sample_frame_b64 = base64.b64encode(buffer).decode('utf-8')
-                    
-                    if after_frame_b64 is None:
-                        after_frame_b64 = sample_frame_b64
+            with timer.stage('store'):
+                store = analyzer.detections.save(detections_dir(job_id))
+                job_registry.add(job_id, store)
+                shutil.move(filepath, source_path(job_id))
+                trim_job_media()
         
-        cap.release()
+            preview_frame = pick_preview_frame(store)
+            sample_frame_b64 = None
+            before_frame_b64 = None
+            if preview_frame is not None:
+                with timer.stage('previews'):
+                    renderer = FrameRenderer(source_path(job_id), store, frames_dir(job_id))
+                    if wanted('before_frame'):
+                        before_frame_b64 = base64.b64encode(
+                            renderer.render(preview_frame, False, preview_profile)).decode('utf-8')
+                    if draw_boxes and (wanted('sample_frame') or wanted('after_frame')):
+                        sample_frame_b64 = base64.b64encode(
+                            renderer.render(preview_frame, True, preview_profile)).decode('utf-8')
+            after_frame_b64 = sample_frame_b64
+            
+            face_gallery = None
+            if analyzer.gallery is not None and wanted('face_gallery'):
+                with timer.stage('gallery'):
+                    face_gallery = analyzer.gallery.gallery(source_path(job_id))
         
-
-        chart_b64 = None
-        if settings.get('chart', True) and len(face_timeline) > 0:
-            plt.figure(figsize=(12, 4), facecolor='#1a1a2e')
-            ax = plt.gca()
-            ax.set_facecolor('#1a1a2e')
+            results = {
+                'job_id': job_id,
+                **analyzer.summary(),
+                'duration': f"{duration}s",
+                'sample_frame': sample_frame_b64,
+                'before_frame': before_frame_b64,
+                'after_frame': after_frame_b64,
+                'chart': chart_b64,
+                'preview_frame': preview_frame,
+                'preview_mimetype': preview_mimetype(preview_profile),
+                'queue_wait_ms': round(g.queue_wait_ms, 2),
+                'frame_cache': 'hit' if cache_entry is not None else 'miss',
+                'resumed_from_frame': start_frame,
+                'detector_processes': ring.processes if ring is not None else 0,
+                'opencv_threads': threads,
+                'file_hash': file_hash,
+                'timestamp': datetime.now().isoformat(),
+                'developer': 'Khan Mohd Asim'
+            }
+        
+            if encoder is not None:
+                results['annotated_video'] = encoder.stats()
+                results['annotated_video']['url'] = f'/jobs/{job_id}/annotated.mp4' if annotated else None
+            
+            if distributed:
+                results['cluster_workers'] = coordinator.live_workers()
+            
+            if recording_id:
+                results['recording_id'] = recording_id
             
-            plt.plot(face_timeline, color='#ce936c', linewidth=2)
-            plt.fill_between(range(len(face_timeline)), face_timeline, alpha=0.3, color='#ce936c')
-            plt.xlabel('Frame Number', color='#a0a0b0')
-            plt.ylabel('Faces Detected', color='#a0a0b0')
-            plt.title('Face Detection Timeline', color='#ffffff', fontsize=14, pad=20)
-            plt.grid(True, alpha=0.1, color='#ffffff')
-            ax.spines['bottom'].set_color('#a0a0b0')
-            ax.spines['top'].set_color('#a0a0b0')
-            ax.spines['left'].set_color('#a0a0b0')
-            ax.spines['right'].set_color('#a0a0b0')
-            ax.tick_params(colors='#a0a0b0')
+            if face_gallery is not None:
+                results['face_gallery'] = face_gallery
             
-            with io.BytesIO() as buffer:
-                plt.savefig(buffer, format='png', bbox_inches='tight', facecolor='#1a1a2e')
-                buffer.seek(0)
-                chart_b64 = base64.b64encode(buffer.read()).decode('utf-8')
-            plt.close('all')  
+            if video_info is not None:
+                results['video_info'] = video_info
+            
+            if shots is not None:
+                results['shots'] = shots
+                results['shot_count'] = len(shots)
         
-
-        try:
-            os.remove(filepath)
-        except:
-            pass
+            if settings.get('history', True):
+                results['history_id'] = history_store.add(results, file_hash, filename)
+            
+            logger.info('analysis completed', extra={
+                'event': 'analysis',
+                'file_hash': file_hash,
+                'frame_count': analyzer.frame_count,
+                'total_faces': analyzer.total_faces,
+                'frame_cache': results['frame_cache'],
+                'distributed': distributed,
+                'resumed_from_frame': start_frame,
+                'stages_ms': timer.as_dict(),
+            })
         
+            return jsonify(project_fields(results, fields))
+    
+    except (ScratchQuotaExceeded, ClusterError) as e:
+        return jsonify({'error': str(e)}), 503
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        logger.exception('analysis failed', extra={'event': 'analysis_error'})
+        return jsonify({'error': str(e)}), 500
 
-        avg_faces = round(total_faces / frame_count, 2) if frame_count > 0 else 0
-        detection_rate = round((frames_with_faces / frame_count * 100), 1) if frame_count > 0 else 0
-        
-        results = {
-            'total_faces': total_faces,
-            'avg_faces': avg_faces,
-            'frame_count': frame_count,
-            'detection_rate': detection_rate,
-            'max_faces': max_faces,
-            'duration': f"{duration}s",
-            'sample_frame': sample_frame_b64,
-            'before_frame': before_frame_b64,
-            'after_frame': after_frame_b64,
-            'chart': chart_b64,
-            'frames_with_faces': frames_with_faces,
-            'timestamp': datetime.now().isoformat(),
-            'developer': 'Khan Mohd Asim'
-        }
+@app.route('/analyze/sweep', methods=['POST'])
+@check_license
+@upload_limited
+@admission_controlled
+def analyze_sweep():
+    file, error = get_video_upload()
+    if error:
+        return error
+    _, error = probe_upload(file)
+    if error:
+        return error
+    
+    try:
+        settings = json.loads(request.form.get('settings', '{}'))
+        configs = expand_grid(json.loads(request.form.get('grid', '{}')), settings)
         
+        with scratch.file('.mp4', upload_size(file)) as filepath:
+            save_upload(file, filepath)
+            
+            cap = cv2.VideoCapture(filepath)
+            if not cap.isOpened():
+                return jsonify({'error': 'Failed to open video file'}), 400
+            if int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) > MAX_FRAMES:
+                cap.release()
+                return jsonify({'error': 'Video too long for free tier'}), 400
+            
+            cascade = face_cascade()
+            if cascade is None:
+                cap.release()
+                return jsonify({'error': 'Failed to load face detection model'}), 500
+            
+            started = time.perf_counter()
+            with cpu_budget.job(settings.get('tiledDetection', False)):
+                results = run_sweep(cap, cascade, configs)
+            cap.release()
+        results['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
         return jsonify(results)
     
+    except (SweepError, json.JSONDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except ScratchQuotaExceeded as e:
+        return jsonify({'error': str(e)}), 503
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
-        logging.error(f"Analysis error: {str(e)}")
+        logger.exception('sweep failed', extra={'event': 'sweep_error'})
         return jsonify({'error': str(e)}), 500
 
+@app.route('/probe', methods=['POST'])
+@check_license
+@upload_limited
+def probe_video():
+    try:
+        if 'head' in request.files:
+            head = request.files['head'].read(PROBE_SLICE_BYTES + 1)
+            tail = request.files['tail'].read(PROBE_SLICE_BYTES + 1) if 'tail' in request.files else b''
+            size = request.form.get('size', type=int)
+            if max(len(head), len(tail)) > PROBE_SLICE_BYTES:
+                return jsonify({'error': 'Probe slices are limited to 1MB'}), 400
+            if size is not None and size > MAX_UPLOAD_BYTES:
+                return jsonify({'error': 'File size exceeds 100MB limit'}), 400
+            info = probe_bytes(head, tail, size)
+        else:
+            file, error = get_video_upload()
+            if error:
+                return error
+            info = probe_file(file.stream)
+    except ProbeError as e:
+        return jsonify({'error': str(e)}), 422
+    
+    error = check_limits(info)
+    if error:
+        return jsonify({'error': error, 'video_info': info}), 400
+    return jsonify({'ok': True, 'video_info': info})
+
+@app.route('/jobs/<job_id>/detections', methods=['GET'])
+@check_license
+def export_detections(job_id):
+    store = job_registry.get(job_id)
+    if store is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unsupported export format'}), 400
+    try:
+        start_frame = request.args.get('start_frame', type=int)
+        end_frame = request.args.get('end_frame', type=int)
+        min_faces = int(request.args.get('min_faces', 0))
+    except ValueError:
+        return jsonify({'error': 'Invalid export filter'}), 400
+    
+    formatter, mimetype = EXPORT_FORMATS[export_format]
+    rows = store.iter_rows(start_frame, end_frame, min_faces)
+    return Response(formatter(rows), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=detections_{job_id}.{export_format}'
+    })
+
+@app.route('/jobs/<job_id>/frames/<int:frame_idx>', methods=['GET'])
+@check_license
+def render_job_frame(job_id, frame_idx):
+    store = job_registry.get(job_id)
+    if store is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    boxes = request.args.get('boxes', '1') not in ('0', 'false')
+    profile = request.args.get('profile', 'full')
+    if profile not in PREVIEW_PROFILES:
+        return jsonify({'error': f'Unknown preview profile: {profile}'}), 400
+    with job_in_use(job_id):
+        renderer = FrameRenderer(source_path(job_id), store, frames_dir(job_id))
+        data = renderer.render(frame_idx, boxes, profile)
+    if data is None:
+        return jsonify({'error': 'Frame not available'}), 404
+    return Response(data, mimetype=preview_mimetype(profile), headers={'Cache-Control': 'private, max-age=3600'})
+
+@app.route('/jobs/<job_id>/annotated.mp4', methods=['GET'])
+@check_license
+def download_annotated_video(job_id):
+    path = job_dir(job_id)
+    if path is None or not os.path.exists(annotated_video_path(job_id)):
+        return jsonify({'error': 'Annotated video not found'}), 404
+    return send_file(os.path.abspath(annotated_video_path(job_id)), mimetype='video/mp4', as_attachment=True,
+                     download_name=f'annotated_{job_id}.mp4')
+
+@app.route('/cluster/workers', methods=['POST'])
+@check_cluster_token
+def register_cluster_worker():
+    data = request.get_json(silent=True) or {}
+    try:
+        capacity = int(data.get('capacity', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid worker capacity'}), 400
+    worker_id = coordinator.register(str(data.get('name', ''))[:128], capacity)
+    return jsonify({'worker_id': worker_id})
+
+@app.route('/cluster/workers/<worker_id>/heartbeat', methods=['POST'])
+@check_cluster_token
+def cluster_worker_heartbeat(worker_id):
+    if not coordinator.heartbeat(worker_id):
+        return jsonify({'error': 'Unknown worker'}), 404
+    return jsonify({'ok': True})
+
+@app.route('/cluster/lease', methods=['POST'])
+@check_cluster_token
+def lease_cluster_segment():
+    worker_id = (request.get_json(silent=True) or {}).get('worker_id', '')
+    if not coordinator.heartbeat(worker_id):
+        return jsonify({'error': 'Unknown worker'}), 404
+    segment = coordinator.lease(worker_id)
+    if segment is None:
+        return '', 204
+    return jsonify(segment)
+
+@app.route('/cluster/segments/<int:segment_id>/complete', methods=['POST'])
+@check_cluster_token
+def complete_cluster_segment(segment_id):
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('frames'), list):
+        return jsonify({'error': 'Missing segment frames'}), 400
+    if not coordinator.complete(data.get('worker_id', ''), segment_id, data['frames']):
+        return jsonify({'error': 'Segment is no longer leased'}), 409
+    return jsonify({'ok': True})
+
+@app.route('/cluster/segments/<int:segment_id>/fail', methods=['POST'])
+@check_cluster_token
+def fail_cluster_segment(segment_id):
+    data = request.get_json(silent=True) or {}
+    if not coordinator.fail(data.get('worker_id', ''), segment_id, data.get('error', 'unknown error')):
+        return jsonify({'error': 'Segment is no longer leased'}), 409
+    return jsonify({'ok': True})
+
+@app.route('/cluster/jobs/<job_id>/source', methods=['GET'])
+@check_cluster_token
+def cluster_job_source(job_id):
+    path = coordinator.source_path(job_id)
+    if path is None or not os.path.exists(path):
+        return jsonify({'error': 'Job not found'}), 404
+    return send_file(path, mimetype='application/octet-stream')
+
+@app.route('/jobs/<job_id>/query', methods=['GET'])
+@check_license
+def query_detections(job_id):
+    store = job_registry.get(job_id)
+    if store is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    kind = request.args.get('kind', 'frames')
+    try:
+        filters = {
+            'start_frame': request.args.get('start_frame', type=int),
+            'end_frame': request.args.get('end_frame', type=int),
+            't1': request.args.get('t1', type=float),
+            't2': request.args.get('t2', type=float),
+            'min_faces': int(request.args.get('min_faces', 0)),
+            'max_faces': request.args.get('max_faces', type=int),
+        }
+        limit = query_limit(request.args.get('limit', DEFAULT_QUERY_LIMIT))
+        min_size = int(request.args.get('min_size', 0))
+        max_size = request.args.get('max_size', type=int)
+    except ValueError:
+        return jsonify({'error': 'Invalid query filter'}), 400
+    
+    started = time.perf_counter()
+    if kind == 'frames':
+        frames, times, counts = store.query_frames(**filters)
+        result = {
+            'count': len(frames),
+            'frames': frames[:limit].tolist(),
+            'timestamps': np.round(times[:limit].astype(np.float64), 3).tolist(),
+            'faces': counts[:limit].tolist(),
+        }
+    elif kind == 'boxes':
+        boxes, times = store.query_boxes(min_size, max_size, **filters)
+        result = {
+            'count': len(boxes),
+            'boxes': [dict(zip(('frame', 'x', 'y', 'w', 'h'), row)) for row in boxes[:limit].tolist()],
+            'timestamps': np.round(times[:limit].astype(np.float64), 3).tolist(),
+        }
+    else:
+        return jsonify({'error': 'Unsupported query kind'}), 400
+    
+    result['query_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return jsonify(result)
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'ok', 'startup': startup_report.as_dict()})
+
+@app.route('/metrics', methods=['GET'])
+@check_license
+def metrics():
+    return jsonify({
+        'admission': admission.stats(),
+        'scheduler': scheduler.stats(),
+        'frame_cache': frame_cache.stats(),
+        'scratch': scratch.stats(),
+        'job_media': job_media_stats(),
+        'cpu': cpu_budget.stats(),
+        'frame_ring': ring.stats() if (ring := get_frame_ring()) is not None else None,
+        'cluster': coordinator.stats() if coordinator is not None else None,
+        'profiler': profiler.stats(),
+        'logging': log_pipeline.stats(),
+        'startup': startup_report.as_dict(),
+    })
+
+@app.route('/profiles', methods=['GET'])
+@check_license
+@check_profile_key
+def list_profiles():
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    return jsonify({'items': profiler.list(limit)})
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+@check_license
+@check_profile_key
+def download_profile(profile_id):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    _, path, mimetype = profile
+    return send_file(os.path.abspath(path), mimetype=mimetype, as_attachment=True,
+                     download_name=os.path.basename(path))
+
+@app.route('/history', methods=['GET'])
+@check_license
+def list_history():
+    try:
+        page = history_store.query(request.args, request.args.get('cursor'),
+                                   request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'Invalid history filter'}), 400
+    return jsonify(page)
+
+@app.route('/history/<int:entry_id>', methods=['GET'])
+@check_license
+def get_history(entry_id):
+    entry = history_store.get(entry_id)
+    if entry is None:
+        return jsonify({'error': 'History entry not found'}), 404
+    return jsonify(entry)
+
+@app.route('/history/<int:entry_id>', methods=['DELETE'])
+@check_license
+def delete_history_entry(entry_id):
+    if not history_store.delete(entry_id):
+        return jsonify({'error': 'History entry not found'}), 404
+    return jsonify({'deleted': entry_id})
+
+if PRELOAD_HEAVY:
+    preload_heavy_modules()
+startup_report.mark_ready()
+
 if __name__ == '__main__':
     print("=" * 60)
     print("Video Analytics AI Platform")
@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import FrameAnalyzer, analysis_scale, decode_frames  # noqa: E402
+from bench.fixtures import FIXTURES_DIR, load_fixtures  # noqa: E402
+from detection import face_cascade  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+IOU_THRESHOLD = 0.5
+
+PIPELINES = {
+    'baseline': {},
+    'skip2': {'frameSkip': 2},
+    'skip3': {'frameSkip': 3},
+    'width640': {'analysisWidth': 640},
+    'width320': {'analysisWidth': 320},
+    'sensitivity8': {'sensitivity': 8},
+    'shots': {'shotDetection': True},
+    'shots_width640': {'shotDetection': True, 'analysisWidth': 640},
+    'tiled': {'tiledDetection': True},
+    'tiled_width1920': {'tiledDetection': True, 'analysisWidth': 1920},
+}
+
+
+def iou_matrix(a, b):
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+    iw = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    ih = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = iw * ih
+    union = (a[:, 2:3] * a[:, 3:4]) + (b[:, 2] * b[:, 3]) - inter
+    return np.where(union > 0, inter / union, 0.0)
+
+
+def match_frame(predicted, truth):
+    if not len(predicted) or not len(truth):
+        return 0, len(predicted), len(truth)
+    ious = iou_matrix(predicted, truth)
+    matched = 0
+    while ious.size and ious.max() >= IOU_THRESHOLD:
+        p, t = np.unravel_index(np.argmax(ious), ious.shape)
+        matched += 1
+        ious[p, :] = 0
+        ious[:, t] = 0
+    return matched, len(predicted) - matched, len(truth) - matched
+
+
+def run_pipeline(fixture, fixtures_dir, settings):
+    cap = cv2.VideoCapture(os.path.join(fixtures_dir, fixture['video']))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    scale = analysis_scale(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), settings)
+    analyzer = FrameAnalyzer(face_cascade(), settings, fps, scale)
+
+    started = time.perf_counter()
+    for frame_idx, frame, gray in decode_frames(cap, settings.get('frameSkip', 1), scale):
+        analyzer.process(frame_idx, frame, gray)
+    elapsed = time.perf_counter() - started
+    cap.release()
+
+    frames = analyzer.detections.frames.view()
+    offsets = analyzer.detections.offsets.view()
+    boxes = analyzer.detections.boxes.view()
+    predictions = []
+    for frame_idx in range(1, len(fixture['labels']) + 1):
+        pos = np.searchsorted(frames, frame_idx, side='right') - 1
+        if pos < 0:
+            predictions.append([])
+            continue
+        rows = boxes[offsets[pos]:offsets[pos + 1]]
+        predictions.append([[r['x'], r['y'], r['w'], r['h']] for r in rows])
+    return predictions, elapsed
+
+
+def evaluate(fixtures, fixtures_dir, pipelines):
+    report = []
+    for name, settings in pipelines.items():
+        tp = fp = fn = 0
+        count_error = 0
+        frames = 0
+        elapsed = 0.0
+        per_fixture = {}
+        for fixture in fixtures:
+            predictions, seconds = run_pipeline(fixture, fixtures_dir, settings)
+            f_tp = f_fp = f_fn = 0
+            for predicted, truth in zip(predictions, fixture['labels']):
+                m, p, t = match_frame(predicted, truth)
+                f_tp, f_fp, f_fn = f_tp + m, f_fp + p, f_fn + t
+                count_error += abs(len(predicted) - len(truth))
+            per_fixture[fixture['name']] = {'tp': f_tp, 'fp': f_fp, 'fn': f_fn, 'seconds': round(seconds, 3)}
+            tp, fp, fn = tp + f_tp, fp + f_fp, fn + f_fn
+            frames += len(fixture['labels'])
+            elapsed += seconds
+
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        report.append({
+            'pipeline': name,
+            'settings': settings,
+            'precision': round(precision, 4),
+            'recall': round(recall, 4),
+            'f1': round(f1, 4),
+            'count_mae': round(count_error / frames, 4) if frames else 0,
+            'fps': round(frames / elapsed, 2) if elapsed else 0,
+            'fixtures': per_fixture,
+        })
+    return report
+
+
+def pareto_front(report):
+    front = []
+    for row in report:
+        dominated = any(
+            other['fps'] >= row['fps'] and other['f1'] >= row['f1'] and
+            (other['fps'] > row['fps'] or other['f1'] > row['f1'])
+            for other in report
+        )
+        if not dominated:
+            front.append(row['pipeline'])
+    return front
+
+
+def plot_report(report, front, path):
+    from charts import pyplot
+
+    plt = pyplot()
+    plt.figure(figsize=(8, 5))
+    for row in report:
+        on_front = row['pipeline'] in front
+        plt.scatter(row['fps'], row['f1'], color='#ce936c' if on_front else '#7a7a8a', zorder=3)
+        plt.annotate(row['pipeline'], (row['fps'], row['f1']), textcoords='offset points', xytext=(5, 5), fontsize=8)
+    points = sorted((row['fps'], row['f1']) for row in report if row['pipeline'] in front)
+    if points:
+        plt.plot(*zip(*points), color='#ce936c', linestyle='--', linewidth=1)
+    plt.xlabel('Frames per second')
+    plt.ylabel('F1 (IoU >= %.1f)' % IOU_THRESHOLD)
+    plt.title('Detection accuracy vs. speed')
+    plt.grid(True, alpha=0.3)
+    plt.savefig(path, bbox_inches='tight')
+    plt.close('all')
+
+
+def print_table(report, front):
+    header = f"{'pipeline':<16}{'precision':>10}{'recall':>8}{'f1':>8}{'count_mae':>11}{'fps':>9}  pareto"
+    print(header)
+    print('-' * len(header))
+    for row in report:
+        print(f"{row['pipeline']:<16}{row['precision']:>10.3f}{row['recall']:>8.3f}{row['f1']:>8.3f}"
+              f"{row['count_mae']:>11.3f}{row['fps']:>9.1f}  {'*' if row['pipeline'] in front else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure detection accuracy vs. speed on labelled fixtures.')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--out', default=RESULTS_DIR)
+    parser.add_argument('--pipelines', nargs='*', choices=sorted(PIPELINES), help='subset of pipelines to run')
+    parser.add_argument('--no-plot', action='store_true')
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    pipelines = {name: PIPELINES[name] for name in (args.pipelines or PIPELINES)}
+    report = evaluate(fixtures, args.fixtures, pipelines)
+    front = pareto_front(report)
+    print_table(report, front)
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, 'accuracy.json'), 'w') as f:
+        json.dump({'pipelines': report, 'pareto_front': front}, f, indent=2)
+    if not args.no_plot:
+        plot_report(report, front, os.path.join(args.out, 'accuracy_pareto.png'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.loadtest import HttpTarget  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPARED_FIELDS = ('frame_count', 'total_faces', 'frames_with_faces', 'max_faces', 'detected_frames', 'unique_faces')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up within {timeout}s')
+
+
+class LocalCluster:
+    def __init__(self, workers, capacity, token, segment_frames):
+        self.workdir = tempfile.mkdtemp(prefix='face-cluster-')
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.env = dict(os.environ, PYTHONPATH=REPO_DIR, CLUSTER_TOKEN=token, CLUSTER_HEARTBEAT_INTERVAL='0.5',
+                        CLUSTER_SEGMENT_FRAMES=str(segment_frames))
+        self.token = token
+        self.capacity = capacity
+        self.server = subprocess.Popen(
+            [sys.executable, '-c', f'from app import app; app.run(port={self.port}, threaded=True)'],
+            cwd=self.workdir, env=dict(self.env, CLUSTER_MODE='coordinator'),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.workers = [self.start_worker(i) for i in range(workers)]
+        wait_for(self.url + '/healthz')
+
+    def start_worker(self, index):
+        return subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, 'worker.py'), '--coordinator', self.url, '--token', self.token,
+             '--name', f'bench-{index}', '--capacity', str(self.capacity)],
+            cwd=self.workdir, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def wait_for_workers(self, license_key, count, timeout=30):
+        target = HttpTarget(self.url)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            _, body = target.request('GET', '/metrics', {'X-License-Key': license_key})
+            workers = json.loads(body)['cluster']['workers']
+            if sum(worker['alive'] for worker in workers) >= count:
+                return
+            time.sleep(0.2)
+        raise RuntimeError(f'{count} workers did not register within {timeout}s')
+
+    def shutdown(self):
+        for proc in self.workers + [self.server]:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in self.workers + [self.server]:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def analyze(target, license_key, video, settings):
+    started = time.perf_counter()
+    with open(video, 'rb') as f:
+        status, body = target.request('POST', '/analyze', {'X-License-Key': license_key}, {
+            'video': (f, os.path.basename(video)),
+            'settings': json.dumps(dict(settings, history=False)),
+        })
+    elapsed = time.perf_counter() - started
+    result = json.loads(body)
+    if status != 200:
+        raise RuntimeError(f'analysis failed with {status}: {result.get("error")}')
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Start a coordinator and local workers, then compare distributed '
+                                                 'analysis against a single-node run.')
+    parser.add_argument('video')
+    parser.add_argument('--license-key', default=os.environ.get('LICENSE_KEY'))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--capacity', type=int, default=1)
+    parser.add_argument('--segment-frames', type=int, default=50)
+    parser.add_argument('--settings', default='{}', help='JSON settings sent with both runs')
+    parser.add_argument('--kill-after', type=float,
+                        help='kill one worker this many seconds into the distributed run to exercise reassignment')
+    args = parser.parse_args()
+
+    if not args.license_key:
+        parser.error('a license key is required (--license-key or LICENSE_KEY)')
+
+    settings = dict(json.loads(args.settings), frameCache=False, checkpoint=False)
+    cluster = LocalCluster(args.workers, args.capacity, os.urandom(16).hex(), args.segment_frames)
+    try:
+        cluster.wait_for_workers(args.license_key, args.workers)
+        target = HttpTarget(cluster.url)
+
+        local, local_s = analyze(target, args.license_key, args.video, dict(settings, distributed=False))
+        if args.kill_after is not None:
+            threading.Timer(args.kill_after, cluster.workers[0].kill).start()
+        remote, remote_s = analyze(target, args.license_key, args.video, settings)
+
+        print(f"{'':<20}{'local':>12}{'distributed':>14}")
+        print(f"{'seconds':<20}{local_s:>12.2f}{remote_s:>14.2f}")
+        for name in COMPARED_FIELDS:
+            print(f"{name:<20}{local.get(name, '-'):>12}{remote.get(name, '-'):>14}")
+        print(f"workers used: {remote.get('cluster_workers', 0)}")
+        mismatched = [name for name in COMPARED_FIELDS if local.get(name) != remote.get(name)]
+        if mismatched:
+            print(f"MISMATCH: {', '.join(mismatched)}")
+            sys.exit(1)
+        print('distributed results match the single-node run')
+    finally:
+        cluster.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+
+import cv2
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_FPS = 30
+
+# Hand-labelled face box in matplotlib's grace_hopper.jpg sample image.
+SOURCE_FACE_BOX = (158, 106, 216, 216)
+
+SCENARIOS = [
+    {
+        'name': 'single_static',
+        'size': (640, 480),
+        'frames': 60,
+        'backgrounds': [(40, 40, 40)],
+        'tracks': [{'face': 160, 'start': (200, 120), 'end': (210, 130)}],
+    },
+    {
+        'name': 'two_moving',
+        'size': (960, 540),
+        'frames': 90,
+        'backgrounds': [(90, 60, 30)],
+        'tracks': [
+            {'face': 120, 'start': (80, 100), 'end': (300, 160)},
+            {'face': 100, 'start': (700, 300), 'end': (560, 260)},
+        ],
+    },
+    {
+        'name': 'small_faces_hd',
+        'size': (1280, 720),
+        'frames': 60,
+        'backgrounds': [(120, 120, 120)],
+        'tracks': [
+            {'face': 48, 'start': (200, 200), 'end': (240, 210)},
+            {'face': 40, 'start': (900, 450), 'end': (880, 430)},
+            {'face': 64, 'start': (600, 120), 'end': (620, 140)},
+        ],
+    },
+    {
+        'name': 'small_faces_4k',
+        'size': (3840, 2160),
+        'frames': 15,
+        'backgrounds': [(100, 110, 120)],
+        'tracks': [
+            {'face': 36, 'start': (300, 1800), 'end': (320, 1790)},
+            {'face': 44, 'start': (610, 400), 'end': (630, 410)},
+            {'face': 52, 'start': (2200, 1100), 'end': (2180, 1120)},
+            {'face': 40, 'start': (3500, 300), 'end': (3520, 310)},
+            {'face': 420, 'start': (1500, 900), 'end': (1510, 880)},
+        ],
+    },
+    {
+        'name': 'edited_cuts',
+        'size': (640, 360),
+        'frames': 120,
+        'backgrounds': [(30, 30, 160), (20, 140, 60), (160, 140, 40), (60, 60, 60)],
+        'tracks': [
+            {'face': 130, 'start': (120, 90), 'end': (130, 95), 'range': (0, 30)},
+            {'face': 110, 'start': (380, 140), 'end': (370, 130), 'range': (60, 90)},
+            {'face': 90, 'start': (250, 60), 'end': (260, 70), 'range': (90, 120)},
+        ],
+    },
+    {
+        'name': 'no_faces',
+        'size': (640, 480),
+        'frames': 45,
+        'backgrounds': [(200, 180, 160), (30, 60, 90)],
+        'tracks': [],
+    },
+]
+
+
+def _face_source():
+    import matplotlib.cbook as cbook
+
+    image = cv2.imread(str(cbook.get_sample_data('grace_hopper.jpg', asfileobj=False)))
+    x, y, w, h = SOURCE_FACE_BOX
+    margin = w // 2
+    x0, y0 = max(0, x - margin), max(0, y - margin)
+    x1, y1 = min(image.shape[1], x + w + margin), min(image.shape[0], y + h + margin)
+    return image[y0:y1, x0:x1], (x - x0, y - y0, w, h)
+
+
+def _paste(frame, crop, crop_face, face_size, face_xy):
+    scale = face_size / crop_face[2]
+    resized = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    left = int(round(face_xy[0] - crop_face[0] * scale))
+    top = int(round(face_xy[1] - crop_face[1] * scale))
+
+    fx0, fy0 = max(0, left), max(0, top)
+    fx1 = min(frame.shape[1], left + resized.shape[1])
+    fy1 = min(frame.shape[0], top + resized.shape[0])
+    frame[fy0:fy1, fx0:fx1] = resized[fy0 - top:fy1 - top, fx0 - left:fx1 - left]
+    return [int(face_xy[0]), int(face_xy[1]), int(face_size), int(face_size)]
+
+
+def render_fixture(scenario, out_dir, crop, crop_face, rng):
+    width, height = scenario['size']
+    frames = scenario['frames']
+    backgrounds = scenario['backgrounds']
+    path = os.path.join(out_dir, f"{scenario['name']}.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), FIXTURE_FPS, (width, height))
+
+    labels = []
+    for i in range(frames):
+        shot = min(len(backgrounds) - 1, i * len(backgrounds) // frames)
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = backgrounds[shot]
+        boxes = []
+        for track in scenario['tracks']:
+            start, end = track.get('range', (0, frames))
+            if not start <= i < end:
+                continue
+            t = (i - start) / max(1, end - start - 1)
+            xy = [a + (b - a) * t for a, b in zip(track['start'], track['end'])]
+            boxes.append(_paste(frame, crop, crop_face, track['face'], xy))
+        noise = rng.normal(0, 3, frame.shape)
+        frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+        writer.write(frame)
+        labels.append(boxes)
+    writer.release()
+    return {'name': scenario['name'], 'video': os.path.basename(path), 'fps': FIXTURE_FPS, 'labels': labels}
+
+
+def generate_fixtures(out_dir=FIXTURES_DIR, seed=7):
+    os.makedirs(out_dir, exist_ok=True)
+    crop, crop_face = _face_source()
+    rng = np.random.default_rng(seed)
+    manifest = [render_fixture(scenario, out_dir, crop, crop_face, rng) for scenario in SCENARIOS]
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    manifest_path = os.path.join(fixtures_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return generate_fixtures(fixtures_dir)
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate labelled synthetic fixture videos.')
+    parser.add_argument('--out', default=FIXTURES_DIR)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    for fixture in generate_fixtures(args.out, args.seed):
+        print(f"{fixture['name']}: {len(fixture['labels'])} frames")
@@ -0,0 +1,342 @@
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fixtures import FIXTURES_DIR, load_fixtures  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+PROFILES = ('steady', 'ramp', 'step')
+FOLLOWUPS = {
+    'detections': lambda job_id: f'/jobs/{job_id}/detections?format=jsonl',
+    'query': lambda job_id: f'/jobs/{job_id}/query?kind=frames&min_faces=1',
+    'frame': lambda job_id: f'/jobs/{job_id}/frames/1?boxes=1',
+}
+
+
+def read_rss_bytes(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 2) if values else None
+
+
+class TestClientTarget:
+    def __init__(self):
+        from app import app
+
+        self.client = app.test_client()
+        self.pid = os.getpid()
+
+    def request(self, method, path, headers, data=None):
+        response = self.client.open(path, method=method, headers=headers, data=data)
+        body = response.get_data()
+        return response.status_code, body
+
+
+class HttpTarget:
+    def __init__(self, base_url, pid=None, timeout=300):
+        self.base_url = base_url.rstrip('/')
+        self.pid = pid
+        self.timeout = timeout
+
+    def request(self, method, path, headers, data=None):
+        body = None
+        headers = dict(headers)
+        if data is not None:
+            body, headers['Content-Type'] = self._multipart(data)
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def _multipart(self, data):
+        boundary = uuid.uuid4().hex
+        out = io.BytesIO()
+        for name, value in data.items():
+            out.write(f'--{boundary}\r\n'.encode())
+            if isinstance(value, tuple):
+                stream, filename = value
+                out.write(f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                          'Content-Type: application/octet-stream\r\n\r\n'.encode())
+                out.write(stream.read())
+            else:
+                out.write(f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}'.encode())
+            out.write(b'\r\n')
+        out.write(f'--{boundary}--\r\n'.encode())
+        return out.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def start_delay(worker, concurrency, profile, ramp):
+    if profile == 'steady' or ramp <= 0:
+        return 0.0
+    if profile == 'ramp':
+        return ramp * worker / concurrency
+    steps = 4
+    return ramp * (worker * steps // concurrency) / steps
+
+
+class LoadTest:
+    def __init__(self, target, videos, license_key, settings, concurrency, profile='steady', ramp=0.0,
+                 duration=None, requests=None, followups=(), seed=1):
+        self.target = target
+        self.videos = videos
+        self.license_key = license_key
+        self.settings = settings
+        self.concurrency = concurrency
+        self.profile = profile
+        self.ramp = ramp
+        self.duration = duration
+        self.requests = requests
+        self.followups = followups
+        self.random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._active = 0
+        self.samples = []
+        self.memory = []
+        self.errors = {}
+
+    def _next_video(self):
+        with self._lock:
+            if self.requests is not None and self._issued >= self.requests:
+                return None
+            self._issued += 1
+            names = [v['name'] for v in self.videos]
+            weights = [v['weight'] for v in self.videos]
+            return self.videos[names.index(self.random.choices(names, weights)[0])]
+
+    def _record(self, endpoint, video, status, seconds, body):
+        sample = {'endpoint': endpoint, 'video': video, 'status': status, 'ms': seconds * 1000}
+        if status >= 400:
+            try:
+                error = json.loads(body).get('error', '')
+            except (ValueError, AttributeError):
+                error = ''
+            key = f'{status} {error}'.strip()
+            with self._lock:
+                self.errors[key] = self.errors.get(key, 0) + 1
+        with self._lock:
+            self.samples.append(sample)
+
+    def _call(self, endpoint, video, method, path, data=None):
+        headers = {'X-License-Key': self.license_key}
+        started = time.perf_counter()
+        try:
+            status, body = self.target.request(method, path, headers, data)
+        except Exception as e:
+            status, body = 599, json.dumps({'error': type(e).__name__}).encode()
+        self._record(endpoint, video, status, time.perf_counter() - started, body)
+        return status, body
+
+    def _worker(self, worker, deadline):
+        time.sleep(start_delay(worker, self.concurrency, self.profile, self.ramp))
+        with self._lock:
+            self._active += 1
+        try:
+            while deadline is None or time.perf_counter() < deadline:
+                video = self._next_video()
+                if video is None:
+                    break
+                with open(video['path'], 'rb') as f:
+                    data = {'video': (io.BytesIO(f.read()), os.path.basename(video['path'])),
+                            'settings': json.dumps(self.settings)}
+                status, body = self._call('analyze', video['name'], 'POST', '/analyze', data)
+                if status != 200 or not self.followups:
+                    continue
+                job_id = json.loads(body).get('job_id')
+                for name in self.followups:
+                    self._call(name, video['name'], 'GET', FOLLOWUPS[name](job_id))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _sample_memory(self, started, stop):
+        while not stop.wait(0.5):
+            rss = read_rss_bytes(self.target.pid) if self.target.pid else None
+            with self._lock:
+                active = self._active
+            self.memory.append({'t': round(time.perf_counter() - started, 2), 'rss_bytes': rss, 'active': active})
+
+    def run(self):
+        started = time.perf_counter()
+        deadline = started + self.duration if self.duration else None
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample_memory, args=(started, stop), daemon=True)
+        sampler.start()
+        workers = [threading.Thread(target=self._worker, args=(i, deadline)) for i in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        stop.set()
+        sampler.join()
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name in sorted({s['endpoint'] for s in self.samples}):
+            samples = [s for s in self.samples if s['endpoint'] == name]
+            ok = [s['ms'] for s in samples if s['status'] < 400]
+            statuses = {}
+            for s in samples:
+                statuses[str(s['status'])] = statuses.get(str(s['status']), 0) + 1
+            endpoints[name] = {
+                'requests': len(samples),
+                'error_rate': round(1 - len(ok) / len(samples), 4),
+                'throughput_rps': round(len(samples) / elapsed, 3),
+                'latency_ms': {'p50': percentile(ok, 50), 'p90': percentile(ok, 90),
+                               'p99': percentile(ok, 99), 'max': percentile(ok, 100)},
+                'status_counts': statuses,
+            }
+
+        rss = [m['rss_bytes'] for m in self.memory if m['rss_bytes'] is not None]
+        return {
+            'config': {
+                'target': getattr(self.target, 'base_url', 'test_client'),
+                'concurrency': self.concurrency,
+                'profile': self.profile,
+                'ramp_seconds': self.ramp,
+                'duration_seconds': self.duration,
+                'requests': self.requests,
+                'followups': list(self.followups),
+                'settings': self.settings,
+                'videos': {v['name']: v['weight'] for v in self.videos},
+            },
+            'revision': git_revision(),
+            'elapsed_seconds': round(elapsed, 2),
+            'endpoints': endpoints,
+            'errors': dict(sorted(self.errors.items())),
+            'memory': {
+                'start_rss_bytes': rss[0] if rss else None,
+                'peak_rss_bytes': max(rss) if rss else None,
+                'end_rss_bytes': rss[-1] if rss else None,
+                'growth_bytes': rss[-1] - rss[0] if rss else None,
+                'timeline': self.memory,
+            },
+        }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_videos(specs, fixtures_dir):
+    if not specs:
+        fixtures = load_fixtures(fixtures_dir)
+        return [{'name': f['name'], 'path': os.path.join(fixtures_dir, f['video']), 'weight': 1.0} for f in fixtures]
+    videos = []
+    for spec in specs:
+        path, _, weight = spec.partition(':')
+        name = os.path.splitext(os.path.basename(path))[0]
+        videos.append({'name': name, 'path': path, 'weight': float(weight or 1)})
+    return videos
+
+
+def compare_reports(baseline, current):
+    lines = [f"baseline {baseline.get('revision')} -> current {current.get('revision')}"]
+    for name, stats in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            lines.append(f'{name}: new endpoint')
+            continue
+        for key in ('p50', 'p99'):
+            old, new = before['latency_ms'][key], stats['latency_ms'][key]
+            if old and new:
+                lines.append(f'{name} {key}: {old:.1f}ms -> {new:.1f}ms ({(new - old) / old * 100:+.1f}%)')
+        lines.append(f"{name} throughput: {before['throughput_rps']} -> {stats['throughput_rps']} rps, "
+                     f"error rate: {before['error_rate']} -> {stats['error_rate']}")
+    old_peak, new_peak = baseline['memory']['peak_rss_bytes'], current['memory']['peak_rss_bytes']
+    if old_peak and new_peak:
+        lines.append(f'peak rss: {old_peak / 2 ** 20:.1f}MiB -> {new_peak / 2 ** 20:.1f}MiB')
+    return '\n'.join(lines)
+
+
+def print_summary(report):
+    print(f"{'endpoint':<12}{'requests':>9}{'errors':>8}{'rps':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for name, stats in report['endpoints'].items():
+        latency = stats['latency_ms']
+        print(f"{name:<12}{stats['requests']:>9}{stats['error_rate']:>8.1%}{stats['throughput_rps']:>8.2f}"
+              f"{latency['p50'] or 0:>10.1f}{latency['p90'] or 0:>10.1f}{latency['p99'] or 0:>10.1f}")
+    memory = report['memory']
+    if memory['peak_rss_bytes']:
+        print(f"rss: start {memory['start_rss_bytes'] / 2 ** 20:.1f}MiB, peak {memory['peak_rss_bytes'] / 2 ** 20:.1f}MiB, "
+              f"growth {memory['growth_bytes'] / 2 ** 20:+.1f}MiB")
+    for error, count in report['errors'].items():
+        print(f'  {count} x {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive /analyze with concurrent uploads and report latency, '
+                                                 'throughput, errors and memory.')
+    parser.add_argument('--url', help='base URL of a running server; defaults to the in-process test client')
+    parser.add_argument('--server-pid', type=int, help='pid to sample RSS from when using --url')
+    parser.add_argument('--license-key', default=os.environ.get('LICENSE_KEY'))
+    parser.add_argument('--video', action='append', metavar='PATH[:WEIGHT]',
+                        help='video in the mix (repeatable); defaults to the labelled fixtures')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--settings', default='{}', help='JSON settings sent with every upload')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--profile', choices=PROFILES, default='steady')
+    parser.add_argument('--ramp', type=float, default=0.0, help='seconds over which workers are started')
+    parser.add_argument('--duration', type=float, help='stop issuing uploads after this many seconds')
+    parser.add_argument('--requests', type=int, help='total number of uploads (default 4 per worker)')
+    parser.add_argument('--followup', action='append', choices=sorted(FOLLOWUPS), default=[],
+                        help='job endpoint to hit after each successful upload (repeatable)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', default=RESULTS_DIR)
+    parser.add_argument('--name', default='loadtest')
+    parser.add_argument('--compare', help='previous report to diff against')
+    args = parser.parse_args()
+
+    if not args.license_key:
+        parser.error('a license key is required (--license-key or LICENSE_KEY)')
+    if args.duration is None and args.requests is None:
+        args.requests = args.concurrency * 4
+
+    target = HttpTarget(args.url, args.server_pid) if args.url else TestClientTarget()
+    test = LoadTest(target, parse_videos(args.video, args.fixtures), args.license_key, json.loads(args.settings),
+                    args.concurrency, args.profile, args.ramp, args.duration, args.requests, args.followup, args.seed)
+    report = test.run()
+    print_summary(report)
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f'{args.name}.json')
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f'report written to {path}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare_reports(json.load(f), report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import base64
+import io
+import threading
+
+_pyplot = None
+_chart_lock = threading.Lock()
+
+
+def pyplot():
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        _pyplot = plt
+    return _pyplot
+
+
+def render_timeline_chart(face_timeline, dpi=100):
+    plt = pyplot()
+    with _chart_lock:
+        plt.figure(figsize=(12, 4), facecolor='#1a1a2e')
+        ax = plt.gca()
+        ax.set_facecolor('#1a1a2e')
+
+        plt.plot(face_timeline, color='#ce936c', linewidth=2)
+        plt.fill_between(range(len(face_timeline)), face_timeline, alpha=0.3, color='#ce936c')
+        plt.xlabel('Frame Number', color='#a0a0b0')
+        plt.ylabel('Faces Detected', color='#a0a0b0')
+        plt.title('Face Detection Timeline', color='#ffffff', fontsize=14, pad=20)
+        plt.grid(True, alpha=0.1, color='#ffffff')
+        ax.spines['bottom'].set_color('#a0a0b0')
+        ax.spines['top'].set_color('#a0a0b0')
+        ax.spines['left'].set_color('#a0a0b0')
+        ax.spines['right'].set_color('#a0a0b0')
+        ax.tick_params(colors='#a0a0b0')
+
+        with io.BytesIO() as buffer:
+            plt.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight', facecolor='#1a1a2e')
+            buffer.seek(0)
+            chart_b64 = base64.b64encode(buffer.read()).decode('utf-8')
+        plt.close('all')
+    return chart_b64
@@ -0,0 +1,91 @@
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import secrets
+import time
+
+CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR', 'checkpoints')
+CHECKPOINT_INTERVAL = float(os.environ.get('CHECKPOINT_INTERVAL', 5))
+CHECKPOINT_RETENTION = int(os.environ.get('CHECKPOINT_RETENTION', 24 * 3600))
+PURGE_INTERVAL = 60
+RESULT_SETTINGS = ('frameSkip', 'analysisWidth', 'sensitivity', 'minFaceSize', 'shotDetection',
+                   'shotSampleInterval', 'shotMaxSamples', 'uniqueFaces', 'tiledDetection', 'tileSize')
+
+
+def checkpoint_key(source_id, settings):
+    config = {name: settings.get(name) for name in RESULT_SETTINGS}
+    return hashlib.sha256(json.dumps([source_id, config], sort_keys=True).encode()).hexdigest()
+
+
+class Checkpointer:
+    def __init__(self, key, root=CHECKPOINT_DIR, interval=CHECKPOINT_INTERVAL):
+        self.path = os.path.join(root, f'{key}.ckpt')
+        self.interval = interval
+        self.saved_at = time.monotonic()
+        self.saves = 0
+        self._lease = None
+
+    def acquire(self):
+        # One job per key at a time: a concurrent upload of the same video and settings must not resume from,
+        # or overwrite, a checkpoint another job is still writing. flock is dropped if the process dies, so a
+        # crashed job's checkpoint stays resumable.
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lease = open(f'{self.path}.lock', 'a')
+        try:
+            fcntl.flock(lease, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lease.close()
+            return False
+        self._lease = lease
+        return True
+
+    def release(self):
+        if self._lease is not None:
+            self._lease.close()
+            self._lease = None
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def save(self, analyzer):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{secrets.token_hex(4)}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(analyzer.state(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.saved_at = time.monotonic()
+        self.saves += 1
+
+    def maybe_save(self, analyzer):
+        if time.monotonic() - self.saved_at >= self.interval:
+            self.save(analyzer)
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+_last_purge = 0.0
+
+
+def purge_expired_checkpoints(now=None):
+    global _last_purge
+    now = now or time.time()
+    if now - _last_purge < PURGE_INTERVAL or not os.path.isdir(CHECKPOINT_DIR):
+        return
+    _last_purge = now
+    for name in os.listdir(CHECKPOINT_DIR):
+        path = os.path.join(CHECKPOINT_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > CHECKPOINT_RETENTION:
+                os.remove(path)
+        except OSError:
+            continue
@@ -0,0 +1,238 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+CLUSTER_MODE = os.environ.get('CLUSTER_MODE', '')
+CLUSTER_DB = os.environ.get('CLUSTER_DB', 'cluster.db')
+CLUSTER_TOKEN = os.environ.get('CLUSTER_TOKEN', '')
+HEARTBEAT_INTERVAL = float(os.environ.get('CLUSTER_HEARTBEAT_INTERVAL', 2))
+WORKER_TIMEOUT = float(os.environ.get('CLUSTER_WORKER_TIMEOUT', 3 * HEARTBEAT_INTERVAL))
+LEASE_TIMEOUT = float(os.environ.get('CLUSTER_LEASE_TIMEOUT', 120))
+SEGMENT_FRAMES = int(os.environ.get('CLUSTER_SEGMENT_FRAMES', 100))
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 0.05
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    capacity INTEGER NOT NULL,
+    registered_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    alive INTEGER NOT NULL DEFAULT 1,
+    segments_done INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cluster_jobs (
+    id TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    start_frame INTEGER NOT NULL,
+    end_frame INTEGER,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker_id TEXT,
+    leased_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_segments_state ON segments (state, id);
+CREATE INDEX IF NOT EXISTS idx_segments_job ON segments (job_id, start_frame);
+'''
+
+
+class ClusterError(RuntimeError):
+    pass
+
+
+def segment_ranges(total_frames, segment_frames=SEGMENT_FRAMES):
+    starts = list(range(0, max(total_frames, 1), segment_frames))
+    return [(start, start + segment_frames if i < len(starts) - 1 else None) for i, start in enumerate(starts)]
+
+
+class Coordinator:
+    def __init__(self, path=CLUSTER_DB):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        return conn
+
+    def register(self, name, capacity):
+        worker_id = secrets.token_hex(8)
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO workers (id, name, capacity, registered_at, last_seen) VALUES (?, ?, ?, ?, ?)',
+            (worker_id, name, max(1, int(capacity)), now, now)
+        )
+        return worker_id
+
+    def heartbeat(self, worker_id):
+        return self._connect().execute(
+            'UPDATE workers SET last_seen = ? WHERE id = ? AND alive = 1', (time.time(), worker_id)
+        ).rowcount > 0
+
+    def live_workers(self):
+        self.reap()
+        return self._connect().execute('SELECT COUNT(*) FROM workers WHERE alive = 1').fetchone()[0]
+
+    def reap(self, now=None):
+        now = now or time.time()
+        conn = self._transaction()
+        try:
+            conn.execute('UPDATE workers SET alive = 0 WHERE alive = 1 AND last_seen < ?', (now - WORKER_TIMEOUT,))
+            conn.execute(
+                "UPDATE segments SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "worker_id = NULL, error = COALESCE(error, 'worker lost') "
+                "WHERE state = 'leased' AND (leased_at < ? OR worker_id IN (SELECT id FROM workers WHERE alive = 0))",
+                (MAX_ATTEMPTS, now - LEASE_TIMEOUT)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def submit(self, source_path, settings, total_frames):
+        job_id = secrets.token_hex(8)
+        conn = self._transaction()
+        try:
+            conn.execute('INSERT INTO cluster_jobs (id, source_path, settings, created_at) VALUES (?, ?, ?, ?)',
+                         (job_id, os.path.abspath(source_path), json.dumps(settings), time.time()))
+            conn.executemany('INSERT INTO segments (job_id, start_frame, end_frame) VALUES (?, ?, ?)',
+                             [(job_id, start, end) for start, end in segment_ranges(total_frames)])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return job_id
+
+    def lease(self, worker_id):
+        if not self.heartbeat(worker_id):
+            return None
+        self.reap()
+        conn = self._transaction()
+        try:
+            row = conn.execute(
+                "SELECT s.id, s.job_id, s.start_frame, s.end_frame, j.settings FROM segments s "
+                "JOIN cluster_jobs j ON j.id = s.job_id WHERE s.state = 'queued' ORDER BY s.id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE segments SET state = 'leased', worker_id = ?, leased_at = ?, "
+                             "attempts = attempts + 1 WHERE id = ?", (worker_id, time.time(), row['id']))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return {
+            'segment_id': row['id'],
+            'job_id': row['job_id'],
+            'start_frame': row['start_frame'],
+            'end_frame': row['end_frame'],
+            'settings': json.loads(row['settings']),
+        }
+
+    def complete(self, worker_id, segment_id, frames):
+        conn = self._connect()
+        updated = conn.execute(
+            "UPDATE segments SET state = 'done', worker_id = ?, result = ?, error = NULL "
+            "WHERE id = ? AND state IN ('queued', 'leased')", (worker_id, json.dumps(frames), segment_id)
+        ).rowcount > 0
+        if updated:
+            conn.execute('UPDATE workers SET segments_done = segments_done + 1, last_seen = ? WHERE id = ?',
+                         (time.time(), worker_id))
+        return updated
+
+    def fail(self, worker_id, segment_id, error):
+        return self._connect().execute(
+            "UPDATE segments SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "worker_id = NULL, error = ? WHERE id = ? AND state = 'leased' AND worker_id = ?",
+            (MAX_ATTEMPTS, str(error)[:500], segment_id, worker_id)
+        ).rowcount > 0
+
+    def source_path(self, job_id):
+        row = self._connect().execute('SELECT source_path FROM cluster_jobs WHERE id = ?', (job_id,)).fetchone()
+        return row['source_path'] if row else None
+
+    def results(self, job_id, timeout=LEASE_TIMEOUT * MAX_ATTEMPTS):
+        conn = self._connect()
+        segments = [row['id'] for row in conn.execute(
+            'SELECT id FROM segments WHERE job_id = ? ORDER BY start_frame', (job_id,))]
+        deadline = time.monotonic() + timeout
+        next_reap = 0.0
+        for segment_id in segments:
+            while True:
+                row = conn.execute('SELECT state, result, error FROM segments WHERE id = ?', (segment_id,)).fetchone()
+                if row['state'] == 'done':
+                    break
+                if row['state'] == 'failed':
+                    raise ClusterError(f"Segment failed on every attempt: {row['error']}")
+                now = time.monotonic()
+                if now > deadline:
+                    raise ClusterError('Timed out waiting for analysis workers')
+                if now >= next_reap:
+                    if not self.live_workers():
+                        raise ClusterError('No analysis workers are available')
+                    next_reap = now + HEARTBEAT_INTERVAL
+                time.sleep(POLL_INTERVAL)
+            yield from json.loads(row['result'])
+
+    def finish(self, job_id):
+        conn = self._transaction()
+        try:
+            conn.execute('DELETE FROM segments WHERE job_id = ?', (job_id,))
+            conn.execute('DELETE FROM cluster_jobs WHERE id = ?', (job_id,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def stats(self):
+        self.reap()
+        conn = self._connect()
+        now = time.time()
+        workers = [{
+            'id': row['id'],
+            'name': row['name'],
+            'capacity': row['capacity'],
+            'alive': bool(row['alive']),
+            'last_seen_s': round(now - row['last_seen'], 2),
+            'segments_done': row['segments_done'],
+        } for row in conn.execute('SELECT * FROM workers WHERE alive = 1 OR last_seen > ? ORDER BY registered_at',
+                                  (now - 3600,))]
+        segments = dict(conn.execute('SELECT state, COUNT(*) FROM segments GROUP BY state').fetchall())
+        return {'mode': CLUSTER_MODE or 'off', 'workers': workers, 'segments': segments}
+
+
+def run_distributed(analyzer, coordinator, source_path, settings, total_frames):
+    job_id = coordinator.submit(source_path, settings, total_frames)
+    try:
+        for frame_idx, faces, sharpness, hashes in coordinator.results(job_id):
+            analyzer.record(frame_idx, np.asarray(faces, dtype=np.int32).reshape(-1, 4), sharpness,
+                            np.asarray(hashes, dtype=np.uint64) if hashes is not None else None)
+    finally:
+        coordinator.finish(job_id)
@@ -0,0 +1,127 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import cv2
+
+
+def available_cores():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+CPU_CORES = available_cores()
+CPU_PROCESSES = int(os.environ.get('CPU_PROCESSES') or os.environ.get('WEB_CONCURRENCY') or 1)
+CPU_PIN = os.environ.get('CPU_PIN', '0') == '1'
+OPENCV_THREADS = int(os.environ.get('OPENCV_THREADS', 0))
+
+
+def core_slice(cores, index, count):
+    if count <= 1 or len(cores) < count:
+        return list(cores)
+    per = len(cores) // count
+    return list(cores[index * per:(index + 1) * per])
+
+
+def pin_to_cores(cores):
+    try:
+        os.sched_setaffinity(0, cores)
+    except (AttributeError, OSError):
+        return False
+    return True
+
+
+class CpuBudget:
+    def __init__(self, cores=None, processes=CPU_PROCESSES, fixed_threads=OPENCV_THREADS):
+        self.cores = list(cores if cores is not None else CPU_CORES)
+        self.processes = max(1, processes)
+        self.fixed_threads = fixed_threads
+        self.pinned = None
+        self.active = 0
+        self.tiled = 0
+        self.threads = None
+        self._lock = threading.Lock()
+        self._throughput = {}
+
+    @property
+    def share(self):
+        if self.pinned:
+            return len(self.pinned)
+        return max(1, len(self.cores) // self.processes)
+
+    def threads_for(self, active):
+        if self.fixed_threads > 0:
+            return self.fixed_threads
+        return max(1, self.share // max(1, active))
+
+    def pin_worker(self, index):
+        cores = core_slice(self.cores, index % self.processes, self.processes)
+        if pin_to_cores(cores):
+            self.pinned = cores
+        self.apply()
+
+    def apply(self):
+        # Tiled detection already spreads tiles over the share, so OpenCV's own pool would only oversubscribe it.
+        threads = 1 if self.tiled else self.threads_for(self.active)
+        if threads != self.threads:
+            cv2.setNumThreads(threads)
+            self.threads = threads
+        return threads
+
+    @contextmanager
+    def job(self, tiled=False):
+        with self._lock:
+            self.active += 1
+            self.tiled += bool(tiled)
+            threads = self.apply()
+        try:
+            yield threads
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.tiled -= bool(tiled)
+                self.apply()
+
+    def set_tiled(self, tiled):
+        with self._lock:
+            if bool(self.tiled) != bool(tiled):
+                self.tiled = int(bool(tiled))
+                self.apply()
+
+    def record(self, threads, frames, seconds):
+        with self._lock:
+            entry = self._throughput.setdefault(threads, {'jobs': 0, 'frames': 0, 'seconds': 0.0})
+            entry['jobs'] += 1
+            entry['frames'] += frames
+            entry['seconds'] += seconds
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cores': len(self.cores),
+                'processes': self.processes,
+                'pinned_cores': self.pinned,
+                'active_jobs': self.active,
+                'tiled_jobs': self.tiled,
+                'opencv_threads': cv2.getNumThreads(),
+                'throughput': {
+                    str(threads): dict(entry, seconds=round(entry['seconds'], 3),
+                                       fps=round(entry['frames'] / entry['seconds'], 2) if entry['seconds'] else 0)
+                    for threads, entry in sorted(self._throughput.items())
+                },
+            }
+
+
+cpu_budget = CpuBudget()
+
+
+def configure_detector_process(index, count):
+    cpu_budget.cores = available_cores()
+    cpu_budget.processes = max(1, count)
+    if CPU_PIN:
+        cpu_budget.pin_worker(index)
+    else:
+        cpu_budget.apply()
+    return cpu_budget
@@ -0,0 +1,125 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from cpu_budget import cpu_budget
+
+FACE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+TILE_SIZE = 640
+TILE_THREADS = int(os.environ.get('TILE_THREADS', 0))
+NMS_OVERLAP = 0.5
+
+_local = threading.local()
+_tile_pool = None
+_tile_pool_lock = threading.Lock()
+
+
+def face_cascade():
+    cascade = getattr(_local, 'face_cascade', None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+        if cascade.empty():
+            return None
+        _local.face_cascade = cascade
+    return cascade
+
+
+def detector_params(settings):
+    min_face_size = settings.get('minFaceSize', 30)
+    return {
+        'scaleFactor': 1.1 + (settings.get('sensitivity', 5) / 50.0),
+        'minNeighbors': 5,
+        'minSize': (min_face_size, min_face_size),
+    }
+
+
+def tile_pool():
+    global _tile_pool
+    with _tile_pool_lock:
+        if _tile_pool is None:
+            _tile_pool = ThreadPoolExecutor(max_workers=TILE_THREADS or cpu_budget.share,
+                                            thread_name_prefix='tile-detect')
+        return _tile_pool
+
+
+def tile_origins(length, tile, overlap):
+    if length <= tile:
+        return [0]
+    step = tile - overlap
+    origins = list(range(0, length - tile, step))
+    return origins + [length - tile]
+
+
+def non_max_suppression(boxes, overlap=NMS_OVERLAP):
+    boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+    if len(boxes) < 2:
+        return boxes
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = boxes[:, 2].astype(np.int64) * boxes[:, 3]
+    # Overlap relative to the smaller box, so a face clipped at a tile edge is absorbed by the whole one.
+    iw = np.clip(np.minimum(x2[:, None], x2) - np.maximum(x1[:, None], x1), 0, None)
+    ih = np.clip(np.minimum(y2[:, None], y2) - np.maximum(y1[:, None], y1), 0, None)
+    ratio = iw * ih / np.minimum(areas[:, None], areas)
+
+    order = np.argsort(-areas, kind='stable')
+    ratio = ratio[np.ix_(order, order)]
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep[i + 1:] &= ratio[i, i + 1:] <= overlap
+    return boxes[np.sort(order[keep])]
+
+
+def _detect_region(gray, params, x, y, fx=1.0):
+    faces = face_cascade().detectMultiScale(gray, **params)
+    if len(faces) == 0:
+        return np.empty((0, 4), dtype=np.int32)
+    faces = np.asarray(faces, dtype=np.float64)
+    if fx != 1.0:
+        faces /= fx
+    faces[:, 0] += x
+    faces[:, 1] += y
+    return np.round(faces).astype(np.int32)
+
+
+def detect_tiled(gray, params, tile=TILE_SIZE):
+    height, width = gray.shape[:2]
+    min_size = params['minSize'][0]
+    overlap = max(tile // 4, 2 * min_size)
+    if max(height, width) <= tile or overlap >= tile:
+        return face_cascade().detectMultiScale(gray, **params)
+
+    # Tiles at full resolution find every face smaller than the overlap; a single downscaled pass over
+    # the whole frame picks up the larger faces that can straddle tile borders.
+    fx = min_size / overlap
+    coarse = cv2.resize(gray, None, fx=fx, fy=fx, interpolation=cv2.INTER_AREA)
+    tile_params = dict(params, maxSize=(overlap, overlap))
+    jobs = [(coarse, params, 0, 0, fx)] + [(gray[y:y + tile, x:x + tile], tile_params, x, y)
+                                           for y in tile_origins(height, tile, overlap)
+                                           for x in tile_origins(width, tile, overlap)]
+
+    pool = tile_pool()
+    regions = [pool.submit(_detect_region, *job) for job in jobs]
+    return non_max_suppression(np.concatenate([region.result() for region in regions]))
+
+
+def detect_faces(cascade, gray, settings, scale=1.0):
+    params = detector_params(settings)
+    if settings.get('tiledDetection', False):
+        tile = max(64, int(settings.get('tileSize') or TILE_SIZE))
+        detect = lambda image, **p: detect_tiled(image, p, tile)
+    else:
+        detect = cascade.detectMultiScale
+    if scale == 1.0:
+        return detect(gray, **params)
+
+    min_size = max(1, int(round(params['minSize'][0] * scale)))
+    params['minSize'] = (min_size, min_size)
+    faces = detect(gray, **params)
+    if len(faces) == 0:
+        return faces
+    return np.round(np.asarray(faces) / scale).astype(np.int32)
@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+
+BOX_DTYPE = np.dtype([
+    ('frame', '<u4'),
+    ('x', '<u2'),
+    ('y', '<u2'),
+    ('w', '<u2'),
+    ('h', '<u2'),
+])
+STORE_FILES = ('boxes', 'frames', 'times', 'sharpness', 'offsets')
+DEFAULT_QUERY_LIMIT = 1000
+MAX_QUERY_LIMIT = 10000
+
+
+def query_limit(limit):
+    return max(1, min(int(limit), MAX_QUERY_LIMIT))
+
+
+class _GrowableArray:
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, len(self.data) * 2), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def append(self, value):
+        self.extend([value])
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class DetectionStoreBuilder:
+    def __init__(self):
+        self.boxes = _GrowableArray(BOX_DTYPE)
+        self.frames = _GrowableArray('<u4')
+        self.times = _GrowableArray('<f4')
+        self.sharpness = _GrowableArray('<f4')
+        self.offsets = _GrowableArray('<i8')
+        self.offsets.append(0)
+
+    def add_frame(self, frame_idx, frame_time, faces, sharpness=0.0):
+        self.frames.append(frame_idx)
+        self.times.append(frame_time)
+        self.sharpness.append(sharpness)
+        if len(faces):
+            faces = np.asarray(faces, dtype=np.int64).reshape(-1, 4)
+            rows = np.empty(len(faces), dtype=BOX_DTYPE)
+            rows['frame'] = frame_idx
+            rows['x'], rows['y'], rows['w'], rows['h'] = faces.T
+            self.boxes.extend(rows)
+        self.offsets.append(self.boxes.size)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in STORE_FILES:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name).view())
+        return DetectionStore.load(directory)
+
+
+class DetectionStore:
+    def __init__(self, boxes, frames, times, sharpness, offsets):
+        self.boxes = boxes
+        self.frames = frames
+        self.times = times
+        self.sharpness = sharpness
+        self.offsets = offsets
+        self.counts = np.diff(offsets)
+
+    @classmethod
+    def load(cls, directory):
+        arrays = [np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in STORE_FILES]
+        return cls(*arrays)
+
+    def frame_boxes(self, frame_idx):
+        pos = np.searchsorted(self.frames, frame_idx)
+        if pos == len(self.frames) or self.frames[pos] != frame_idx:
+            return []
+        boxes = self.boxes[self.offsets[pos]:self.offsets[pos + 1]]
+        return [(x, y, w, h) for _, x, y, w, h in boxes.tolist()]
+
+    def frame_mask(self, start_frame=None, end_frame=None, t1=None, t2=None, min_faces=0, max_faces=None):
+        mask = self.counts >= min_faces
+        if max_faces is not None:
+            mask &= self.counts <= max_faces
+        if start_frame is not None:
+            mask &= self.frames >= start_frame
+        if end_frame is not None:
+            mask &= self.frames <= end_frame
+        if t1 is not None:
+            mask &= self.times >= t1
+        if t2 is not None:
+            mask &= self.times <= t2
+        return mask
+
+    def query_frames(self, **filters):
+        idx = np.flatnonzero(self.frame_mask(**filters))
+        return self.frames[idx], self.times[idx], self.counts[idx]
+
+    def query_boxes(self, min_size=0, max_size=None, **filters):
+        box_frame_pos = np.repeat(np.arange(len(self.frames)), self.counts)
+        mask = self.frame_mask(**filters)[box_frame_pos]
+        if min_size:
+            mask &= (self.boxes['w'] >= min_size) & (self.boxes['h'] >= min_size)
+        if max_size is not None:
+            mask &= (self.boxes['w'] <= max_size) & (self.boxes['h'] <= max_size)
+        idx = np.flatnonzero(mask)
+        return self.boxes[idx], self.times[box_frame_pos[idx]]
+
+    def iter_rows(self, start_frame=None, end_frame=None, min_faces=0):
+        selected = np.flatnonzero(self.frame_mask(start_frame, end_frame, min_faces=min_faces) & (self.counts > 0))
+        for pos in selected:
+            frame_time = round(float(self.times[pos]), 3)
+            for frame_idx, x, y, w, h in self.boxes[self.offsets[pos]:self.offsets[pos + 1]].tolist():
+                yield (frame_idx, frame_time, x, y, w, h)
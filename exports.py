@@ -0,0 +1,20 @@
+import json
+
+DETECTION_FIELDS = ('frame', 'timestamp', 'x', 'y', 'w', 'h')
+
+
+def csv_lines(rows):
+    yield ','.join(DETECTION_FIELDS) + '\n'
+    for row in rows:
+        yield ','.join(str(value) for value in row) + '\n'
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(DETECTION_FIELDS, row))) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'jsonl': (jsonl_lines, 'application/x-ndjson'),
+}
@@ -0,0 +1,163 @@
+import base64
+import itertools
+
+import cv2
+import numpy as np
+
+from previews import read_frame
+
+HASH_BITS = 64
+MATCH_RADIUS = 11
+INDEX_CHUNKS = 4
+MAX_EXEMPLARS = 16
+TRACK_IOU = 0.3
+GALLERY_SIZE = 12
+THUMBNAIL_SIZE = 96
+
+
+def _popcount(values):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    as_bytes = values.astype('>u8').view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(as_bytes, axis=1).sum(axis=1)
+
+
+def perceptual_hash(crop):
+    small = cv2.resize(crop, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def face_hashes(gray, faces, scale=1.0):
+    hashes = []
+    for box in faces:
+        x, y, w, h = (int(v * scale) for v in box)
+        crop = gray[max(y, 0):y + h, max(x, 0):x + w]
+        hashes.append(perceptual_hash(crop) if crop.size else 0)
+    return np.asarray(hashes, dtype=np.uint64)
+
+
+class HammingIndex:
+    """Multi-index hashing: a match within MATCH_RADIUS bits must agree with the
+    query to within radius // chunks bits on at least one chunk, so each lookup
+    only probes the buckets of near-identical chunk values."""
+
+    def __init__(self, radius=MATCH_RADIUS, chunks=INDEX_CHUNKS):
+        self.radius = radius
+        self.chunk_bits = HASH_BITS // chunks
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        self.tables = [{} for _ in range(chunks)]
+        self.probes = [
+            sum(1 << bit for bit in flipped)
+            for distance in range(radius // chunks + 1)
+            for flipped in itertools.combinations(range(self.chunk_bits), distance)
+        ]
+        self.values = np.zeros(1024, dtype=np.uint64)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _chunks(self, value):
+        return [(value >> (i * self.chunk_bits)) & self.chunk_mask for i in range(len(self.tables))]
+
+    def add(self, value):
+        if self.size == len(self.values):
+            self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+        item = self.size
+        self.values[item] = value
+        self.size += 1
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            table.setdefault(chunk, []).append(item)
+        return item
+
+    def lookup(self, value):
+        chunks = self._chunks(value)
+        # Exact chunk buckets hold nearly every true match, so try those before
+        # paying for the wider probe set.
+        for probes in (self.probes[:1], self.probes[1:]):
+            buckets = [table.get(chunk ^ probe, ()) for table, chunk in zip(self.tables, chunks) for probe in probes]
+            items = np.fromiter(itertools.chain.from_iterable(buckets), dtype=np.int64)
+            if not len(items):
+                continue
+            distances = _popcount(self.values[items] ^ np.uint64(value))
+            best = int(np.argmin(distances))
+            if distances[best] <= self.radius:
+                return int(items[best]), int(distances[best])
+        return None, None
+
+
+def box_iou(a, b):
+    iw = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    ih = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / (a[2] * a[3] + b[2] * b[3] - inter)
+
+
+class FaceGallery:
+    def __init__(self, radius=MATCH_RADIUS):
+        self.index = HammingIndex(radius)
+        self.owners = []
+        self.faces = []
+        self.crops = 0
+        self.previous = []
+
+    def _match(self, box, value):
+        item, distance = self.index.lookup(value)
+        if item is not None:
+            return self.owners[item], distance
+        # Box jitter moves the hash of a crop by a few bits each frame; fall back
+        # to spatial overlap with the previous detection so a face is not split.
+        overlaps = [(box_iou(box, prev_box), face_id) for prev_box, face_id in self.previous]
+        best = max(overlaps, default=(0.0, None))
+        if best[0] >= TRACK_IOU:
+            return best[1], None
+        return None, None
+
+    def add(self, frame_idx, faces, hashes):
+        current = []
+        for box, value in zip(faces, hashes):
+            value = int(value)
+            box = [int(v) for v in box]
+            self.crops += 1
+            face_id, distance = self._match(box, value)
+            if face_id is None:
+                face_id = len(self.faces)
+                self.faces.append({'frames': 0, 'first_frame': frame_idx, 'last_frame': frame_idx,
+                                   'best_frame': frame_idx, 'best_box': None, 'exemplars': 0})
+            face = self.faces[face_id]
+            if (distance is None or distance > self.index.radius // 2) and face['exemplars'] < MAX_EXEMPLARS:
+                self.index.add(value)
+                self.owners.append(face_id)
+                face['exemplars'] += 1
+            face['frames'] += 1
+            face['last_frame'] = frame_idx
+            current.append((box, face_id))
+            if face['best_box'] is None or box[2] * box[3] > face['best_box'][2] * face['best_box'][3]:
+                face['best_frame'] = frame_idx
+                face['best_box'] = box
+        self.previous = current
+
+    def unique_count(self, min_frames=1):
+        return sum(1 for face in self.faces if face['frames'] >= min_frames)
+
+    def gallery(self, video_path, min_frames=1, limit=GALLERY_SIZE):
+        ranked = sorted((face for face in self.faces if face['frames'] >= min_frames),
+                        key=lambda face: -face['frames'])[:limit]
+        gallery = []
+        for face_id, face in enumerate(ranked):
+            entry = {'id': face_id, 'frames': face['frames'], 'first_frame': face['first_frame'],
+                     'last_frame': face['last_frame'], 'thumbnail': None}
+            frame = read_frame(video_path, face['best_frame'])
+            if frame is not None:
+                x, y, w, h = face['best_box']
+                crop = frame[max(y, 0):y + h, max(x, 0):x + w]
+                if crop.size:
+                    thumb = cv2.resize(crop, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA)
+                    _, buffer = cv2.imencode('.jpg', thumb, [cv2.IMWRITE_JPEG_QUALITY, 85])
+                    entry['thumbnail'] = base64.b64encode(buffer.tobytes()).decode('utf-8')
+            gallery.append(entry)
+        return gallery
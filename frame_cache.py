@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import secrets
+import shutil
+import threading
+
+import numpy as np
+
+FRAME_CACHE_DIR = os.environ.get('FRAME_CACHE_DIR', 'frame_cache')
+FRAME_CACHE_MAX_BYTES = int(os.environ.get('FRAME_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+FRAME_CACHE_ENTRY_FRACTION = float(os.environ.get('FRAME_CACHE_ENTRY_FRACTION', 0.25))
+HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class FrameCacheEntry:
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.fps = meta['fps']
+        self.total_frames = meta['total_frames']
+        self.width = meta['width']
+        self.height = meta['height']
+
+    def frames(self, start_frame=0):
+        indices = self.meta['frame_indices']
+        if not indices:
+            return
+        shape = (len(indices), self.meta['gray_height'], self.meta['gray_width'])
+        grays = np.memmap(os.path.join(self.path, 'frames.u8'), dtype=np.uint8, mode='r', shape=shape)
+        for pos, frame_idx in enumerate(indices):
+            if frame_idx > start_frame:
+                yield frame_idx, None, grays[pos]
+
+
+class FrameCacheWriter:
+    def __init__(self, cache, final_path, meta, max_bytes):
+        self.cache = cache
+        self.final_path = final_path
+        self.meta = dict(meta, frame_indices=[])
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.aborted = False
+        self.tmp_path = os.path.join(os.path.dirname(final_path), f'.tmp-{secrets.token_hex(4)}')
+        os.makedirs(self.tmp_path)
+        self._out = open(os.path.join(self.tmp_path, 'frames.u8'), 'wb')
+
+    def add(self, frame_idx, gray):
+        if self.aborted:
+            return
+        if self.written + gray.nbytes > self.max_bytes:
+            self.cache.oversized += 1
+            self.abort()
+            return
+        if not self.meta['frame_indices']:
+            self.meta['gray_height'], self.meta['gray_width'] = gray.shape[:2]
+        self.meta['frame_indices'].append(frame_idx)
+        self._out.write(np.ascontiguousarray(gray).tobytes())
+        self.written += gray.nbytes
+
+    def commit(self):
+        if self.aborted:
+            return
+        self._out.close()
+        with open(os.path.join(self.tmp_path, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f)
+        try:
+            os.replace(self.tmp_path, self.final_path)
+        except OSError:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+        self.cache.evict(keep=os.path.dirname(self.final_path))
+
+    def abort(self):
+        if self.aborted:
+            return
+        self.aborted = True
+        self._out.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+class FrameCache:
+    def __init__(self, root=FRAME_CACHE_DIR, max_bytes=FRAME_CACHE_MAX_BYTES,
+                 entry_fraction=FRAME_CACHE_ENTRY_FRACTION):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.entry_max_bytes = int(max_bytes * entry_fraction)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.oversized = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _video_dir(self, file_hash):
+        if not HASH_PATTERN.match(file_hash or ''):
+            return None
+        return os.path.join(self.root, file_hash)
+
+    def _variant_dir(self, file_hash, frame_skip, analysis_width):
+        return os.path.join(self._video_dir(file_hash), f'skip{int(frame_skip)}_w{int(analysis_width or 0)}')
+
+    def _touch(self, file_hash):
+        try:
+            os.utime(self._video_dir(file_hash))
+        except OSError:
+            pass
+
+    def lookup(self, file_hash, frame_skip, analysis_width):
+        if not self.enabled or self._video_dir(file_hash) is None:
+            return None
+        path = self._variant_dir(file_hash, frame_skip, analysis_width)
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(file_hash)
+        return FrameCacheEntry(path, meta)
+
+    def restore_source(self, file_hash, dest_path):
+        video_dir = self._video_dir(file_hash)
+        if video_dir is None:
+            return False
+        try:
+            _link_or_copy(os.path.join(video_dir, 'source.mp4'), dest_path)
+        except OSError:
+            return False
+        self._touch(file_hash)
+        return True
+
+    def writer(self, file_hash, frame_skip, analysis_width, source_path, meta, projected_bytes):
+        if not self.enabled or self._video_dir(file_hash) is None:
+            return None
+        if projected_bytes > self.entry_max_bytes:
+            self.oversized += 1
+            return None
+        video_dir = self._video_dir(file_hash)
+        os.makedirs(video_dir, exist_ok=True)
+        cached_source = os.path.join(video_dir, 'source.mp4')
+        if not os.path.exists(cached_source):
+            try:
+                _link_or_copy(source_path, cached_source)
+            except OSError:
+                return None
+        return FrameCacheWriter(self, self._variant_dir(file_hash, frame_skip, analysis_width), meta,
+                                self.entry_max_bytes)
+
+    def _entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if HASH_PATTERN.match(name):
+                try:
+                    entries.append((os.path.getmtime(path), _dir_size(path), path))
+                except OSError:
+                    continue
+        return entries
+
+    def usage_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep=None):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': self.usage_bytes(),
+            'max_bytes': self.max_bytes,
+            'entry_max_bytes': self.entry_max_bytes,
+            'oversized': self.oversized,
+        }
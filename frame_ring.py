@@ -0,0 +1,304 @@
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+DETECTOR_PROCESSES = int(os.environ.get('DETECTOR_PROCESSES', 0))
+FRAME_RING_SLOTS = int(os.environ.get('FRAME_RING_SLOTS', 16))
+FRAME_RING_SLOT_BYTES = int(os.environ.get('FRAME_RING_SLOT_BYTES', 1920 * 1080))
+SLOT_TIMEOUT = 60
+HEALTH_INTERVAL = 1.0
+MIN_UPTIME = 10.0
+MAX_CRASH_LOOPS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class FrameRingError(RuntimeError):
+    pass
+
+
+def _detect_frame(gray, settings, scale):
+    from detection import detect_faces, face_cascade
+    from face_gallery import face_hashes
+    from previews import face_sharpness
+
+    faces = detect_faces(face_cascade(), gray, settings, scale)
+    sharpness = face_sharpness(gray, faces, scale)
+    hashes = face_hashes(gray, faces, scale) if settings.get('uniqueFaces', True) else None
+    return np.asarray(faces, dtype=np.int32).reshape(-1, 4), sharpness, hashes
+
+
+def _detector_worker(index, processes, shm_name, slot_bytes, conn):
+    from cpu_budget import configure_detector_process
+
+    budget = configure_detector_process(index, processes)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        while True:
+            item = conn.recv()
+            if item is None:
+                break
+            token, frame_idx, slot, height, width, settings, scale = item
+            budget.set_tiled(settings.get('tiledDetection', False))
+            gray = np.ndarray((height, width), dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            try:
+                result = (token, frame_idx, slot, *_detect_frame(gray, settings, scale), None)
+            except Exception as e:
+                result = (token, frame_idx, slot, None, 0.0, None, str(e))
+            del gray
+            conn.send(result)
+    except (EOFError, OSError):
+        pass
+    finally:
+        shm.close()
+
+
+class _Detector:
+    def __init__(self, index, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.started = time.monotonic()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.dead = False
+
+
+class DetectionSession:
+    def __init__(self, ring, token, settings, scale):
+        self.ring = ring
+        self.token = token
+        self.settings = settings
+        self.scale = scale
+        self.results = queue.Queue()
+        self.outstanding = 0
+
+    def fits(self, gray):
+        return gray.nbytes <= self.ring.slot_bytes
+
+    def submit(self, frame_idx, gray):
+        deadline = time.monotonic() + SLOT_TIMEOUT
+        while True:
+            if not self.ring.healthy:
+                return False
+            try:
+                slot = self.ring.free_slots.get(timeout=HEALTH_INTERVAL)
+                break
+            except queue.Empty:
+                if time.monotonic() > deadline:
+                    raise FrameRingError('Timed out waiting for a free frame slot')
+        height, width = gray.shape[:2]
+        start = slot * self.ring.slot_bytes
+        view = np.ndarray((height, width), dtype=np.uint8, buffer=self.ring.shm.buf, offset=start)
+        view[:] = gray
+        del view
+        if not self.ring.send((self.token, frame_idx, slot, height, width, self.settings, self.scale)):
+            self.ring.free_slots.put(slot)
+            return False
+        self.outstanding += 1
+        return True
+
+    def poll(self, block=False):
+        try:
+            item = self.results.get(block=block, timeout=SLOT_TIMEOUT if block else None)
+        except queue.Empty:
+            if block:
+                raise FrameRingError('Timed out waiting for detector results')
+            return None
+        self.outstanding -= 1
+        frame_idx, faces, sharpness, hashes, error = item
+        if error is not None:
+            raise FrameRingError(f'Detector failed on frame {frame_idx}: {error}')
+        return frame_idx, faces, sharpness, hashes
+
+
+class FrameRing:
+    def __init__(self, processes=DETECTOR_PROCESSES, slots=FRAME_RING_SLOTS, slot_bytes=FRAME_RING_SLOT_BYTES):
+        self.processes = processes
+        self.slot_bytes = slot_bytes
+        self.slots = slots
+        self.restarts = 0
+        self.recovered_frames = 0
+        self._tokens = itertools.count()
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._closing = False
+        self._crash_loops = [0] * processes
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.free_slots = queue.Queue()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+
+        self.detectors = [self._spawn(index) for index in range(processes)]
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def _spawn(self, index):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_detector_worker, daemon=True,
+                                    args=(index, self.processes, self.shm.name, self.slot_bytes, child_conn))
+        process.start()
+        child_conn.close()
+        return _Detector(index, process, parent_conn)
+
+    @property
+    def healthy(self):
+        return any(detector is not None and detector.process.is_alive() for detector in self.detectors)
+
+    def send(self, item):
+        candidates = [detector for detector in self.detectors if detector is not None and detector.process.is_alive()]
+        if not candidates:
+            return False
+        detector = min(candidates, key=lambda candidate: len(candidate.in_flight))
+        with detector.lock:
+            if detector.dead:
+                return False
+            detector.in_flight[item[:2]] = item
+            try:
+                detector.conn.send(item)
+            except OSError:
+                detector.in_flight.pop(item[:2], None)
+                return False
+        return True
+
+    def _deliver(self, token, frame_idx, faces, sharpness, hashes, error):
+        with self._lock:
+            session = self._sessions.get(token)
+        if session is not None:
+            session.results.put((frame_idx, faces, sharpness, hashes, error))
+
+    def _receive(self, detector):
+        token, frame_idx, slot, faces, sharpness, hashes, error = detector.conn.recv()
+        with detector.lock:
+            detector.in_flight.pop((token, frame_idx), None)
+        self.free_slots.put(slot)
+        self._deliver(token, frame_idx, faces, sharpness, hashes, error)
+
+    def _dispatch(self):
+        while not self._closing:
+            waitables = {}
+            for detector in self.detectors:
+                if detector is not None:
+                    waitables[detector.conn] = detector
+                    waitables[detector.process.sentinel] = detector
+            if not waitables:
+                time.sleep(HEALTH_INTERVAL)
+                continue
+            for ready in connection.wait(list(waitables), timeout=HEALTH_INTERVAL):
+                detector = waitables[ready]
+                if self._closing or detector is not self.detectors[detector.index]:
+                    continue
+                if ready is detector.conn:
+                    try:
+                        self._receive(detector)
+                        continue
+                    except (EOFError, OSError):
+                        pass
+                self._replace(detector)
+
+    def _replace(self, detector):
+        # Results the detector sent before dying are still readable; anything else it held is redone here from
+        # the slot contents so the waiting request neither loses frames nor the slots they occupy.
+        try:
+            while detector.conn.poll():
+                self._receive(detector)
+        except (EOFError, OSError):
+            pass
+        detector.process.join(timeout=1)
+        with detector.lock:
+            detector.dead = True
+            in_flight = list(detector.in_flight.values())
+            detector.in_flight.clear()
+        for token, frame_idx, slot, height, width, settings, scale in in_flight:
+            gray = np.ndarray((height, width), dtype=np.uint8, buffer=self.shm.buf,
+                              offset=slot * self.slot_bytes).copy()
+            try:
+                self._deliver(token, frame_idx, *_detect_frame(gray, settings, scale), None)
+            except Exception as e:
+                self._deliver(token, frame_idx, None, 0.0, None, str(e))
+            self.free_slots.put(slot)
+            self.recovered_frames += 1
+        detector.conn.close()
+
+        index = detector.index
+        if time.monotonic() - detector.started < MIN_UPTIME:
+            self._crash_loops[index] += 1
+        else:
+            self._crash_loops[index] = 0
+        if self._crash_loops[index] >= MAX_CRASH_LOOPS:
+            logger.error(f'Detector {index} keeps crashing (exit code {detector.process.exitcode}); not restarting it')
+            self.detectors[index] = None
+            return
+        logger.warning(f'Detector {index} exited with code {detector.process.exitcode}; restarting it')
+        self.detectors[index] = self._spawn(index)
+        self.restarts += 1
+
+    def session(self, settings, scale=1.0):
+        token = next(self._tokens)
+        session = DetectionSession(self, token, settings, scale)
+        with self._lock:
+            self._sessions[token] = session
+        return session
+
+    def close_session(self, session):
+        while session.outstanding > 0:
+            try:
+                session.poll(block=True)
+            except FrameRingError:
+                break
+        with self._lock:
+            self._sessions.pop(session.token, None)
+
+    def shutdown(self):
+        self._closing = True
+        self._dispatcher.join(timeout=HEALTH_INTERVAL * 2)
+        for detector in self.detectors:
+            if detector is not None:
+                try:
+                    detector.conn.send(None)
+                except OSError:
+                    pass
+        for detector in self.detectors:
+            if detector is not None:
+                detector.process.join(timeout=5)
+                detector.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+    def stats(self):
+        return {
+            'processes': self.processes,
+            'alive': sum(detector is not None and detector.process.is_alive() for detector in self.detectors),
+            'healthy': self.healthy,
+            'restarts': self.restarts,
+            'recovered_frames': self.recovered_frames,
+            'slots': self.slots,
+            'slot_bytes': self.slot_bytes,
+            'free_slots': self.free_slots.qsize(),
+            'sessions': len(self._sessions),
+        }
+
+
+_ring = None
+_ring_lock = threading.Lock()
+
+
+def get_frame_ring():
+    global _ring
+    if DETECTOR_PROCESSES <= 0:
+        return None
+    with _ring_lock:
+        if _ring is None:
+            _ring = FrameRing()
+            atexit.register(_ring.shutdown)
+        return _ring
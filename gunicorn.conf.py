@@ -0,0 +1,25 @@
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = 300
+
+# Import the app and warm up OpenCV/matplotlib once in the master so that
+# forked workers start with everything already loaded.
+preload_app = True
+os.environ.setdefault('PRELOAD_HEAVY', '1')
+
+# Split the machine's cores between workers so OpenCV's thread pools do not
+# oversubscribe; set CPU_PIN=1 to also pin each worker to its own cores.
+os.environ.setdefault('CPU_PROCESSES', str(workers))
+
+
+def post_fork(server, worker):
+    from cpu_budget import CPU_PIN, cpu_budget
+
+    if CPU_PIN:
+        cpu_budget.pin_worker(worker.age - 1)
+    else:
+        cpu_budget.apply()
@@ -0,0 +1,107 @@
+import json
+import os
+import sqlite3
+import threading
+
+HISTORY_DB = os.environ.get('HISTORY_DB', 'history.db')
+MAX_PAGE_SIZE = 100
+IMAGE_FIELDS = ('sample_frame', 'before_frame', 'after_frame', 'chart', 'face_gallery')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    file_hash TEXT,
+    filename TEXT,
+    total_faces INTEGER NOT NULL,
+    avg_faces REAL NOT NULL,
+    max_faces INTEGER NOT NULL,
+    frames_with_faces INTEGER NOT NULL,
+    frame_count INTEGER NOT NULL,
+    detection_rate REAL NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_file_hash ON analyses (file_hash, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_total_faces ON analyses (total_faces, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_max_faces ON analyses (max_faces, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_detection_rate ON analyses (detection_rate, id);
+'''
+
+FILTERS = {
+    'file_hash': ('file_hash = ?', str),
+    'since': ('created_at >= ?', str),
+    'until': ('created_at < ?', str),
+    'min_faces': ('total_faces >= ?', int),
+    'max_faces': ('total_faces <= ?', int),
+    'min_peak': ('max_faces >= ?', int),
+    'min_rate': ('detection_rate >= ?', float),
+}
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add(self, results, file_hash=None, filename=None):
+        summary = {k: v for k, v in results.items() if k not in IMAGE_FIELDS}
+        conn = self._connect()
+        with conn:
+            cur = conn.execute(
+                'INSERT INTO analyses (created_at, file_hash, filename, total_faces, avg_faces, '
+                'max_faces, frames_with_faces, frame_count, detection_rate, results) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (results['timestamp'], file_hash, filename, results['total_faces'],
+                 results['avg_faces'], results['max_faces'], results['frames_with_faces'],
+                 results['frame_count'], results['detection_rate'], json.dumps(summary))
+            )
+        return cur.lastrowid
+
+    def get(self, entry_id):
+        row = self._connect().execute('SELECT * FROM analyses WHERE id = ?', (entry_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def delete(self, entry_id):
+        conn = self._connect()
+        with conn:
+            return conn.execute('DELETE FROM analyses WHERE id = ?', (entry_id,)).rowcount > 0
+
+    def query(self, params, cursor=None, limit=20):
+        clauses = []
+        args = []
+        for name, (clause, cast) in FILTERS.items():
+            if params.get(name) not in (None, ''):
+                clauses.append(clause)
+                args.append(cast(params[name]))
+        if cursor is not None:
+            clauses.append('id < ?')
+            args.append(int(cursor))
+
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql = 'SELECT * FROM analyses'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY id DESC LIMIT ?'
+        rows = self._connect().execute(sql, args + [limit + 1]).fetchall()
+
+        items = [self._row_to_dict(row) for row in rows[:limit]]
+        next_cursor = items[-1]['id'] if len(rows) > limit else None
+        return {'items': items, 'next_cursor': next_cursor, 'limit': limit}
+
+    def _row_to_dict(self, row):
+        entry = dict(row)
+        entry['results'] = json.loads(entry['results'])
+        return entry
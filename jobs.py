@@ -0,0 +1,159 @@
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from detection_store import DetectionStore
+
+JOBS_DIR = os.environ.get('JOBS_DIR', 'jobs')
+MAX_OPEN_STORES = 50
+SOURCE_RETENTION = int(os.environ.get('SOURCE_RETENTION', 3600))
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 24 * 3600))
+JOB_MEDIA_MAX_BYTES = int(os.environ.get('JOB_MEDIA_MAX_BYTES', 2 * 1024 ** 3))
+PURGE_INTERVAL = 60
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+
+def new_job_id():
+    return secrets.token_hex(8)
+
+
+def job_dir(job_id):
+    if not JOB_ID_PATTERN.match(job_id):
+        return None
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def detections_dir(job_id):
+    return os.path.join(job_dir(job_id), 'detections')
+
+
+def source_path(job_id):
+    return os.path.join(job_dir(job_id), 'source.mp4')
+
+
+def annotated_video_path(job_id):
+    return os.path.join(job_dir(job_id), 'annotated.mp4')
+
+
+def frames_dir(job_id):
+    return os.path.join(job_dir(job_id), 'frames')
+
+
+_last_purge = 0.0
+
+
+def purge_expired_jobs(now=None):
+    global _last_purge
+    now = now or time.time()
+    if now - _last_purge < PURGE_INTERVAL or not os.path.isdir(JOBS_DIR):
+        return
+    _last_purge = now
+    for name in os.listdir(JOBS_DIR):
+        if not JOB_ID_PATTERN.match(name):
+            continue
+        path = os.path.join(JOBS_DIR, name)
+        try:
+            age = now - os.path.getmtime(path)
+            if age > JOB_RETENTION:
+                shutil.rmtree(path, ignore_errors=True)
+            elif age > SOURCE_RETENTION and os.path.exists(source_path(name)):
+                os.remove(source_path(name))
+                shutil.rmtree(frames_dir(name), ignore_errors=True)
+        except OSError:
+            continue
+
+
+def _job_media(job_id):
+    paths = [source_path(job_id), annotated_video_path(job_id)]
+    frames = frames_dir(job_id)
+    if os.path.isdir(frames):
+        paths += [os.path.join(frames, name) for name in os.listdir(frames)]
+    media = []
+    for path in paths:
+        try:
+            media.append((os.path.getmtime(path), os.path.getsize(path), path))
+        except OSError:
+            continue
+    return media
+
+
+def job_media_usage():
+    if not os.path.isdir(JOBS_DIR):
+        return []
+    media = []
+    for name in os.listdir(JOBS_DIR):
+        if JOB_ID_PATTERN.match(name):
+            media += _job_media(name)
+    return media
+
+
+_media_lock = threading.Lock()
+_jobs_in_use = {}
+
+
+@contextmanager
+def job_in_use(job_id):
+    # Media of jobs that are still rendering or being read is never trimmed, whichever request trims.
+    with _media_lock:
+        _jobs_in_use[job_id] = _jobs_in_use.get(job_id, 0) + 1
+    try:
+        yield
+    finally:
+        with _media_lock:
+            _jobs_in_use[job_id] -= 1
+            if _jobs_in_use[job_id] == 0:
+                del _jobs_in_use[job_id]
+
+
+def trim_job_media(max_bytes=JOB_MEDIA_MAX_BYTES):
+    with _media_lock:
+        busy = tuple(job_dir(job_id) + os.sep for job_id in _jobs_in_use)
+        media = sorted(job_media_usage())
+        total = sum(size for _, size, _ in media)
+        for _, size, path in media:
+            if total <= max_bytes:
+                break
+            if path.startswith(busy):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
+
+
+def job_media_stats():
+    return {'bytes': sum(size for _, size, _ in job_media_usage()), 'max_bytes': JOB_MEDIA_MAX_BYTES}
+
+
+class JobRegistry:
+    def __init__(self, max_open=MAX_OPEN_STORES):
+        self.max_open = max_open
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job_id, store):
+        with self._lock:
+            self._stores[job_id] = store
+            self._stores.move_to_end(job_id)
+            while len(self._stores) > self.max_open:
+                self._stores.popitem(last=False)
+
+    def get(self, job_id):
+        with self._lock:
+            store = self._stores.get(job_id)
+            if store is not None:
+                self._stores.move_to_end(job_id)
+                return store
+        path = job_dir(job_id)
+        if path is None or not os.path.isdir(os.path.join(path, 'detections')):
+            return None
+        store = DetectionStore.load(detections_dir(job_id))
+        self.add(job_id, store)
+        return store
@@ -0,0 +1,163 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+LOG_FILE = os.environ.get('LOG_FILE', 'app.log')
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 ** 2))
+LOG_BACKUPS = int(os.environ.get('LOG_BACKUPS', 5))
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', 'request=0.1')
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'context', 'event'}
+
+_log_context = contextvars.ContextVar('log_context', default={})
+
+
+def parse_sample_rates(spec):
+    rates = {}
+    for item in spec.split(','):
+        name, _, rate = item.partition('=')
+        if name.strip() and rate:
+            rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+def bind_log_context(**fields):
+    return _log_context.set({**_log_context.get(), **fields})
+
+
+def reset_log_context(token):
+    _log_context.reset(token)
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def as_dict(self):
+        return {name: round(ms, 1) for name, ms in self.stages.items()}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        if getattr(record, 'event', None):
+            entry['event'] = record.event
+        entry.update(getattr(record, 'context', None) or {})
+        entry.update({name: value for name, value in vars(record).items() if name not in RESERVED_ATTRS})
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampledQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue, sample_rates):
+        super().__init__(log_queue)
+        self.sample_rates = sample_rates
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if not super().filter(record):
+            return False
+        rate = self.sample_rates.get(getattr(record, 'event', None))
+        if rate is not None and record.levelno < logging.WARNING and random.random() >= rate:
+            self.sampled_out += 1
+            return False
+        return True
+
+    def prepare(self, record):
+        record.context = _log_context.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    def __init__(self, path=LOG_FILE, level=LOG_LEVEL, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS,
+                 queue_size=LOG_QUEUE_SIZE, sample_rates=LOG_SAMPLE_RATES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue_size = queue_size
+        self.handler = SampledQueueHandler(queue.Queue(queue_size), parse_sample_rates(sample_rates))
+        self.listener = None
+        self.pid = None
+        self._lock = threading.Lock()
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        for existing in root.handlers[:]:
+            root.removeHandler(existing)
+        root.addHandler(self.handler)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.start()
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def start(self):
+        with self._lock:
+            file_handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                                                backupCount=self.backups, delay=True)
+            file_handler.setFormatter(JsonFormatter())
+            self.listener = logging.handlers.QueueListener(self.handler.queue, file_handler)
+            self.listener.start()
+            self.pid = os.getpid()
+
+    def stop(self):
+        with self._lock:
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+                for handler in self.listener.handlers:
+                    handler.close()
+            self.listener = None
+
+    def _after_fork(self):
+        # The listener thread does not survive fork; give the child its own queue and writer.
+        self._lock = threading.Lock()
+        self.handler.queue = queue.Queue(self.queue_size)
+        self.listener = None
+        self.start()
+
+    def stats(self):
+        return {
+            'queued': self.handler.queue.qsize(),
+            'queue_size': self.queue_size,
+            'dropped': self.handler.dropped,
+            'sampled_out': self.handler.sampled_out,
+            'sample_rates': self.handler.sample_rates,
+        }
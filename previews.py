@@ -0,0 +1,100 @@
+import os
+import secrets
+
+import cv2
+import numpy as np
+
+BOX_COLOR = (206, 147, 108)
+PREVIEW_PROFILES = {
+    'full': {'max_dim': 0, 'format': 'jpeg', 'quality': 95, 'chart_dpi': 100},
+    'web': {'max_dim': 1280, 'format': 'webp', 'quality': 80, 'chart_dpi': 80},
+    'compact': {'max_dim': 640, 'format': 'jpeg', 'quality': 75, 'chart_dpi': 60},
+    'thumbnail': {'max_dim': 240, 'format': 'jpeg', 'quality': 70, 'chart_dpi': 40},
+}
+DEFAULT_PREVIEW_PROFILE = 'full'
+IMAGE_FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg', cv2.IMWRITE_JPEG_QUALITY),
+    'webp': ('.webp', 'image/webp', cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+def face_sharpness(gray, faces, scale=1.0):
+    scores = []
+    for box in faces:
+        x, y, w, h = (int(v * scale) for v in box)
+        roi = gray[y:y + h, x:x + w]
+        if roi.size:
+            scores.append(cv2.Laplacian(roi, cv2.CV_32F).var())
+    return float(np.mean(scores)) if scores else 0.0
+
+
+def pick_preview_frame(store):
+    if not len(store.frames) or not store.counts.max():
+        return None
+    best = np.lexsort((store.sharpness, store.counts))[-1]
+    return int(store.frames[best])
+
+
+def draw_faces(frame, faces):
+    for (x, y, w, h) in faces:
+        cv2.rectangle(frame, (x, y), (x + w, y + h), BOX_COLOR, 3)
+        cv2.putText(frame, 'Face', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, BOX_COLOR, 2)
+    return frame
+
+
+def preview_mimetype(profile):
+    return IMAGE_FORMATS[PREVIEW_PROFILES[profile]['format']][1]
+
+
+def encode_image(frame, profile):
+    profile = PREVIEW_PROFILES[profile]
+    height, width = frame.shape[:2]
+    if profile['max_dim'] and max(height, width) > profile['max_dim']:
+        scale = profile['max_dim'] / max(height, width)
+        frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    ext, _, quality_flag = IMAGE_FORMATS[profile['format']]
+    _, buffer = cv2.imencode(ext, frame, [quality_flag, profile['quality']])
+    return buffer.tobytes()
+
+
+def read_frame(video_path, frame_idx):
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx - 1)
+        ret, frame = cap.read()
+        return frame if ret else None
+    finally:
+        cap.release()
+
+
+class FrameRenderer:
+    def __init__(self, video_path, store, cache_dir):
+        self.video_path = video_path
+        self.store = store
+        self.cache_dir = cache_dir
+
+    def render(self, frame_idx, boxes=True, profile=DEFAULT_PREVIEW_PROFILE):
+        ext = IMAGE_FORMATS[PREVIEW_PROFILES[profile]['format']][0]
+        cache_path = os.path.join(self.cache_dir, f"{frame_idx}{'_boxes' if boxes else ''}_{profile}{ext}")
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                return f.read()
+
+        if not os.path.exists(self.video_path):
+            return None
+        frame = read_frame(self.video_path, frame_idx)
+        if frame is None:
+            return None
+        if boxes:
+            draw_faces(frame, self.store.frame_boxes(frame_idx))
+
+        data = encode_image(frame, profile)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{cache_path}.{secrets.token_hex(4)}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+        return data
@@ -0,0 +1,199 @@
+import struct
+
+MAX_FRAMES = 1000
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+PROBE_SLICE_BYTES = 1024 * 1024
+MAX_MOOV_BYTES = 32 * 1024 * 1024
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+class ProbeError(ValueError):
+    pass
+
+
+class _FileSource:
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        start = fileobj.tell()
+        fileobj.seek(0, 2)
+        self.size = fileobj.tell()
+        fileobj.seek(start)
+        self.start = start
+
+    def read(self, offset, n):
+        self.fileobj.seek(offset)
+        data = self.fileobj.read(n)
+        self.fileobj.seek(self.start)
+        return data
+
+
+class _PartialSource:
+    def __init__(self, head, tail=b'', size=None):
+        self.head = head
+        self.tail = tail
+        self.size = size if size is not None else len(head)
+        self.tail_offset = self.size - len(tail)
+
+    def read(self, offset, n):
+        if offset + n <= len(self.head):
+            return self.head[offset:offset + n]
+        if self.tail and offset >= self.tail_offset:
+            start = offset - self.tail_offset
+            return self.tail[start:start + n]
+        return self.head[offset:offset + n] if offset < len(self.head) else b''
+
+
+def _mp4_boxes(data, start=0, end=None):
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                break
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            break
+        yield kind, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _find_moov(source):
+    offset = 0
+    while offset + 8 <= source.size:
+        header = source.read(offset, 16)
+        if len(header) < 8:
+            break
+        size, kind = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1 and len(header) >= 16:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = source.size - offset
+        if size < header_size:
+            break
+        if kind == b'moov':
+            if size > MAX_MOOV_BYTES:
+                raise ProbeError('Video metadata is too large')
+            data = source.read(offset, size)
+            if len(data) < size:
+                return None
+            return data[header_size:]
+        offset += size
+    return None
+
+
+def _parse_mp4_track(trak):
+    track = {}
+    stack = [(trak, 0, len(trak))]
+    while stack:
+        data, start, end = stack.pop()
+        for kind, body, box_end in _mp4_boxes(data, start, end):
+            if kind in MP4_CONTAINERS:
+                stack.append((data, body, box_end))
+            elif kind == b'tkhd':
+                offset = 88 if data[body] == 1 else 76
+                width, height = struct.unpack_from('>II', data, body + offset)
+                track['width'], track['height'] = width >> 16, height >> 16
+            elif kind == b'hdlr':
+                track['handler'] = data[body + 8:body + 12]
+            elif kind == b'mdhd':
+                if data[body] == 1:
+                    track['timescale'], track['duration'] = struct.unpack_from('>IQ', data, body + 20)
+                else:
+                    track['timescale'], track['duration'] = struct.unpack_from('>II', data, body + 12)
+            elif kind == b'stsd':
+                track['codec'] = data[body + 12:body + 16].decode('latin-1').strip()
+            elif kind == b'stsz':
+                track['samples'] = struct.unpack_from('>I', data, body + 8)[0]
+    return track
+
+
+def _probe_mp4(source):
+    try:
+        moov = _find_moov(source)
+        if moov is None:
+            raise ProbeError('Could not find video metadata in the provided bytes')
+        for kind, body, end in _mp4_boxes(moov):
+            if kind != b'trak':
+                continue
+            track = _parse_mp4_track(moov[body:end])
+            if track.get('handler') == b'vide':
+                break
+        else:
+            raise ProbeError('No video track found')
+    except (struct.error, IndexError):
+        raise ProbeError('Corrupt video metadata')
+    seconds = track['duration'] / track['timescale'] if track.get('timescale') else 0
+    frames = track.get('samples', 0)
+    return {
+        'container': 'mp4',
+        'codec': track.get('codec'),
+        'width': track.get('width', 0),
+        'height': track.get('height', 0),
+        'frame_count': frames,
+        'fps': round(frames / seconds, 3) if seconds > 0 else 0,
+        'duration': round(seconds, 3),
+    }
+
+
+def _riff_chunks(data, start, end):
+    offset = start
+    while offset + 8 <= end:
+        kind, size = struct.unpack_from('<4sI', data, offset)
+        yield kind, offset + 8, min(offset + 8 + size, end)
+        offset += 8 + size + (size & 1)
+
+
+def _probe_avi(source):
+    data = source.read(0, PROBE_SLICE_BYTES)
+    info = {'container': 'avi', 'codec': None}
+    stack = [(12, len(data))]
+    while stack:
+        start, end = stack.pop()
+        for kind, body, chunk_end in _riff_chunks(data, start, end):
+            if kind == b'LIST' and data[body:body + 4] in (b'hdrl', b'strl'):
+                stack.append((body + 4, chunk_end))
+            elif kind == b'avih' and chunk_end - body >= 40:
+                usec, = struct.unpack_from('<I', data, body)
+                info['frame_count'], = struct.unpack_from('<I', data, body + 16)
+                info['width'], info['height'] = struct.unpack_from('<II', data, body + 32)
+                info['fps'] = round(1e6 / usec, 3) if usec else 0
+            elif kind == b'strh' and data[body:body + 4] == b'vids' and info['codec'] is None:
+                info['codec'] = data[body + 4:body + 8].decode('latin-1').strip('\x00 ')
+    if 'frame_count' not in info:
+        raise ProbeError('Could not find video metadata in the provided bytes')
+    info['duration'] = round(info['frame_count'] / info['fps'], 3) if info['fps'] else 0
+    return info
+
+
+def _probe(source):
+    magic = source.read(0, 12)
+    if magic[:4] == b'RIFF' and magic[8:12] == b'AVI ':
+        return _probe_avi(source)
+    if magic[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip'):
+        return _probe_mp4(source)
+    raise ProbeError('Unrecognized video container')
+
+
+def probe_file(fileobj):
+    return _probe(_FileSource(fileobj))
+
+
+def probe_bytes(head, tail=b'', size=None):
+    return _probe(_PartialSource(head, tail, size))
+
+
+def check_limits(info, max_frames=MAX_FRAMES):
+    if not info['width'] or not info['height']:
+        return 'Video has no valid resolution'
+    if not info['fps'] or info['fps'] <= 0:
+        return 'Video has no valid frame rate'
+    if info['frame_count'] > max_frames:
+        return 'Video too long for free tier'
+    return None
@@ -0,0 +1,195 @@
+import cProfile
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_KEY = os.environ.get('PROFILE_KEY', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_FORMAT = os.environ.get('PROFILE_FORMAT', 'stacks')
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+MAX_PROFILES = int(os.environ.get('MAX_PROFILES', 200))
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+PROFILE_FORMATS = {
+    'stacks': ('.folded', 'text/plain'),
+    'cprofile': ('.prof', 'application/octet-stream'),
+}
+
+
+class StackSampler:
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class ProfileRecord:
+    def __init__(self, profile_id, endpoint, fmt, trigger):
+        self.id = profile_id
+        self.endpoint = endpoint
+        self.format = fmt
+        self.trigger = trigger
+        self.status = None
+        self.samples = None
+
+    def meta(self, duration_ms, size):
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'format': self.format,
+            'trigger': self.trigger,
+            'status': self.status,
+            'samples': self.samples,
+            'duration_ms': round(duration_ms, 1),
+            'bytes': size,
+            'created_at': datetime.now().isoformat(),
+        }
+
+
+class Profiler:
+    def __init__(self, root=PROFILE_DIR, key=PROFILE_KEY, sample_rate=PROFILE_SAMPLE_RATE,
+                 default_format=PROFILE_FORMAT, max_profiles=MAX_PROFILES):
+        self.root = root
+        self.key = key
+        self.sample_rate = sample_rate
+        self.default_format = default_format if default_format in PROFILE_FORMATS else 'stacks'
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self.requested = 0
+        self.sampled = 0
+
+    def privileged(self, key):
+        return bool(self.key) and secrets.compare_digest(key, self.key)
+
+    def choose(self, flag, key):
+        if flag and self.privileged(key):
+            return (flag if flag in PROFILE_FORMATS else self.default_format), 'requested'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.default_format, 'sampled'
+        return None, None
+
+    @contextmanager
+    def profile(self, endpoint, fmt, trigger):
+        record = ProfileRecord(secrets.token_hex(8), endpoint, fmt, trigger)
+        if fmt == 'cprofile':
+            collector = cProfile.Profile()
+            collector.enable()
+        else:
+            collector = StackSampler(threading.get_ident())
+            collector.start()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            if fmt == 'cprofile':
+                collector.disable()
+            else:
+                collector.stop()
+                record.samples = collector.samples
+            self._save(record, collector, (time.perf_counter() - started) * 1000)
+
+    def _save(self, record, collector, duration_ms):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._data_path(record.id, record.format)
+        tmp_path = f'{path}.tmp'
+        if record.format == 'cprofile':
+            collector.dump_stats(tmp_path)
+        else:
+            collector.write(tmp_path)
+        os.replace(tmp_path, path)
+        with open(os.path.join(self.root, f'{record.id}.json'), 'w') as f:
+            json.dump(record.meta(duration_ms, os.path.getsize(path)), f)
+        with self._lock:
+            if record.trigger == 'requested':
+                self.requested += 1
+            else:
+                self.sampled += 1
+        self.prune()
+
+    def _data_path(self, profile_id, fmt):
+        return os.path.join(self.root, f'{profile_id}{PROFILE_FORMATS[fmt][0]}')
+
+    def _meta(self):
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.root, name)) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries, key=lambda meta: meta['created_at'], reverse=True)
+
+    def list(self, limit=50):
+        return self._meta()[:limit]
+
+    def get(self, profile_id):
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.root, f'{profile_id}.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        path = self._data_path(profile_id, meta['format'])
+        if not os.path.exists(path):
+            return None
+        return meta, path, PROFILE_FORMATS[meta['format']][1]
+
+    def prune(self):
+        with self._lock:
+            for meta in self._meta()[self.max_profiles:]:
+                for path in (self._data_path(meta['id'], meta['format']),
+                             os.path.join(self.root, f"{meta['id']}.json")):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def stats(self):
+        return {
+            'enabled': bool(self.key) or self.sample_rate > 0,
+            'sample_rate': self.sample_rate,
+            'default_format': self.default_format,
+            'requested': self.requested,
+            'sampled': self.sampled,
+        }
@@ -0,0 +1,144 @@
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+SCRATCH_IN_MEMORY = os.environ.get('SCRATCH_IN_MEMORY', '0') == '1'
+SCRATCH_DIR = os.environ.get('SCRATCH_DIR') or os.path.join(
+    '/dev/shm' if SCRATCH_IN_MEMORY and os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+    'face-analytics-scratch'
+)
+SCRATCH_MAX_BYTES = int(os.environ.get('SCRATCH_MAX_BYTES', 1024 ** 3))
+SCRATCH_ORPHAN_AGE = int(os.environ.get('SCRATCH_ORPHAN_AGE', 900))
+JANITOR_INTERVAL = int(os.environ.get('SCRATCH_JANITOR_INTERVAL', 60))
+
+
+class ScratchQuotaExceeded(RuntimeError):
+    pass
+
+
+def _owner_alive(name):
+    pid = name.split('-', 1)[0]
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class ScratchSpace:
+    def __init__(self, root=SCRATCH_DIR, max_bytes=SCRATCH_MAX_BYTES, orphan_age=SCRATCH_ORPHAN_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.orphan_age = orphan_age
+        self._lock = threading.Lock()
+        self._reserved = {}
+        self._janitor_pid = None
+        self.quota_rejections = 0
+        self.orphans_removed = 0
+
+    def _sizes(self):
+        sizes = {}
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return sizes
+        for name in names:
+            try:
+                sizes[name] = os.path.getsize(os.path.join(self.root, name))
+            except OSError:
+                continue
+        return sizes
+
+    def _usage(self, sizes):
+        reserved = {os.path.basename(path): nbytes for path, nbytes in self._reserved.items()}
+        total = sum(max(size, reserved.pop(name, 0)) for name, size in sizes.items())
+        return total + sum(reserved.values())
+
+    def usage_bytes(self):
+        with self._lock:
+            return self._usage(self._sizes())
+
+    @contextmanager
+    def file(self, suffix='', expected_bytes=0):
+        self._ensure_janitor()
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f'{os.getpid()}-{secrets.token_hex(8)}{suffix}')
+        with self._lock:
+            if self._usage(self._sizes()) + expected_bytes > self.max_bytes:
+                self.quota_rejections += 1
+                raise ScratchQuotaExceeded('Server scratch space is full, please retry shortly')
+            self._reserved[path] = expected_bytes
+        try:
+            yield path
+        finally:
+            with self._lock:
+                self._reserved.pop(path, None)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _ensure_janitor(self):
+        if self._janitor_pid == os.getpid():
+            return
+        with self._lock:
+            if self._janitor_pid == os.getpid():
+                return
+            self._janitor_pid = os.getpid()
+        threading.Thread(target=self._janitor, daemon=True).start()
+
+    def _janitor(self):
+        while True:
+            self.sweep_orphans()
+            time.sleep(JANITOR_INTERVAL)
+
+    def sweep_orphans(self, now=None):
+        now = now or time.time()
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return 0
+        with self._lock:
+            active = {os.path.basename(path) for path in self._reserved}
+        removed = 0
+        for name in names:
+            if name in active:
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stale = now - os.path.getmtime(path) > self.orphan_age
+            except OSError:
+                continue
+            if stale or not _owner_alive(name):
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                removed += 1
+        self.orphans_removed += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            sizes = self._sizes()
+            return {
+                'root': self.root,
+                'in_memory': self.root.startswith('/dev/shm'),
+                'bytes': self._usage(sizes),
+                'max_bytes': self.max_bytes,
+                'files': len(sizes),
+                'active': len(self._reserved),
+                'quota_rejections': self.quota_rejections,
+                'orphans_removed': self.orphans_removed,
+            }
@@ -0,0 +1,74 @@
+import cv2
+
+HIST_FRAME_SIZE = (64, 36)
+HIST_BINS = [32]
+CUT_THRESHOLD = 0.4
+MIN_SHOT_FRAMES = 5
+
+
+def frame_histogram(gray):
+    small = cv2.resize(gray, HIST_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+    hist = cv2.calcHist([small], [0], None, HIST_BINS, [0, 256])
+    return cv2.normalize(hist, hist).flatten()
+
+
+class ShotSegmenter:
+    def __init__(self, fps, threshold=CUT_THRESHOLD, min_shot_frames=MIN_SHOT_FRAMES):
+        self.fps = fps
+        self.threshold = threshold
+        self.min_shot_frames = min_shot_frames
+        self.prev_hist = None
+        self.shots = []
+        self.shot_start = None
+        self.last_frame = None
+
+    def update(self, frame_idx, gray):
+        hist = frame_histogram(gray)
+        is_cut = False
+        if self.prev_hist is None:
+            is_cut = True
+        elif frame_idx - self.shot_start >= self.min_shot_frames:
+            distance = cv2.compareHist(self.prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+            is_cut = distance > self.threshold
+        self.prev_hist = hist
+
+        if is_cut:
+            if self.shot_start is not None:
+                self._close(self.last_frame)
+            self.shot_start = frame_idx
+        self.last_frame = frame_idx
+        return is_cut
+
+    def shot_for(self, frame_idx):
+        if self.shot_start is not None and frame_idx >= self.shot_start:
+            return self.shot_start
+        for shot in reversed(self.shots):
+            if shot['start_frame'] <= frame_idx:
+                return shot['start_frame']
+        return None
+
+    def finish(self):
+        if self.shot_start is not None:
+            self._close(self.last_frame)
+            self.shot_start = None
+        return self.shots
+
+    def _close(self, end_frame):
+        self.shots.append({
+            'index': len(self.shots),
+            'start_frame': self.shot_start,
+            'end_frame': end_frame,
+            'start_time': self._time(self.shot_start),
+            'end_time': self._time(end_frame),
+            'duration': round((end_frame - self.shot_start + 1) / self.fps, 2) if self.fps > 0 else 0,
+        })
+
+    def _time(self, frame_idx):
+        return round((frame_idx - 1) / self.fps, 2) if self.fps > 0 else 0
+
+
+def annotate_shots(shots, shot_faces, shot_samples):
+    for shot in shots:
+        shot['max_faces'] = shot_faces.get(shot['start_frame'], 0)
+        shot['sampled_frames'] = shot_samples.get(shot['start_frame'], [])
+    return shots
@@ -0,0 +1,55 @@
+import importlib
+import os
+import time
+from contextlib import contextmanager
+
+PRELOAD_HEAVY = os.environ.get('PRELOAD_HEAVY', '0') == '1'
+
+
+class StartupReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+        self.ready_ms = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - started) * 1000))
+
+    def import_modules(self, *names):
+        for name in names:
+            with self.stage(f'import:{name}'):
+                importlib.import_module(name)
+
+    def mark_ready(self):
+        self.ready_ms = (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self):
+        return {
+            'pid': os.getpid(),
+            'preloaded': PRELOAD_HEAVY,
+            'ready_ms': round(self.ready_ms, 1) if self.ready_ms is not None else None,
+            'stages': [{'name': name, 'ms': round(ms, 1)} for name, ms in self.stages],
+        }
+
+
+startup_report = StartupReport()
+
+
+def preload_heavy_modules():
+    import numpy as np
+
+    from charts import pyplot
+    from detection import face_cascade
+
+    with startup_report.stage('import:matplotlib'):
+        pyplot()
+    with startup_report.stage('warmup:face_cascade'):
+        cascade = face_cascade()
+    with startup_report.stage('warmup:detect'):
+        if cascade is not None:
+            cascade.detectMultiScale(np.zeros((120, 160), dtype=np.uint8))
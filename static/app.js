@@ -0,0 +1,478 @@
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'F12' || (e.ctrlKey && e.shiftKey && e.key === 'I') || 
+        (e.ctrlKey && e.shiftKey && e.key === 'J') || (e.ctrlKey && e.key === 'U')) {
+        e.preventDefault();
+        return false;
+    }
+});
+
+
+let settings = {
+    sensitivity: 5,
+    minFaceSize: 30,
+    frameSkip: 1,
+    previewProfile: 'full',
+    boundingBox: true,
+    chart: true,
+    shotDetection: false,
+    tiledDetection: false,
+    annotatedVideo: false,
+    history: true
+};
+
+
+if (localStorage.getItem('videoAnalyticsSettings')) {
+    settings = JSON.parse(localStorage.getItem('videoAnalyticsSettings'));
+}
+
+document.getElementById('sensitivity').addEventListener('input', function(e) {
+    document.getElementById('sensitivityValue').textContent = e.target.value;
+});
+
+const dropZone = document.getElementById('dropZone');
+const videoInput = document.getElementById('videoInput');
+const selectedFile = document.getElementById('selectedFile');
+const analyzeBtn = document.getElementById('analyzeBtn');
+const uploadForm = document.getElementById('uploadForm');
+const uploadSection = document.getElementById('uploadSection');
+const loading = document.getElementById('loading');
+const resultsSection = document.getElementById('resultsSection');
+const errorMessage = document.getElementById('errorMessage');
+const progressBar = document.getElementById('progressBar');
+const progressFill = document.getElementById('progressFill');
+
+let currentResults = null;
+
+
+function switchTab(tabName, element) {
+    document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+    document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+
+    if (element) {
+        element.classList.add('active');
+    } else {
+        document.querySelector(`.tab[onclick="switchTab('${tabName}', this)"]`).classList.add('active');
+    }
+    document.getElementById(tabName + 'Tab').classList.add('active');
+
+    if (tabName === 'history') {
+        loadHistory();
+    }
+}
+
+
+function toggleSetting(element) {
+    element.classList.toggle('active');
+}
+
+
+function saveSettings() {
+    settings = {
+        sensitivity: parseInt(document.getElementById('sensitivity').value),
+        minFaceSize: parseInt(document.getElementById('minFaceSize').value),
+        frameSkip: parseInt(document.getElementById('frameSkip').value),
+        previewProfile: document.getElementById('previewProfile').value,
+        boundingBox: document.getElementById('boundingBoxToggle').classList.contains('active'),
+        chart: document.getElementById('chartToggle').classList.contains('active'),
+        shotDetection: document.getElementById('shotToggle').classList.contains('active'),
+        tiledDetection: document.getElementById('tiledToggle').classList.contains('active'),
+        annotatedVideo: document.getElementById('annotatedToggle').classList.contains('active'),
+        history: document.getElementById('historyToggle').classList.contains('active')
+    };
+    localStorage.setItem('videoAnalyticsSettings', JSON.stringify(settings));
+    alert('✓ Settings saved successfully!');
+}
+
+
+dropZone.addEventListener('click', () => videoInput.click());
+
+
+dropZone.addEventListener('dragover', (e) => {
+    e.preventDefault();
+    dropZone.classList.add('dragover');
+});
+
+dropZone.addEventListener('dragleave', () => {
+    dropZone.classList.remove('dragover');
+});
+
+dropZone.addEventListener('drop', (e) => {
+    e.preventDefault();
+    dropZone.classList.remove('dragover');
+    const files = e.dataTransfer.files;
+    if (files.length > 0) {
+        videoInput.files = files;
+        handleFileSelect();
+    }
+});
+
+videoInput.addEventListener('change', handleFileSelect);
+
+function handleFileSelect() {
+    const file = videoInput.files[0];
+    if (file) {
+        const fileSize = (file.size / (1024 * 1024)).toFixed(2);
+        if (fileSize > 100) {
+            showError('File size exceeds 100MB limit');
+            videoInput.value = '';
+            return;
+        }
+        selectedFile.textContent = `📹 ${file.name} (${fileSize} MB)`;
+        selectedFile.style.display = 'block';
+        analyzeBtn.disabled = false;
+        errorMessage.style.display = 'none';
+    }
+}
+
+
+async function probeVideo(file) {
+    const slice = 1024 * 1024;
+    const formData = new FormData();
+    formData.append('head', file.slice(0, slice));
+    if (file.size > slice) {
+        formData.append('tail', file.slice(Math.max(slice, file.size - slice)));
+    }
+    formData.append('size', file.size);
+
+    const response = await fetch('/probe', {
+        method: 'POST',
+        headers: {
+            'X-License-Key': 'KHAN_MOHD_ASIM_2025'
+        },
+        body: formData
+    });
+    if (response.status !== 400) return null;
+    const failure = await response.json().catch(() => ({}));
+    return failure.error || 'Video rejected';
+}
+
+uploadForm.addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const problem = await probeVideo(videoInput.files[0]).catch(() => null);
+    if (problem) {
+        showError(problem);
+        return;
+    }
+
+    const formData = new FormData(uploadForm);
+    formData.append('settings', JSON.stringify(settings));
+    await runAnalysis(formData);
+});
+
+async function reanalyze() {
+    if (!currentResults || !currentResults.file_hash) return;
+
+    const formData = new FormData();
+    formData.append('settings', JSON.stringify(settings));
+    formData.append('video_hash', currentResults.file_hash);
+    await runAnalysis(formData, videoInput.files[0]);
+}
+
+async function runAnalysis(formData, fallbackFile) {
+    uploadSection.style.display = 'none';
+    loading.style.display = 'block';
+    resultsSection.style.display = 'none';
+    progressBar.style.display = 'block';
+
+
+    let progress = 0;
+    const progressInterval = setInterval(() => {
+        progress += Math.random() * 15;
+        if (progress > 90) progress = 90;
+        progressFill.style.width = progress + '%';
+    }, 500);
+
+    try {
+        let response = await fetch('/analyze', {
+            method: 'POST',
+            headers: {
+                'X-License-Key': 'KHAN_MOHD_ASIM_2025'
+            },
+            body: formData
+        });
+        if (response.status === 404 && fallbackFile) {
+            formData.delete('video_hash');
+            formData.append('video', fallbackFile);
+            response = await fetch('/analyze', {
+                method: 'POST',
+                headers: {
+                    'X-License-Key': 'KHAN_MOHD_ASIM_2025'
+                },
+                body: formData
+            });
+        }
+
+        clearInterval(progressInterval);
+        progressFill.style.width = '100%';
+
+        if (!response.ok) {
+            const failure = await response.json().catch(() => ({}));
+            if (response.status === 429) {
+                throw new Error(`${failure.error || 'Server busy'}, retry in ${response.headers.get('Retry-After') || 'a few'}s`);
+            }
+            throw new Error(failure.error || 'Analysis failed');
+        }
+
+        const data = await response.json();
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        currentResults = data;
+        displayResults(data);
+    } catch (error) {
+        clearInterval(progressInterval);
+        showError('Failed to analyze video: ' + error.message);
+        uploadSection.style.display = 'block';
+    } finally {
+        loading.style.display = 'none';
+        setTimeout(() => {
+            progressBar.style.display = 'none';
+            progressFill.style.width = '0%';
+        }, 1000);
+    }
+}
+
+function displayResults(data) {
+    document.getElementById('totalFaces').textContent = data.total_faces;
+    document.getElementById('avgFaces').textContent = data.avg_faces;
+    document.getElementById('frameCount').textContent = data.frame_count;
+    document.getElementById('detectionRate').textContent = data.detection_rate + '%';
+    document.getElementById('maxFaces').textContent = data.max_faces || 0;
+    document.getElementById('duration').textContent = data.duration || '0s';
+    document.getElementById('uniqueFaces').textContent = data.unique_faces !== undefined ? data.unique_faces : '-';
+
+    if (data.sample_frame) {
+        document.getElementById('sampleFrame').src = `data:${data.preview_mimetype || 'image/jpeg'};base64,` + data.sample_frame;
+    }
+
+    if (data.job_id && data.frame_count > 0) {
+        const frameSlider = document.getElementById('frameSlider');
+        frameSlider.max = data.frame_count;
+        frameSlider.value = data.preview_frame ? Math.max(1, Math.round(data.preview_frame / (settings.frameSkip || 1))) : 1;
+        document.getElementById('frameSliderLabel').textContent = `Frame ${frameSlider.value * (settings.frameSkip || 1)}`;
+        document.getElementById('frameBrowser').style.display = 'block';
+    }
+
+    if (data.chart && settings.chart) {
+        document.getElementById('chartContainer').style.display = 'block';
+        document.getElementById('chartImage').src = 'data:image/png;base64,' + data.chart;
+    }
+
+    if (data.face_gallery && data.face_gallery.length) {
+        document.getElementById('faceGallery').innerHTML = data.face_gallery.map(face => `
+            <div class="face-gallery-item">
+                ${face.thumbnail ? `<img src="data:image/jpeg;base64,${face.thumbnail}" alt="Face ${face.id + 1}">` : ''}
+                <div>${face.frames} frames</div>
+            </div>
+        `).join('');
+        document.getElementById('galleryContainer').style.display = 'block';
+    }
+
+    document.getElementById('annotatedVideoBtn').style.display =
+        data.annotated_video && data.annotated_video.url ? 'inline-block' : 'none';
+
+    if (data.before_frame && data.after_frame) {
+        document.getElementById('comparisonView').style.display = 'grid';
+        document.getElementById('beforeFrame').src = `data:${data.preview_mimetype || 'image/jpeg'};base64,` + data.before_frame;
+        document.getElementById('afterFrame').src = `data:${data.preview_mimetype || 'image/jpeg'};base64,` + data.after_frame;
+    }
+
+    resultsSection.style.display = 'block';
+}
+
+document.getElementById('frameSlider').addEventListener('change', async function(e) {
+    if (!currentResults || !currentResults.job_id) return;
+
+    const frame = e.target.value * (settings.frameSkip || 1);
+    document.getElementById('frameSliderLabel').textContent = `Frame ${frame}`;
+    const response = await fetch(`/jobs/${currentResults.job_id}/frames/${frame}?boxes=${settings.boundingBox ? 1 : 0}&profile=${settings.previewProfile || 'full'}`, {
+        headers: { 'X-License-Key': 'KHAN_MOHD_ASIM_2025' }
+    });
+    if (!response.ok) {
+        document.getElementById('frameSliderLabel').textContent = `Frame ${frame} is no longer available`;
+        return;
+    }
+    const sampleFrame = document.getElementById('sampleFrame');
+    if (sampleFrame.src.startsWith('blob:')) {
+        window.URL.revokeObjectURL(sampleFrame.src);
+    }
+    sampleFrame.src = window.URL.createObjectURL(await response.blob());
+});
+
+function showError(message) {
+    errorMessage.textContent = '⚠️ ' + message;
+    errorMessage.style.display = 'block';
+}
+
+function resetForm() {
+    uploadForm.reset();
+    selectedFile.style.display = 'none';
+    analyzeBtn.disabled = true;
+    resultsSection.style.display = 'none';
+    uploadSection.style.display = 'block';
+    errorMessage.style.display = 'none';
+    document.getElementById('chartContainer').style.display = 'none';
+    document.getElementById('comparisonView').style.display = 'none';
+    document.getElementById('frameBrowser').style.display = 'none';
+    document.getElementById('galleryContainer').style.display = 'none';
+}
+
+function downloadReport() {
+    if (!currentResults) return;
+
+    const report = `VIDEO ANALYTICS REPORT
+Generated by: Khan Mohd Asim Video Analytics AI
+Date: ${new Date().toLocaleString()}
+═══════════════════════════════════════
+
+DETECTION STATISTICS
+─────────────────────────────────────
+Total Faces Detected: ${currentResults.total_faces}
+Average Faces per Frame: ${currentResults.avg_faces}
+Total Frames Processed: ${currentResults.frame_count}
+Detection Rate: ${currentResults.detection_rate}%
+Maximum Faces in Single Frame: ${currentResults.max_faces || 0}
+Video Duration: ${currentResults.duration || 'N/A'}
+${currentResults.shots ? `Shots Detected: ${currentResults.shot_count}\n` : ''}
+═══════════════════════════════════════
+Copyright © 2025 Khan Mohd Asim
+All Rights Reserved
+`;
+
+    const blob = new Blob([report], { type: 'text/plain' });
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `video_analysis_report_${Date.now()}.txt`;
+    a.click();
+    window.URL.revokeObjectURL(url);
+}
+
+function exportData() {
+    if (!currentResults) return;
+
+    const jsonData = JSON.stringify(currentResults, null, 2);
+    const blob = new Blob([jsonData], { type: 'application/json' });
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `video_analysis_data_${Date.now()}.json`;
+    a.click();
+    window.URL.revokeObjectURL(url);
+}
+
+async function exportDetections() {
+    if (!currentResults || !currentResults.job_id) return;
+
+    const response = await fetch(`/jobs/${currentResults.job_id}/detections?format=csv`, {
+        headers: { 'X-License-Key': 'KHAN_MOHD_ASIM_2025' }
+    });
+    if (!response.ok) {
+        showError('Detections are no longer available for this analysis');
+        return;
+    }
+    const blob = await response.blob();
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `video_detections_${currentResults.job_id}.csv`;
+    a.click();
+    window.URL.revokeObjectURL(url);
+}
+
+async function downloadAnnotatedVideo() {
+    if (!currentResults || !currentResults.annotated_video || !currentResults.annotated_video.url) return;
+
+    const response = await fetch(currentResults.annotated_video.url, {
+        headers: { 'X-License-Key': 'KHAN_MOHD_ASIM_2025' }
+    });
+    if (!response.ok) {
+        showError('The annotated video is no longer available');
+        return;
+    }
+    const blob = await response.blob();
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `annotated_${currentResults.job_id}.mp4`;
+    a.click();
+    window.URL.revokeObjectURL(url);
+}
+
+async function loadHistory() {
+    const historyList = document.getElementById('historyList');
+    let history = [];
+    try {
+        const response = await fetch('/history?limit=10', {
+            headers: { 'X-License-Key': 'KHAN_MOHD_ASIM_2025' }
+        });
+        if (response.ok) {
+            history = (await response.json()).items;
+        }
+    } catch (error) {
+        history = [];
+    }
+
+    if (history.length === 0) {
+        historyList.innerHTML = '<p style="color: #a0a0b0; text-align: center; padding: 40px;">No analysis history yet. Start by analyzing a video!</p>';
+        return;
+    }
+
+    historyList.innerHTML = history.map(item => `
+        <div class="stat-card" style="margin-bottom: 20px;">
+            <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 12px;">
+                <div>
+                    <div class="stat-label">Analysis #${item.id}</div>
+                    <div style="color: #a0a0b0; font-size: 0.85rem;">${new Date(item.created_at).toLocaleString()}</div>
+                </div>
+                <button class="btn btn-secondary" style="padding: 8px 16px; font-size: 0.85rem; margin: 0;" onclick="deleteHistory(${item.id})">🗑️</button>
+            </div>
+            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(120px, 1fr)); gap: 12px;">
+                <div>
+                    <div style="color: #a0a0b0; font-size: 0.8rem;">Total Faces</div>
+                    <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.total_faces}</div>
+                </div>
+                <div>
+                    <div style="color: #a0a0b0; font-size: 0.8rem;">Avg/Frame</div>
+                    <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.avg_faces}</div>
+                </div>
+                <div>
+                    <div style="color: #a0a0b0; font-size: 0.8rem;">Frames</div>
+                    <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.frame_count}</div>
+                </div>
+                <div>
+                    <div style="color: #a0a0b0; font-size: 0.8rem;">Rate</div>
+                    <div style="color: #ce936c; font-size: 1.2rem; font-weight: 600;">${item.results.detection_rate}%</div>
+                </div>
+            </div>
+        </div>
+    `).join('');
+}
+
+async function deleteHistory(id) {
+    await fetch(`/history/${id}`, {
+        method: 'DELETE',
+        headers: { 'X-License-Key': 'KHAN_MOHD_ASIM_2025' }
+    });
+    loadHistory();
+}
+
+
+document.addEventListener('DOMContentLoaded', function() {
+
+    if (settings) {
+        document.getElementById('sensitivity').value = settings.sensitivity;
+        document.getElementById('sensitivityValue').textContent = settings.sensitivity;
+        document.getElementById('minFaceSize').value = settings.minFaceSize;
+        document.getElementById('frameSkip').value = settings.frameSkip;
+        document.getElementById('previewProfile').value = settings.previewProfile || 'full';
+
+        if (!settings.boundingBox) document.getElementById('boundingBoxToggle').classList.remove('active');
+        if (!settings.chart) document.getElementById('chartToggle').classList.remove('active');
+        if (settings.shotDetection) document.getElementById('shotToggle').classList.add('active');
+        if (settings.tiledDetection) document.getElementById('tiledToggle').classList.add('active');
+        if (settings.annotatedVideo) document.getElementById('annotatedToggle').classList.add('active');
+        if (!settings.history) document.getElementById('historyToggle').classList.remove('active');
+    }
+});
@@ -0,0 +1,132 @@
+import itertools
+import math
+import time
+
+import cv2
+
+from analysis import analysis_scale
+from detection import detect_faces, detector_params
+
+SWEEP_KEYS = ('sensitivity', 'minFaceSize', 'frameSkip')
+MAX_SWEEP_CONFIGS = 48
+
+
+class SweepError(ValueError):
+    pass
+
+
+def _check_option(key, option):
+    if isinstance(option, bool) or not isinstance(option, (int, float)) or not math.isfinite(option):
+        raise SweepError(f'Grid values for {key} must be numbers')
+    if key == 'sensitivity' and option <= -5:
+        # detector_params maps sensitivity to scaleFactor = 1.1 + sensitivity / 50, which must stay above 1.
+        raise SweepError('Grid values for sensitivity must be greater than -5')
+    if key in ('minFaceSize', 'frameSkip') and (option < 1 or option != int(option)):
+        raise SweepError(f'Grid values for {key} must be positive integers')
+
+
+def expand_grid(grid, base_settings):
+    values = []
+    for key in SWEEP_KEYS:
+        options = grid.get(key, [base_settings.get(key)])
+        if not isinstance(options, list) or not options:
+            raise SweepError(f'Grid values for {key} must be a non-empty list')
+        for option in options:
+            if option is not None:
+                _check_option(key, option)
+        values.append(options)
+
+    configs = []
+    for combo in itertools.product(*values):
+        config = dict(base_settings)
+        config.update({k: v for k, v in zip(SWEEP_KEYS, combo) if v is not None})
+        config['frameSkip'] = int(config.get('frameSkip', 1))
+        if 'minFaceSize' in config:
+            config['minFaceSize'] = int(config['minFaceSize'])
+        configs.append(config)
+    if len(configs) > MAX_SWEEP_CONFIGS:
+        raise SweepError(f'Grid expands to {len(configs)} configurations, limit is {MAX_SWEEP_CONFIGS}')
+    return configs
+
+
+def _detector_key(settings, scale):
+    params = detector_params(settings)
+    return (params['scaleFactor'], params['minNeighbors'], params['minSize'], scale,
+            bool(settings.get('tiledDetection', False)), settings.get('tileSize'))
+
+
+def run_sweep(cap, cascade, configs):
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    scales = [analysis_scale(width, config) for config in configs]
+    detector_keys = [_detector_key(config, scale) for config, scale in zip(configs, scales)]
+    stats = [{
+        'frame_count': 0,
+        'total_faces': 0,
+        'frames_with_faces': 0,
+        'max_faces': 0,
+        'detect_ms': 0.0,
+    } for _ in configs]
+
+    decode_ms = 0.0
+    shared_detect_ms = 0.0
+    frame_idx = 0
+    while cap.isOpened():
+        started = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_idx += 1
+
+        active = [i for i, config in enumerate(configs) if frame_idx % config['frameSkip'] == 0]
+        if not active:
+            decode_ms += (time.perf_counter() - started) * 1000
+            continue
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        grays = {1.0: gray}
+        for i in active:
+            if scales[i] not in grays:
+                grays[scales[i]] = cv2.resize(gray, None, fx=scales[i], fy=scales[i], interpolation=cv2.INTER_AREA)
+        decode_ms += (time.perf_counter() - started) * 1000
+
+        frame_results = {}
+        for i in active:
+            key = detector_keys[i]
+            if key not in frame_results:
+                started = time.perf_counter()
+                faces = detect_faces(cascade, grays[scales[i]], configs[i], scales[i])
+                elapsed = (time.perf_counter() - started) * 1000
+                shared_detect_ms += elapsed
+                frame_results[key] = (len(faces), elapsed)
+            num_faces, elapsed = frame_results[key]
+
+            entry = stats[i]
+            entry['frame_count'] += 1
+            entry['detect_ms'] += elapsed
+            if num_faces > 0:
+                entry['frames_with_faces'] += 1
+                entry['total_faces'] += num_faces
+                entry['max_faces'] = max(entry['max_faces'], num_faces)
+
+    table = []
+    for config, entry in zip(configs, stats):
+        frame_count = entry['frame_count']
+        table.append({
+            'sensitivity': config.get('sensitivity', 5),
+            'minFaceSize': config.get('minFaceSize', 30),
+            'frameSkip': config['frameSkip'],
+            'frame_count': frame_count,
+            'total_faces': entry['total_faces'],
+            'frames_with_faces': entry['frames_with_faces'],
+            'max_faces': entry['max_faces'],
+            'avg_faces': round(entry['total_faces'] / frame_count, 2) if frame_count > 0 else 0,
+            'detection_rate': round(entry['frames_with_faces'] / frame_count * 100, 1) if frame_count > 0 else 0,
+            'detect_ms': round(entry['detect_ms'], 1),
+            'ms_per_frame': round(entry['detect_ms'] / frame_count, 2) if frame_count > 0 else 0,
+        })
+
+    return {
+        'configs': table,
+        'frames_decoded': frame_idx,
+        'decode_ms': round(decode_ms, 1),
+        'detect_ms': round(shared_detect_ms, 1),
+    }
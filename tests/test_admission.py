@@ -0,0 +1,25 @@
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def test_per_key_cap_is_off_by_default():
+    controller = AdmissionController(max_concurrent=3, max_queue=0, max_wait=0.1)
+    with controller.admit('tenant'), controller.admit('tenant'), controller.admit('tenant'):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit('tenant'):
+                pass
+    assert rejected.value.reason == 'Analysis queue is full'
+    assert controller.stats()['admitted'] == 3
+
+
+def test_per_key_cap_when_configured():
+    controller = AdmissionController(max_concurrent=3, max_queue=0, max_per_key=1, max_wait=0.1)
+    with controller.admit('a'):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit('a'):
+                pass
+        with controller.admit('b'):
+            pass
+    assert rejected.value.reason == 'Too many concurrent analyses for this license key'
+    assert controller.stats()['active'] == 0
@@ -0,0 +1,36 @@
+from checkpoints import Checkpointer, checkpoint_key
+
+
+class _State:
+    def __init__(self, **state):
+        self._state = state
+
+    def state(self):
+        return self._state
+
+
+def test_checkpoint_key_depends_on_result_settings_only():
+    base = checkpoint_key('hash', {'frameSkip': 2, 'chart': True})
+    assert base == checkpoint_key('hash', {'frameSkip': 2, 'chart': False})
+    assert base != checkpoint_key('hash', {'frameSkip': 3})
+    assert base != checkpoint_key('other', {'frameSkip': 2})
+
+
+def test_save_load_discard(tmp_path):
+    checkpointer = Checkpointer('key', root=str(tmp_path))
+    assert checkpointer.load() is None
+    checkpointer.save(_State(last_frame=42))
+    assert Checkpointer('key', root=str(tmp_path)).load() == {'last_frame': 42}
+    checkpointer.discard()
+    assert checkpointer.load() is None
+
+
+def test_lease_is_exclusive_per_key(tmp_path):
+    first = Checkpointer('key', root=str(tmp_path))
+    second = Checkpointer('key', root=str(tmp_path))
+    assert first.acquire()
+    assert not second.acquire()
+    assert Checkpointer('other', root=str(tmp_path)).acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
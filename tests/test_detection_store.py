@@ -0,0 +1,45 @@
+import pytest
+
+from detection_store import MAX_QUERY_LIMIT, DetectionStoreBuilder, query_limit
+
+
+@pytest.fixture
+def store(tmp_path):
+    builder = DetectionStoreBuilder()
+    builder.add_frame(1, 0.0, [])
+    builder.add_frame(2, 0.5, [(10, 10, 40, 40)])
+    builder.add_frame(3, 1.0, [(0, 0, 20, 20), (50, 50, 80, 80)])
+    builder.add_frame(4, 1.5, [(5, 5, 60, 60)])
+    return builder.save(str(tmp_path))
+
+
+@pytest.mark.parametrize('raw, limit', [('-5', 1), (0, 1), ('25', 25), (10 ** 9, MAX_QUERY_LIMIT)])
+def test_query_limit_is_clamped(raw, limit):
+    assert query_limit(raw) == limit
+
+
+def test_query_limit_rejects_non_numbers():
+    with pytest.raises(ValueError):
+        query_limit('abc')
+
+
+def test_frame_boxes(store):
+    assert store.frame_boxes(3) == [(0, 0, 20, 20), (50, 50, 80, 80)]
+    assert store.frame_boxes(1) == []
+    assert store.frame_boxes(99) == []
+
+
+def test_query_frames_filters(store):
+    frames, times, counts = store.query_frames(min_faces=1, t2=1.0)
+    assert frames.tolist() == [2, 3]
+    assert counts.tolist() == [1, 2]
+    frames, _, _ = store.query_frames(start_frame=2, end_frame=4, max_faces=1)
+    assert frames.tolist() == [2, 4]
+
+
+def test_query_boxes_filters_by_size(store):
+    boxes, times = store.query_boxes(min_size=40, max_size=60)
+    assert boxes['frame'].tolist() == [2, 4]
+    assert times.tolist() == [0.5, 1.5]
+    boxes, _ = store.query_boxes(start_frame=3)
+    assert boxes['frame'].tolist() == [3, 3, 4]
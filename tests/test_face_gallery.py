@@ -0,0 +1,44 @@
+import random
+
+from face_gallery import MATCH_RADIUS, FaceGallery, HammingIndex
+
+
+def flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_hamming_index_matches_brute_force():
+    rng = random.Random(7)
+    stored = [rng.getrandbits(64) for _ in range(1500)]
+    index = HammingIndex()
+    for value in stored:
+        index.add(value)
+    assert len(index) == len(stored)
+    for _ in range(200):
+        base = rng.choice(stored)
+        query = flip(base, rng.sample(range(64), rng.randint(0, MATCH_RADIUS)))
+        item, distance = index.lookup(query)
+        best = min(bin(value ^ query).count('1') for value in stored)
+        assert distance == best
+        assert bin(stored[item] ^ query).count('1') == best
+
+
+def test_hamming_index_ignores_values_beyond_radius():
+    index = HammingIndex()
+    index.add(0)
+    assert index.lookup(flip(0, range(MATCH_RADIUS))) == (0, MATCH_RADIUS)
+    assert index.lookup(flip(0, range(MATCH_RADIUS + 1))) == (None, None)
+
+
+def test_gallery_groups_faces_by_hash_and_overlap():
+    gallery = FaceGallery()
+    far = flip(0, range(0, 64, 2))
+    gallery.add(1, [(0, 0, 50, 50)], [0])
+    gallery.add(2, [(2, 2, 50, 50), (200, 200, 50, 50)], [flip(0, [1, 2]), far])
+    gallery.add(3, [(200, 200, 50, 50)], [flip(far, range(1, 64, 2))])
+    assert gallery.unique_count() == 2
+    assert [face['frames'] for face in gallery.faces] == [2, 2]
+    assert gallery.faces[1]['first_frame'] == 2 and gallery.faces[1]['last_frame'] == 3
+    assert gallery.unique_count(min_frames=3) == 0
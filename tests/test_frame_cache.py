@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+from frame_cache import FrameCache
+
+META = {'fps': 30.0, 'total_frames': 10, 'width': 8, 'height': 4}
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'source.mp4'
+    path.write_bytes(b'video')
+    return str(path)
+
+
+def video_hash(n):
+    return f'{n:064x}'
+
+
+def fill(writer, frames, shape=(4, 8)):
+    for frame_idx in range(1, frames + 1):
+        writer.add(frame_idx, np.full(shape, frame_idx, dtype=np.uint8))
+
+
+def test_round_trip(tmp_path, source):
+    cache = FrameCache(str(tmp_path / 'cache'), max_bytes=10 ** 6)
+    writer = cache.writer(video_hash(1), 2, 0, source, META, projected_bytes=96)
+    fill(writer, 3)
+    writer.commit()
+    entry = cache.lookup(video_hash(1), 2, 0)
+    frames = [(frame_idx, gray[0, 0]) for frame_idx, _, gray in entry.frames(start_frame=1)]
+    assert frames == [(2, 2), (3, 3)]
+    assert cache.lookup(video_hash(1), 1, 0) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_projected_size_over_entry_cap_is_not_cached(tmp_path, source):
+    cache = FrameCache(str(tmp_path / 'cache'), max_bytes=1000, entry_fraction=0.25)
+    assert cache.writer(video_hash(1), 1, 0, source, META, projected_bytes=251) is None
+    assert cache.oversized == 1
+    assert not os.path.exists(os.path.join(cache.root, video_hash(1)))
+
+
+def test_writer_aborts_once_over_entry_cap(tmp_path, source):
+    cache = FrameCache(str(tmp_path / 'cache'), max_bytes=1000, entry_fraction=0.25)
+    writer = cache.writer(video_hash(1), 1, 0, source, META, projected_bytes=32)
+    fill(writer, 10)
+    writer.commit()
+    assert writer.aborted and writer.written <= cache.entry_max_bytes
+    assert cache.oversized == 1
+    assert cache.lookup(video_hash(1), 1, 0) is None
+    assert not any(name.startswith('.tmp-') for name in os.listdir(os.path.join(cache.root, video_hash(1))))
+
+
+def test_commit_evicts_oldest_entries_but_keeps_the_new_one(tmp_path, source):
+    cache = FrameCache(str(tmp_path / 'cache'), max_bytes=400, entry_fraction=0.5)
+    for n in (1, 2):
+        writer = cache.writer(video_hash(n), 1, 0, source, META, projected_bytes=96)
+        fill(writer, 3)
+        writer.commit()
+        os.utime(os.path.join(cache.root, video_hash(n)), (n, n))
+    assert cache.lookup(video_hash(1), 1, 0) is None
+    assert cache.lookup(video_hash(2), 1, 0) is not None
+    assert cache.usage_bytes() <= cache.max_bytes
@@ -0,0 +1,29 @@
+import os
+
+import jobs
+
+
+def _write_media(job_id, size):
+    os.makedirs(jobs.job_dir(job_id), exist_ok=True)
+    with open(jobs.source_path(job_id), 'wb') as f:
+        f.write(bytes(size))
+
+
+def test_trim_skips_jobs_in_use(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOBS_DIR', str(tmp_path))
+    first, second, third = '0' * 16, '1' * 16, '2' * 16
+    for job_id in (first, second, third):
+        _write_media(job_id, 100)
+    os.utime(jobs.source_path(first), (1, 1))
+    os.utime(jobs.source_path(second), (2, 2))
+
+    with jobs.job_in_use(first), jobs.job_in_use(first):
+        pass
+    with jobs.job_in_use(first):
+        assert jobs.trim_job_media(max_bytes=200) == 200
+    assert os.path.exists(jobs.source_path(first))
+    assert not os.path.exists(jobs.source_path(second))
+
+    assert jobs.trim_job_media(max_bytes=100) == 100
+    assert not os.path.exists(jobs.source_path(first))
+    assert os.path.exists(jobs.source_path(third))
@@ -0,0 +1,75 @@
+import struct
+
+import pytest
+
+from probe import ProbeError, check_limits, probe_bytes
+
+
+def box(kind, body):
+    return struct.pack('>I4s', 8 + len(body), kind) + body
+
+
+def tkhd(version, width, height):
+    if version == 1:
+        fields = struct.pack('>QQIIQ', 0, 0, 1, 0, 0)
+    else:
+        fields = struct.pack('>IIIII', 0, 0, 1, 0, 0)
+    body = bytes([version, 0, 0, 7]) + fields + bytes(8) + bytes(8) + bytes(36)
+    return box(b'tkhd', body + struct.pack('>II', width << 16, height << 16))
+
+
+def mdhd(version, timescale, duration):
+    if version == 1:
+        fields = struct.pack('>QQIQ', 0, 0, timescale, duration)
+    else:
+        fields = struct.pack('>IIII', 0, 0, timescale, duration)
+    return box(b'mdhd', bytes([version, 0, 0, 0]) + fields + bytes(4))
+
+
+def mp4(version, width=1920, height=1080, frames=300, timescale=30000, duration=300000):
+    stbl = box(b'stbl', box(b'stsd', bytes(8) + struct.pack('>I4s', 16, b'avc1') + bytes(8)) +
+               box(b'stsz', bytes(8) + struct.pack('>I', frames)))
+    mdia = box(b'mdia', mdhd(version, timescale, duration) + box(b'hdlr', bytes(8) + b'vide' + bytes(12)) +
+               box(b'minf', stbl))
+    moov = box(b'moov', box(b'trak', tkhd(version, width, height) + mdia))
+    return box(b'ftyp', b'isom' + bytes(4)) + moov
+
+
+@pytest.mark.parametrize('version', [0, 1])
+def test_probe_mp4_track_header_versions(version):
+    info = probe_bytes(mp4(version))
+    assert info['container'] == 'mp4'
+    assert info['codec'] == 'avc1'
+    assert (info['width'], info['height']) == (1920, 1080)
+    assert info['frame_count'] == 300
+    assert info['fps'] == 30.0
+    assert info['duration'] == 10.0
+
+
+def test_probe_moov_in_tail_slice():
+    data = mp4(0) + box(b'mdat', bytes(4096))
+    ftyp_size = 16
+    head, tail = data[:ftyp_size], data[ftyp_size:]
+    info = probe_bytes(head, tail, len(data))
+    assert (info['width'], info['height']) == (1920, 1080)
+
+
+def test_probe_rejects_unknown_container():
+    with pytest.raises(ProbeError):
+        probe_bytes(b'not a video at all')
+
+
+def test_check_limits_rejects_long_videos():
+    assert check_limits(probe_bytes(mp4(0, frames=5000))) == 'Video too long for free tier'
+
+
+def test_probe_truncated_largesize_box():
+    moov = box(b'moov', struct.pack('>I4s', 1, b'trak'))
+    with pytest.raises(ProbeError):
+        probe_bytes(box(b'ftyp', b'isom' + bytes(4)) + moov)
+
+
+def test_probe_corrupt_track_header():
+    moov = box(b'moov', box(b'trak', box(b'tkhd', bytes([1, 0, 0, 0]) + bytes(8))))
+    with pytest.raises(ProbeError):
+        probe_bytes(box(b'ftyp', b'isom' + bytes(4)) + moov)
@@ -0,0 +1,37 @@
+import time
+
+from scheduler import FairScheduler, _Unit, parse_tenant_weights, tenant_id
+
+
+def test_tenant_weights_take_raw_license_keys():
+    weights = parse_tenant_weights('KEY_ONE:3, key:with:colon:0.5,broken')
+    assert weights == {tenant_id('KEY_ONE'): 3.0, tenant_id('key:with:colon'): 0.5}
+
+
+def test_priority_does_not_inflate_a_tenants_share():
+    scheduler = FairScheduler(slots=2)
+    high = scheduler._acquire('a', 'high')
+    normal = scheduler._acquire('b', 'normal')
+    assert high.weight == normal.weight == 1.0
+    assert scheduler._tenants['a'].finish == scheduler._tenants['b'].finish
+
+
+def test_priority_reorders_only_within_the_head_tenant():
+    scheduler = FairScheduler(slots=1, starvation_seconds=60)
+    a_normal = _Unit('a', 0.0, 1.0, 1)
+    b_high = _Unit('b', 0.5, 1.0, 2)
+    a_high = _Unit('a', 1.0, 1.0, 2)
+    scheduler._waiting = [a_normal, b_high, a_high]
+    chosen, starved = scheduler._next_unit()
+    assert chosen is a_high and not starved
+    assert (a_high.start_tag, a_normal.start_tag) == (0.0, 1.0)
+    assert b_high.start_tag == 0.5
+
+
+def test_starved_unit_jumps_the_queue():
+    scheduler = FairScheduler(slots=1, starvation_seconds=5)
+    fresh = _Unit('a', 0.0, 1.0, 1)
+    stale = _Unit('b', 9.0, 1.0, 1)
+    stale.enqueued_at = time.monotonic() - 10
+    scheduler._waiting = [fresh, stale]
+    assert scheduler._next_unit() == (stale, True)
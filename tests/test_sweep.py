@@ -0,0 +1,36 @@
+import pytest
+
+from sweep import MAX_SWEEP_CONFIGS, SweepError, expand_grid
+
+
+def test_expand_grid_crosses_values_over_base_settings():
+    configs = expand_grid({'sensitivity': [3, 7], 'frameSkip': [1, 2.0]}, {'minFaceSize': 40, 'chart': False})
+    assert [(c['sensitivity'], c['frameSkip']) for c in configs] == [(3, 1), (3, 2), (7, 1), (7, 2)]
+    assert all(c['minFaceSize'] == 40 and c['chart'] is False for c in configs)
+    assert all(isinstance(c['frameSkip'], int) for c in configs)
+
+
+@pytest.mark.parametrize('grid, message', [
+    ({'sensitivity': ['high']}, 'must be numbers'),
+    ({'sensitivity': [True]}, 'must be numbers'),
+    ({'sensitivity': [float('nan')]}, 'must be numbers'),
+    ({'sensitivity': [-5]}, 'greater than -5'),
+    ({'minFaceSize': [0]}, 'positive integers'),
+    ({'minFaceSize': [12.5]}, 'positive integers'),
+    ({'frameSkip': [-1]}, 'positive integers'),
+    ({'frameSkip': []}, 'non-empty list'),
+    ({'frameSkip': 2}, 'non-empty list'),
+])
+def test_expand_grid_rejects_bad_values(grid, message):
+    with pytest.raises(SweepError, match=message):
+        expand_grid(grid, {})
+
+
+def test_expand_grid_validates_base_settings():
+    with pytest.raises(SweepError):
+        expand_grid({}, {'sensitivity': -10})
+
+
+def test_expand_grid_limits_configurations():
+    with pytest.raises(SweepError, match='limit is'):
+        expand_grid({'sensitivity': list(range(MAX_SWEEP_CONFIGS + 1))}, {})
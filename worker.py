@@ -0,0 +1,178 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+
+import cv2
+
+from analysis import analysis_scale, decode_frames
+from detection import detect_faces, face_cascade
+from face_gallery import face_hashes
+from previews import face_sharpness
+
+HEARTBEAT_INTERVAL = float(os.environ.get('CLUSTER_HEARTBEAT_INTERVAL', 2))
+IDLE_POLL = 0.5
+MAX_CACHED_SOURCES = 4
+
+
+class CoordinatorClient:
+    def __init__(self, base_url, token, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def request(self, method, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers={
+            'X-Cluster-Token': self.token,
+            'Content-Type': 'application/json',
+        })
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                body = response.read()
+                return response.status, json.loads(body) if body else None
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def download(self, path, dest):
+        req = urllib.request.Request(self.base_url + path, headers={'X-Cluster-Token': self.token})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response, open(dest, 'wb') as out:
+            shutil.copyfileobj(response, out)
+
+
+def analyze_segment(source_path, segment):
+    settings = segment['settings']
+    cap = cv2.VideoCapture(source_path)
+    if not cap.isOpened():
+        raise RuntimeError('Failed to open video file')
+    try:
+        scale = analysis_scale(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), settings)
+        cascade = face_cascade()
+        unique_faces = settings.get('uniqueFaces', True)
+        end_frame = segment['end_frame']
+        frames = []
+        for frame_idx, _, gray in decode_frames(cap, settings.get('frameSkip', 1), scale,
+                                                start_frame=segment['start_frame']):
+            if end_frame is not None and frame_idx > end_frame:
+                break
+            faces = detect_faces(cascade, gray, settings, scale)
+            hashes = face_hashes(gray, faces, scale).tolist() if unique_faces else None
+            frames.append([frame_idx, [[int(v) for v in box] for box in faces],
+                           face_sharpness(gray, faces, scale), hashes])
+        return frames
+    finally:
+        cap.release()
+
+
+class Worker:
+    def __init__(self, client, name, capacity):
+        self.client = client
+        self.name = name
+        self.capacity = capacity
+        self.worker_id = None
+        self.stopping = threading.Event()
+        self.cache_dir = tempfile.mkdtemp(prefix='face-worker-')
+        self._sources = OrderedDict()
+        self._source_lock = threading.Lock()
+        self._register_lock = threading.Lock()
+
+    def register(self):
+        with self._register_lock:
+            while not self.stopping.is_set():
+                try:
+                    status, body = self.client.request('POST', '/cluster/workers',
+                                                       {'name': self.name, 'capacity': self.capacity})
+                except OSError as e:
+                    status, body = None, None
+                    logging.warning(f'Coordinator unreachable: {e}')
+                if status == 200:
+                    self.worker_id = body['worker_id']
+                    logging.info(f'Registered as {self.worker_id}')
+                    return
+                time.sleep(HEARTBEAT_INTERVAL)
+
+    def heartbeat_loop(self):
+        while not self.stopping.wait(HEARTBEAT_INTERVAL):
+            try:
+                status, _ = self.client.request('POST', f'/cluster/workers/{self.worker_id}/heartbeat')
+            except OSError:
+                continue
+            if status == 404:
+                self.register()
+
+    def source(self, job_id):
+        with self._source_lock:
+            path = self._sources.get(job_id)
+            if path is None:
+                path = os.path.join(self.cache_dir, f'{job_id}.mp4')
+                self.client.download(f'/cluster/jobs/{job_id}/source', path)
+                self._sources[job_id] = path
+                while len(self._sources) > MAX_CACHED_SOURCES:
+                    _, old_path = self._sources.popitem(last=False)
+                    os.remove(old_path)
+            self._sources.move_to_end(job_id)
+            return path
+
+    def work_loop(self):
+        while not self.stopping.is_set():
+            try:
+                status, segment = self.client.request('POST', '/cluster/lease', {'worker_id': self.worker_id})
+            except OSError:
+                time.sleep(IDLE_POLL)
+                continue
+            if status == 404:
+                self.register()
+                continue
+            if status != 200:
+                time.sleep(IDLE_POLL)
+                continue
+
+            segment_id = segment['segment_id']
+            try:
+                frames = analyze_segment(self.source(segment['job_id']), segment)
+            except Exception as e:
+                logging.error(f'Segment {segment_id} failed: {e}')
+                self.client.request('POST', f'/cluster/segments/{segment_id}/fail',
+                                    {'worker_id': self.worker_id, 'error': str(e)})
+                continue
+            self.client.request('POST', f'/cluster/segments/{segment_id}/complete',
+                                {'worker_id': self.worker_id, 'frames': frames})
+
+    def run(self):
+        self.register()
+        threads = [threading.Thread(target=self.heartbeat_loop, daemon=True)]
+        threads += [threading.Thread(target=self.work_loop, daemon=True) for _ in range(self.capacity)]
+        for thread in threads:
+            thread.start()
+        try:
+            while not self.stopping.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stopping.set()
+        finally:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remote analysis worker that leases frame segments from a coordinator.')
+    parser.add_argument('--coordinator', default=os.environ.get('CLUSTER_COORDINATOR', 'http://127.0.0.1:5000'))
+    parser.add_argument('--token', default=os.environ.get('CLUSTER_TOKEN', ''))
+    parser.add_argument('--name', default=f'{socket.gethostname()}:{os.getpid()}')
+    parser.add_argument('--capacity', type=int, default=1, help='segments analysed concurrently')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) // args.capacity))
+    Worker(CoordinatorClient(args.coordinator, args.token), args.name, args.capacity).run()
+
+
+if __name__ == '__main__':
+    main()